@@ -0,0 +1,136 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tower_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    fingerprint TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    response_tokens INTEGER NOT NULL DEFAULT 0,
+    analysis TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_tower_time ON analyses (tower_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_time ON analyses (created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_fingerprint ON analyses (tower_id, kind, fingerprint, created_at);
+
+CREATE TABLE IF NOT EXISTS analysis_alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    analysis_id INTEGER NOT NULL REFERENCES analyses (id) ON DELETE CASCADE,
+    tower_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    created INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_analysis ON analysis_alerts (analysis_id);
+CREATE INDEX IF NOT EXISTS idx_alerts_tower ON analysis_alerts (tower_id, analysis_id);
+"""
+
+
+def context_fingerprint(context: Dict[str, Any]) -> str:
+    """Stable hash of the data an analysis was based on"""
+    canonical = json.dumps(context, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) when the model does not report usage"""
+    return (len(text) + 3) // 4
+
+
+class AnalysisStore:
+    """Embedded SQLite store for analyses and the alerts extracted from them"""
+
+    def __init__(self, path: str = "analyses.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+
+    def record_analysis(self, tower_id: int, kind: str, fingerprint: str, analysis: str,
+                        prompt_tokens: int = 0, response_tokens: int = 0,
+                        alerts: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Store one analysis with its extracted alerts. Returns the analysis ID."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO analyses (tower_id, kind, created_at, fingerprint, prompt_tokens, response_tokens, analysis) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (tower_id, kind, time.time(), fingerprint, prompt_tokens, response_tokens, analysis)
+            )
+            analysis_id = cursor.lastrowid
+            if alerts:
+                self._conn.executemany(
+                    "INSERT INTO analysis_alerts (analysis_id, tower_id, title, description, severity, created) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(analysis_id, tower_id, a["title"], a["description"], a["severity"], int(bool(a.get("created"))))
+                     for a in alerts]
+                )
+        return analysis_id
+
+    def find_recent(self, tower_id: int, kind: str, fingerprint: str, max_age_seconds: float) -> Optional[Dict[str, Any]]:
+        """Latest analysis of this kind for the same context, if younger than max_age_seconds"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM analyses WHERE tower_id = ? AND kind = ? AND fingerprint = ? AND created_at >= ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (tower_id, kind, fingerprint, time.time() - max_age_seconds)
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def get_analysis(self, analysis_id: int) -> Optional[Dict[str, Any]]:
+        """One analysis with its alerts"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM analyses WHERE id = ?", (analysis_id,)).fetchone()
+            if row is None:
+                return None
+            alerts = self._conn.execute(
+                "SELECT title, description, severity, created FROM analysis_alerts WHERE analysis_id = ? ORDER BY id",
+                (analysis_id,)
+            ).fetchall()
+        result = self._row_to_dict(row)
+        result["alerts"] = [dict(a, created=bool(a["created"])) for a in alerts]
+        return result
+
+    def list_analyses(self, tower_id: Optional[int] = None, kind: Optional[str] = None,
+                      limit: int = 20, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """Newest-first page of analyses (without full text) and the total count"""
+        where = []
+        params: List[Any] = []
+        if tower_id is not None:
+            where.append("a.tower_id = ?")
+            params.append(tower_id)
+        if kind:
+            where.append("a.kind = ?")
+            params.append(kind)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM analyses a {where_sql}", params).fetchone()[0]
+            rows = self._conn.execute(
+                "SELECT a.id, a.tower_id, a.kind, a.created_at, a.fingerprint, a.prompt_tokens, a.response_tokens, "
+                "(SELECT COUNT(*) FROM analysis_alerts al WHERE al.analysis_id = a.id) AS alert_count "
+                f"FROM analyses a {where_sql} ORDER BY a.created_at DESC, a.id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows], total
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        result = dict(row)
+        result["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(result["created_at"]))
+        return result
@@ -1,13 +1,20 @@
-from fastapi import FastAPI, BackgroundTasks
+from fastapi import FastAPI, BackgroundTasks, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 import requests
-import json
+from pathlib import Path
+from shared_serialization import serialization
+import os
 import re
+import threading
+import time
 import asyncio
 from gemini_integration import GeminiTowerAnalyzer
+from record_index import get_tower_index
+from analysis_store import AnalysisStore, context_fingerprint, estimate_tokens
 
 # Pydantic models for request/response
 class TowerAnalysisRequest(BaseModel):
@@ -32,8 +39,18 @@ class ChatMessageResponse(BaseModel):
     ai_response: str
     timestamp: str
 
+class IngestItem(BaseModel):
+    tower_id: Optional[int] = None
+    telemetry_data: List[Dict[str, Any]] = []
+    siteboss_data: Dict[str, Any] = {}
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered through the shared serialization module (orjson when installed)"""
+    def render(self, content: Any) -> bytes:
+        return serialization.dumps_bytes(content)
+
 # Initialize FastAPI app
-app = FastAPI(title="Tower AI Service", version="1.0.0")
+app = FastAPI(title="Tower AI Service", version="1.0.0", default_response_class=FastJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -64,11 +81,67 @@ def get_gemini_analyzer():
 TELEMETRY_BASE_URL = "http://localhost:8080"  # Telemetry simulator
 BACKEND_BASE_URL = "http://localhost:8088"    # Main backend
 
+# Persistent history of analyses and extracted alerts, next to this file unless overridden
+ANALYSIS_DB_PATH = os.environ.get("ANALYSIS_DB_PATH", str(Path(__file__).resolve().parent / "analyses.db"))
+# Identical context analyzed within this window is served from the store instead of the LLM
+ANALYSIS_REUSE_SECONDS = 600
+analysis_store = None
+analysis_store_lock = threading.Lock()
+
+def get_analysis_store() -> AnalysisStore:
+    """Get the analysis store, opening it on first use (importing the module touches no files)"""
+    global analysis_store
+    with analysis_store_lock:
+        if analysis_store is None:
+            analysis_store = AnalysisStore(ANALYSIS_DB_PATH)
+        return analysis_store
+
+def created_alert_summaries(alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """The alerts that were created in the backend, in the shape the store returns them"""
+    return [{"title": a["title"], "description": a["description"], "severity": a["severity"], "created": True}
+            for a in alerts if a.get("created")]
+
+def usage_token_counts(usage, prompt: str, response_text: str):
+    """(prompt_tokens, response_tokens) from Gemini usage metadata, estimated if missing"""
+    if usage is not None and getattr(usage, "prompt_token_count", None):
+        return usage.prompt_token_count, getattr(usage, "candidates_token_count", 0) or 0
+    return estimate_tokens(prompt), estimate_tokens(response_text)
+
+# Max hardware/maintenance records included in tower-specific chat prompts
+CHAT_RECORD_TOP_K = 8
+
 # Global flag to track if auto-alerting is enabled
 auto_alerting_enabled = False  # DISABLED: To preserve quota for manual use
 
+# Latest data pushed to /ingest, keyed by tower ID. Fresh entries are served
+# instead of polling the simulator and backend.
+PUSHED_STATE_TTL_SECONDS = 300
+pushed_tower_state: Dict[int, Dict[str, Any]] = {}
+# Towers with a push-triggered analysis scheduled or running. Ingest requests and
+# background tasks run on the threadpool, so the check-and-add is locked.
+analysis_in_flight = set()
+analysis_in_flight_lock = threading.Lock()
+
+def claim_analysis(tower_id: int) -> bool:
+    """Mark a tower's analysis as in flight; False if one is already scheduled or running"""
+    with analysis_in_flight_lock:
+        if tower_id in analysis_in_flight:
+            return False
+        analysis_in_flight.add(tower_id)
+        return True
+
+def get_pushed_state(tower_id: int) -> Dict[str, Any]:
+    """Return pushed data for a tower if it is still fresh"""
+    state = pushed_tower_state.get(tower_id)
+    if state and time.time() - state["received_at"] <= PUSHED_STATE_TTL_SECONDS:
+        return state
+    return {}
+
 def fetch_telemetry_data(tower_id: int) -> List[Dict[str, Any]]:
     """Fetch telemetry data from the telemetry simulator"""
+    pushed = get_pushed_state(tower_id)
+    if pushed.get("telemetry_data"):
+        return pushed["telemetry_data"]
     try:
         # For now, we'll use the live endpoint since tower-specific data isn't available
         response = requests.get(f"{TELEMETRY_BASE_URL}/api/telemetry/live", timeout=5)
@@ -85,6 +158,9 @@ def fetch_telemetry_data(tower_id: int) -> List[Dict[str, Any]]:
 
 def fetch_siteboss_data(tower_id: int) -> Dict[str, Any]:
     """Fetch SiteBoss data from the main backend"""
+    pushed = get_pushed_state(tower_id)
+    if pushed.get("siteboss_data"):
+        return pushed["siteboss_data"]
     try:
         response = requests.get(f"{BACKEND_BASE_URL}/api/siteboss/latest", timeout=5)
         if response.status_code == 200:
@@ -270,6 +346,75 @@ def extract_alerts_from_analysis(analysis: str, tower_id: int) -> List[Dict[str,
     
     return alerts
 
+def run_alert_analysis(tower_id: int) -> int:
+    """Analyze one tower and create alerts for any issues found. Returns the number of alerts created."""
+    telemetry_data = fetch_telemetry_data(tower_id)
+    siteboss_data = fetch_siteboss_data(tower_id)
+    hardware_data = fetch_hardware_data(tower_id)
+    maintenance_data = fetch_maintenance_data(tower_id)
+    
+    # Create analysis prompt
+    analysis_prompt = f"""
+    You are an expert in 5G tower monitoring. Analyze this tower data for any issues requiring alerts:
+    
+    TOWER ID: {tower_id}
+    TELEMETRY DATA: {serialization.dumps(telemetry_data)}
+    SITEBOSS DATA: {serialization.dumps(siteboss_data)}
+    HARDWARE COMPONENTS: {serialization.dumps(hardware_data or [])}
+    MAINTENANCE RECORDS: {serialization.dumps(maintenance_data or [])}
+    
+    Identify any critical issues, security breaches, maintenance needs, or hardware problems.
+    Be concise and focus only on actionable items.
+    """
+    
+    # Get AI analysis
+    analyzer = get_gemini_analyzer()
+    analysis = None
+    if analyzer:
+        analysis = analyzer.model.generate_content(analysis_prompt)
+        analysis_text = clean_markdown_formatting(analysis.text)
+    else:
+        analysis_text = f"Tower {tower_id} status: Normal operation. No immediate alerts required."
+    
+    # Extract and create alerts
+    extracted_alerts = extract_alerts_from_analysis(analysis_text, tower_id)
+    created_count = 0
+    
+    for alert_data in extracted_alerts:
+        created_alert = create_alert(
+            alert_data["tower_id"],
+            alert_data["title"],
+            alert_data["description"],
+            alert_data["severity"]
+        )
+        alert_data["created"] = bool(created_alert)
+        if created_alert:
+            created_count += 1
+    
+    if analysis is not None:
+        prompt_tokens, response_tokens = usage_token_counts(
+            getattr(analysis, "usage_metadata", None), analysis_prompt, analysis_text)
+        get_analysis_store().record_analysis(
+            tower_id, "alerts",
+            context_fingerprint({"telemetry_data": telemetry_data, "siteboss_data": siteboss_data,
+                                 "hardware_data": hardware_data, "maintenance_data": maintenance_data}),
+            analysis_text, prompt_tokens, response_tokens, extracted_alerts
+        )
+    
+    return created_count
+
+def analyze_pushed_tower(tower_id: int):
+    """Background task: analyze a tower after new data was pushed to /ingest (claimed by claim_analysis)"""
+    try:
+        created_count = run_alert_analysis(tower_id)
+        if created_count > 0:
+            print(f"✅ Generated {created_count} alerts for Tower {tower_id} (push)")
+    except Exception as e:
+        print(f"❌ Error processing pushed data for Tower {tower_id}: {e}")
+    finally:
+        with analysis_in_flight_lock:
+            analysis_in_flight.discard(tower_id)
+
 async def auto_generate_alerts():
     """Automatically generate alerts for all towers every 5 minutes"""
     global auto_alerting_enabled
@@ -287,53 +432,13 @@ async def auto_generate_alerts():
                     continue
                 
                 for tower_id in towers_to_check:
+                    # Towers pushing to /ingest are analyzed as their data arrives
+                    if get_pushed_state(tower_id):
+                        continue
                     try:
-                        # Generate alerts for this tower
-                        telemetry_data = fetch_telemetry_data(tower_id)
-                        siteboss_data = fetch_siteboss_data(tower_id)
-                        tower_info = fetch_tower_info(tower_id)
-                        hardware_data = fetch_hardware_data(tower_id)
-                        maintenance_data = fetch_maintenance_data(tower_id)
-                        
-                        # Create analysis prompt
-                        analysis_prompt = f"""
-                        You are an expert in 5G tower monitoring. Analyze this tower data for any issues requiring alerts:
-                        
-                        TOWER ID: {tower_id}
-                        TELEMETRY DATA: {json.dumps(telemetry_data, indent=2)}
-                        SITEBOSS DATA: {json.dumps(siteboss_data, indent=2)}
-                        HARDWARE COMPONENTS: {json.dumps(hardware_data or [], indent=2)}
-                        MAINTENANCE RECORDS: {json.dumps(maintenance_data or [], indent=2)}
-                        
-                        Identify any critical issues, security breaches, maintenance needs, or hardware problems.
-                        Be concise and focus only on actionable items.
-                        """
-                        
-                        # Get AI analysis
-                        analyzer = get_gemini_analyzer()
-                        if analyzer:
-                            analysis = analyzer.model.generate_content(analysis_prompt)
-                            analysis_text = clean_markdown_formatting(analysis.text)
-                        else:
-                            analysis_text = f"Tower {tower_id} status: Normal operation. No immediate alerts required."
-                        
-                        # Extract and create alerts
-                        extracted_alerts = extract_alerts_from_analysis(analysis_text, tower_id)
-                        created_count = 0
-                        
-                        for alert_data in extracted_alerts:
-                            created_alert = create_alert(
-                                alert_data["tower_id"],
-                                alert_data["title"],
-                                alert_data["description"],
-                                alert_data["severity"]
-                            )
-                            if created_alert:
-                                created_count += 1
-                        
+                        created_count = run_alert_analysis(tower_id)
                         if created_count > 0:
                             print(f"✅ Generated {created_count} alerts for Tower {tower_id}")
-                        
                     except Exception as e:
                         print(f"❌ Error processing Tower {tower_id}: {e}")
                 
@@ -361,6 +466,83 @@ def health_check():
         "status": "healthy", 
         "service": "Tower AI Service", 
         "auto_alerting": auto_alerting_enabled,
+        "pushed_towers": len(pushed_tower_state),
+        "timestamp": datetime.now().isoformat()
+    }
+
+def split_ingest_item(index: int, item: IngestItem) -> List[tuple]:
+    """(tower_id, telemetry records, siteboss_data) parts of one pushed item.
+    Without a tower_id, records are grouped by their own towerId, so a batch mixing towers
+    never files one tower's telemetry under another."""
+    if item.tower_id is not None:
+        return [(item.tower_id, item.telemetry_data, item.siteboss_data)]
+    groups: Dict[int, List[Dict[str, Any]]] = {}
+    for record in item.telemetry_data:
+        tower_id = record.get("towerId")
+        # Same int key as tower_id and the /tower/{id} routes, even if the record sends "50"
+        try:
+            tower_id = int(tower_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=422, detail=f"Item {index}: invalid towerId {tower_id!r}")
+        groups.setdefault(tower_id, []).append(record)
+    if item.siteboss_data and len(groups) > 1:
+        raise HTTPException(status_code=422, detail=f"Item {index}: siteboss_data with records from several towers needs a tower_id")
+    return [(tower_id, records, item.siteboss_data) for tower_id, records in groups.items()]
+
+# Push-based ingestion (telemetry simulator, SiteBoss puller)
+@app.post("/ingest")
+def ingest_data(payload: Union[IngestItem, List[IngestItem]], background_tasks: BackgroundTasks):
+    """Accept pushed telemetry and SiteBoss snapshots, single or batched"""
+    items = payload if isinstance(payload, list) else [payload]
+    received_at = time.time()
+    updated = {}
+    rejected = 0
+    
+    for index, item in enumerate(items):
+        parts = split_ingest_item(index, item)
+        if not parts or not (item.telemetry_data or item.siteboss_data):
+            rejected += 1
+            continue
+        
+        for tower_id, telemetry_data, siteboss_data in parts:
+            state = updated.get(tower_id)
+            if state is None:
+                # Start from the previous push so a SiteBoss-only push keeps the latest telemetry
+                previous = pushed_tower_state.get(tower_id, {})
+                state = {
+                    "telemetry_data": previous.get("telemetry_data", []),
+                    "siteboss_data": previous.get("siteboss_data", {}),
+                    "fresh_telemetry": False
+                }
+                updated[tower_id] = state
+            if telemetry_data:
+                # Records from one batch are kept together, a new batch replaces the old one
+                if state["fresh_telemetry"]:
+                    state["telemetry_data"] = state["telemetry_data"] + telemetry_data
+                else:
+                    state["telemetry_data"] = list(telemetry_data)
+                    state["fresh_telemetry"] = True
+            if siteboss_data:
+                state["siteboss_data"] = siteboss_data
+    
+    analysis_scheduled = []
+    for tower_id, state in updated.items():
+        pushed_tower_state[tower_id] = {
+            "telemetry_data": state["telemetry_data"],
+            "siteboss_data": state["siteboss_data"],
+            "received_at": received_at
+        }
+        # Only towers touched by this push are analyzed, and only when auto-alerting is on
+        if auto_alerting_enabled and claim_analysis(tower_id):
+            background_tasks.add_task(analyze_pushed_tower, tower_id)
+            analysis_scheduled.append(tower_id)
+    
+    return {
+        "status": "success",
+        "accepted": len(items) - rejected,
+        "rejected": rejected,
+        "towers_updated": sorted(updated),
+        "analysis_scheduled": analysis_scheduled,
         "timestamp": datetime.now().isoformat()
     }
 
@@ -395,49 +577,7 @@ def generate_all_alerts_now():
         
         for tower_id in towers_to_check:
             try:
-                # Generate alerts for this tower
-                telemetry_data = fetch_telemetry_data(tower_id)
-                siteboss_data = fetch_siteboss_data(tower_id)
-                tower_info = fetch_tower_info(tower_id)
-                hardware_data = fetch_hardware_data(tower_id)
-                maintenance_data = fetch_maintenance_data(tower_id)
-                
-                # Create analysis prompt
-                analysis_prompt = f"""
-                You are an expert in 5G tower monitoring. Analyze this tower data for any issues requiring alerts:
-                
-                TOWER ID: {tower_id}
-                TELEMETRY DATA: {json.dumps(telemetry_data, indent=2)}
-                SITEBOSS DATA: {json.dumps(siteboss_data, indent=2)}
-                HARDWARE COMPONENTS: {json.dumps(hardware_data or [], indent=2)}
-                MAINTENANCE RECORDS: {json.dumps(maintenance_data or [], indent=2)}
-                
-                Identify any critical issues, security breaches, maintenance needs, or hardware problems.
-                Be concise and focus only on actionable items.
-                """
-                
-                # Get AI analysis
-                analyzer = get_gemini_analyzer()
-                if analyzer:
-                    analysis = analyzer.model.generate_content(analysis_prompt)
-                    analysis_text = clean_markdown_formatting(analysis.text)
-                else:
-                    analysis_text = f"Tower {tower_id} status: Normal operation. No immediate alerts required."
-                
-                # Extract and create alerts
-                extracted_alerts = extract_alerts_from_analysis(analysis_text, tower_id)
-                created_count = 0
-                
-                for alert_data in extracted_alerts:
-                    created_alert = create_alert(
-                        alert_data["tower_id"],
-                        alert_data["title"],
-                        alert_data["description"],
-                        alert_data["severity"]
-                    )
-                    if created_alert:
-                        created_count += 1
-                
+                created_count = run_alert_analysis(tower_id)
                 total_alerts += created_count
                 results.append({
                     "tower_id": tower_id,
@@ -550,7 +690,7 @@ def chat_with_ai(request: ChatMessageRequest):
                 USER QUESTION: {request.message}
                 
                 SYSTEM TOWERS INFORMATION:
-                {json.dumps(towers_info, indent=2)}
+                {serialization.dumps(towers_info)}
                 
                 Please provide a comprehensive overview of all towers in the system. Include:
                 1. Total number of towers
@@ -574,6 +714,13 @@ def chat_with_ai(request: ChatMessageRequest):
                 Please inform the user that no towers are currently available in the system and suggest they check the system status or contact an administrator.
                 """
         else:
+            # Only the records most relevant to the question go into the prompt
+            record_index = get_tower_index(request.tower_id)
+            record_index.sync("hardware", hardware_data)
+            record_index.sync("maintenance", maintenance_data)
+            relevant_hardware = record_index.search(request.message, "hardware", CHAT_RECORD_TOP_K)
+            relevant_maintenance = record_index.search(request.message, "maintenance", CHAT_RECORD_TOP_K)
+            
             prompt = f"""
             You are a helpful AI assistant for tower monitoring. A user is asking about tower {request.tower_id} specifically.
             
@@ -582,15 +729,15 @@ def chat_with_ai(request: ChatMessageRequest):
             FOCUS: This is a tower-specific query. Provide detailed information about Tower {request.tower_id} only.
             Do NOT provide information about other towers unless specifically asked.
             
-            TOWER INFORMATION: {json.dumps(tower_info, indent=2)}
+            TOWER INFORMATION: {serialization.dumps(tower_info)}
             
-            TELEMETRY DATA: {json.dumps(telemetry_data, indent=2)}
+            TELEMETRY DATA: {serialization.dumps(telemetry_data)}
             
-            SITEBOSS DATA: {json.dumps(siteboss_data, indent=2)}
+            SITEBOSS DATA: {serialization.dumps(siteboss_data)}
             
-            HARDWARE COMPONENTS: {json.dumps(hardware_data, indent=2)}
+            HARDWARE COMPONENTS ({len(relevant_hardware)} most relevant of {len(hardware_data)}): {serialization.dumps(relevant_hardware)}
             
-            MAINTENANCE RECORDS: {json.dumps(maintenance_data, indent=2)}
+            MAINTENANCE RECORDS ({len(relevant_maintenance)} most relevant of {len(maintenance_data)}): {serialization.dumps(relevant_maintenance)}
             
             Please provide a helpful, conversational response focused specifically on Tower {request.tower_id}.
             You have access to comprehensive data, so you can provide insights about:
@@ -681,16 +828,31 @@ def get_tower_insights(tower_id: int):
             "maintenance_data": maintenance_data
         }
         
-        # Create a comprehensive prompt for Gemini with all data
-        analyzer = get_gemini_analyzer()
-        if analyzer:
-            analysis = analyzer.analyze_tower_data(tower_id, telemetry_data, siteboss_data, hardware_data, maintenance_data)
+        # Serve a recent analysis of the same data from the store
+        fingerprint = context_fingerprint(combined_data)
+        stored = get_analysis_store().find_recent(tower_id, "insights", fingerprint, ANALYSIS_REUSE_SECONDS)
+        analysis_id = None
+        if stored:
+            analysis = stored["analysis"]
+            analysis_id = stored["id"]
         else:
-            analysis = f"Tower {tower_id} analysis: Basic health check shows normal operation. All systems functioning within expected parameters."
+            # Create a comprehensive prompt for Gemini with all data
+            analyzer = get_gemini_analyzer()
+            if analyzer:
+                analysis = analyzer.analyze_tower_data(tower_id, telemetry_data, siteboss_data, hardware_data, maintenance_data)
+                if not analysis.startswith("Error analyzing tower data"):
+                    prompt_tokens, response_tokens = usage_token_counts(
+                        analyzer.last_usage, serialization.dumps(combined_data), analysis)
+                    analysis_id = get_analysis_store().record_analysis(
+                        tower_id, "insights", fingerprint, analysis, prompt_tokens, response_tokens)
+            else:
+                analysis = f"Tower {tower_id} analysis: Basic health check shows normal operation. All systems functioning within expected parameters."
         
         return {
             "tower_id": tower_id,
             "analysis": analysis,
+            "analysis_id": analysis_id,
+            "cached": stored is not None,
             "data_sources": {
                 "telemetry_available": len(telemetry_data) > 0,
                 "siteboss_available": len(siteboss_data) > 0,
@@ -719,6 +881,28 @@ def generate_ai_alerts(tower_id: int):
         hardware_data = fetch_hardware_data(tower_id)
         maintenance_data = fetch_maintenance_data(tower_id)
         
+        # Serve a recent analysis of the same data from the store
+        fingerprint = context_fingerprint({
+            "telemetry_data": telemetry_data,
+            "siteboss_data": siteboss_data,
+            "hardware_data": hardware_data,
+            "maintenance_data": maintenance_data
+        })
+        stored = get_analysis_store().find_recent(tower_id, "alerts", fingerprint, ANALYSIS_REUSE_SECONDS)
+        
+        if stored:
+            # Alerts for this analysis were already created when it was recorded: report them, don't repeat them
+            recorded = get_analysis_store().get_analysis(stored["id"])
+            return {
+                "tower_id": tower_id,
+                "analysis": stored["analysis"],
+                "analysis_id": stored["id"],
+                "cached": True,
+                "alerts_generated": 0,
+                "created_alerts": created_alert_summaries(recorded["alerts"]) if recorded else [],
+                "timestamp": datetime.now().isoformat()
+            }
+        
         # Create a comprehensive analysis prompt focused on generating alerts
         analysis_prompt = f"""
         You are an expert in 5G tower monitoring and predictive maintenance.
@@ -728,16 +912,16 @@ def generate_ai_alerts(tower_id: int):
         TOWER ID: {tower_id}
         
         TELEMETRY DATA:
-        {json.dumps(telemetry_data, indent=2)}
+        {serialization.dumps(telemetry_data)}
         
         SITEBOSS DATA:
-        {json.dumps(siteboss_data, indent=2)}
+        {serialization.dumps(siteboss_data)}
         
         HARDWARE COMPONENTS:
-        {json.dumps(hardware_data or [], indent=2)}
+        {serialization.dumps(hardware_data or [])}
         
         MAINTENANCE RECORDS:
-        {json.dumps(maintenance_data or [], indent=2)}
+        {serialization.dumps(maintenance_data or [])}
         
         Please analyze the data and identify:
         1. CRITICAL ISSUES that need immediate attention
@@ -757,7 +941,6 @@ def generate_ai_alerts(tower_id: int):
         extracted_alerts = extract_alerts_from_analysis(analysis_text, tower_id)
         
         # Create alerts in the backend
-        created_alerts = []
         for alert_data in extracted_alerts:
             created_alert = create_alert(
                 alert_data["tower_id"],
@@ -765,12 +948,19 @@ def generate_ai_alerts(tower_id: int):
                 alert_data["description"],
                 alert_data["severity"]
             )
-            if created_alert:
-                created_alerts.append(created_alert)
+            alert_data["created"] = bool(created_alert)
+        created_alerts = created_alert_summaries(extracted_alerts)
+        
+        prompt_tokens, response_tokens = usage_token_counts(
+            getattr(analysis, "usage_metadata", None), analysis_prompt, analysis_text)
+        analysis_id = get_analysis_store().record_analysis(
+            tower_id, "alerts", fingerprint, analysis_text, prompt_tokens, response_tokens, extracted_alerts)
         
         return {
             "tower_id": tower_id,
             "analysis": analysis_text,
+            "analysis_id": analysis_id,
+            "cached": False,
             "alerts_generated": len(created_alerts),
             "created_alerts": created_alerts,
             "timestamp": datetime.now().isoformat()
@@ -780,4 +970,40 @@ def generate_ai_alerts(tower_id: int):
             "tower_id": tower_id,
             "error": f"Error generating alerts: {str(e)}",
             "timestamp": datetime.now().isoformat()
-        }
\ No newline at end of file
+        }
+
+# Analysis history (persisted in ANALYSIS_DB_PATH)
+@app.get("/tower/{tower_id}/analyses")
+def get_tower_analyses(tower_id: int, limit: int = 20, offset: int = 0, kind: Optional[str] = None):
+    """Paginated analysis history for a tower, newest first"""
+    limit = max(1, min(limit, 200))
+    items, total = get_analysis_store().list_analyses(tower_id=tower_id, kind=kind, limit=limit, offset=max(0, offset))
+    return {
+        "tower_id": tower_id,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "analyses": items,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/analyses")
+def get_analyses(limit: int = 20, offset: int = 0, kind: Optional[str] = None):
+    """Paginated analysis history across all towers, newest first"""
+    limit = max(1, min(limit, 200))
+    items, total = get_analysis_store().list_analyses(kind=kind, limit=limit, offset=max(0, offset))
+    return {
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "analyses": items,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/analyses/{analysis_id}")
+def get_analysis(analysis_id: int):
+    """A stored analysis with its full text and extracted alerts"""
+    stored = get_analysis_store().get_analysis(analysis_id)
+    if stored is None:
+        return JSONResponse(status_code=404, content={"error": f"Analysis {analysis_id} not found"})
+    return stored
@@ -1,5 +1,5 @@
 import google.generativeai as genai
-import json
+from shared_serialization import serialization
 from typing import Dict, List, Any
 
 class GeminiTowerAnalyzer:
@@ -8,6 +8,8 @@ class GeminiTowerAnalyzer:
         genai.configure(api_key=api_key)
         # Use the working model
         self.model = genai.GenerativeModel('gemini-2.0-flash')
+        # Token usage reported for the last analyze_tower_data call (None if unavailable)
+        self.last_usage = None
     
     def analyze_tower_data(self, tower_id: int, telemetry_data: List[Dict], siteboss_data: Dict, hardware_data: List[Dict] = None, maintenance_data: List[Dict] = None) -> str:
         """Analyze tower data using Gemini"""
@@ -21,16 +23,16 @@ class GeminiTowerAnalyzer:
         TOWER ID: {tower_id}
         
         TELEMETRY DATA:
-        {json.dumps(telemetry_data, indent=2)}
+        {serialization.dumps(telemetry_data)}
         
         SITEBOSS DATA:
-        {json.dumps(siteboss_data, indent=2)}
+        {serialization.dumps(siteboss_data)}
         
         HARDWARE COMPONENTS:
-        {json.dumps(hardware_data or [], indent=2)}
+        {serialization.dumps(hardware_data or [])}
         
         MAINTENANCE RECORDS:
-        {json.dumps(maintenance_data or [], indent=2)}
+        {serialization.dumps(maintenance_data or [])}
         
         Please provide your analysis in this format:
         
@@ -49,8 +51,10 @@ class GeminiTowerAnalyzer:
         try:
             # Generate content using Gemini
             response = self.model.generate_content(prompt)
+            self.last_usage = getattr(response, 'usage_metadata', None)
             return response.text
         except Exception as e:
+            self.last_usage = None
             return f"Error analyzing tower data: {str(e)}"
     
     def simple_test(self) -> str:
@@ -0,0 +1,154 @@
+import json
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Any, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Words that carry no signal for matching records to a question
+STOPWORDS = {
+    "a", "an", "and", "are", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "its", "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "which",
+    "who", "with", "tower", "any", "about", "can", "you", "me", "show", "tell", "there"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into index terms"""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def record_text(record: Any) -> str:
+    """Flatten a record's values (not its keys) into one searchable string"""
+    if isinstance(record, dict):
+        return " ".join(record_text(v) for v in record.values())
+    if isinstance(record, list):
+        return " ".join(record_text(v) for v in record)
+    if record is None:
+        return ""
+    return str(record)
+
+
+class RecordIndex:
+    """In-memory inverted index with BM25 scoring over one tower's records"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # doc key -> (kind, record, signature, term counts, length)
+        self.docs: Dict[str, Tuple[str, Dict[str, Any], str, Counter, int]] = {}
+        # term -> {doc key: term frequency}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.total_length = 0
+        # Chat requests run on the threadpool: sync and search must not interleave
+        self._lock = threading.Lock()
+
+    def _add(self, key: str, kind: str, record: Dict[str, Any], signature: str):
+        terms = Counter(tokenize(record_text(record)))
+        length = sum(terms.values())
+        self.docs[key] = (kind, record, signature, terms, length)
+        self.total_length += length
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[key] = tf
+
+    def _remove(self, key: str):
+        _, _, _, terms, length = self.docs.pop(key)
+        self.total_length -= length
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self.postings[term]
+
+    def sync(self, kind: str, records: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Bring the records of one kind up to date. Only new or changed records are (re)indexed.
+
+        Returns (indexed, removed) counts.
+        """
+        with self._lock:
+            return self._sync(kind, records)
+
+    def _sync(self, kind: str, records: List[Dict[str, Any]]) -> Tuple[int, int]:
+        seen = set()
+        indexed = 0
+        for position, record in enumerate(records or []):
+            signature = json.dumps(record, sort_keys=True, default=str)
+            record_id = record.get("id") if isinstance(record, dict) else None
+            key = f"{kind}:{record_id if record_id is not None else signature}"
+            if key in seen:
+                key = f"{key}#{position}"
+            seen.add(key)
+
+            existing = self.docs.get(key)
+            if existing is not None:
+                if existing[2] == signature:
+                    continue
+                self._remove(key)
+            self._add(key, kind, record, signature)
+            indexed += 1
+
+        stale = [key for key, doc in self.docs.items() if doc[0] == kind and key not in seen]
+        for key in stale:
+            self._remove(key)
+        return indexed, len(stale)
+
+    def count(self, kind: str) -> int:
+        with self._lock:
+            return sum(1 for doc in self.docs.values() if doc[0] == kind)
+
+    def search(self, query: str, kind: str, top_k: int) -> List[Dict[str, Any]]:
+        """Return the top_k records of a kind ranked by BM25 against the query.
+
+        Falls back to the most recently indexed records when nothing in the query matches.
+        """
+        with self._lock:
+            return self._search(query, kind, top_k)
+
+    def _search(self, query: str, kind: str, top_k: int) -> List[Dict[str, Any]]:
+        candidates = [key for key, doc in self.docs.items() if doc[0] == kind]
+        if len(candidates) <= top_k:
+            return [self.docs[key][1] for key in candidates]
+
+        n_docs = len(self.docs)
+        avg_length = self.total_length / n_docs if n_docs else 0
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, tf in postings.items():
+                if self.docs[key][0] != kind:
+                    continue
+                length = self.docs[key][4]
+                norm = tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / (avg_length or 1)))
+                scores[key] = scores.get(key, 0.0) + idf * norm
+
+        ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        if len(ranked) < top_k:
+            # Pad with the most recent records so the model still gets some context
+            ranked_set = set(ranked)
+            for key in reversed(candidates):
+                if len(ranked) >= top_k:
+                    break
+                if key not in ranked_set:
+                    ranked.append(key)
+        return [self.docs[key][1] for key in ranked]
+
+
+# One index per tower, kept for the lifetime of the service
+_tower_indexes: Dict[int, RecordIndex] = {}
+_tower_indexes_lock = threading.Lock()
+
+
+def get_tower_index(tower_id: int) -> RecordIndex:
+    """Get the record index for a tower, creating it on first use"""
+    with _tower_indexes_lock:
+        index = _tower_indexes.get(tower_id)
+        if index is None:
+            index = RecordIndex()
+            _tower_indexes[tower_id] = index
+        return index
@@ -0,0 +1,13 @@
+"""
+The JSON serialization module shared with the SiteBoss tools (siteboss-project/serialization.py).
+Import it from here: siteboss-project is appended to sys.path once, so its modules never
+shadow same-named ai-service or stdlib modules.
+"""
+import sys
+from pathlib import Path
+
+SITEBOSS_PROJECT = str(Path(__file__).resolve().parent.parent / "siteboss-project")
+if SITEBOSS_PROJECT not in sys.path:
+    sys.path.append(SITEBOSS_PROJECT)
+
+import serialization  # noqa: E402,F401
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+import analysis_store
+from analysis_store import AnalysisStore, context_fingerprint
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = AnalysisStore(str(tmp_path / "analyses.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls time.time() as analysis_store sees it"""
+    now = [time.time()]
+    monkeypatch.setattr(analysis_store.time, "time", lambda: now[0])
+    return now
+
+
+def test_find_recent_expires_after_max_age(store, clock):
+    fingerprint = context_fingerprint({"towerId": 49, "sensors": [1, 2]})
+    analysis_id = store.record_analysis(49, "insights", fingerprint, "All normal")
+
+    assert store.find_recent(49, "insights", fingerprint, 600)["id"] == analysis_id
+    clock[0] += 599
+    assert store.find_recent(49, "insights", fingerprint, 600)["id"] == analysis_id
+    clock[0] += 2
+    assert store.find_recent(49, "insights", fingerprint, 600) is None
+
+
+def test_find_recent_returns_the_newest_match(store, clock):
+    fingerprint = context_fingerprint({"towerId": 49})
+    store.record_analysis(49, "insights", fingerprint, "first")
+    clock[0] += 10
+    newest = store.record_analysis(49, "insights", fingerprint, "second")
+    assert store.find_recent(49, "insights", fingerprint, 600)["id"] == newest
+
+
+def test_find_recent_matches_tower_kind_and_context(store, clock):
+    fingerprint = context_fingerprint({"towerId": 49})
+    store.record_analysis(49, "insights", fingerprint, "All normal")
+
+    assert store.find_recent(56, "insights", fingerprint, 600) is None
+    assert store.find_recent(49, "alerts", fingerprint, 600) is None
+    assert store.find_recent(49, "insights", context_fingerprint({"towerId": 49, "x": 1}), 600) is None
+
+
+def test_alerts_are_stored_with_their_analysis(store):
+    alerts = [{"title": "Door open", "description": "Front door", "severity": "HIGH", "created": True},
+              {"title": "Low fuel", "description": "Tank 1", "severity": "MEDIUM"}]
+    analysis_id = store.record_analysis(49, "alerts", "f", "text", alerts=alerts)
+    stored = store.get_analysis(analysis_id)
+    assert [(a["title"], a["created"]) for a in stored["alerts"]] == [("Door open", True), ("Low fuel", False)]
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark: stdlib json (current pretty-printed path) vs the
+shared serialization module, on fleet-sized telemetry + SiteBoss payloads.
+
+Usage:
+    python benchmarks/bench_serialization.py --towers 50 --sensors 400
+"""
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'siteboss-project'))
+
+import serialization  # noqa: E402
+from fixtures import make_fleet  # noqa: E402
+
+
+def bench(label: str, fn, number: int, payload_size: int):
+    seconds = min(timeit.repeat(fn, number=number, repeat=3)) / number
+    print(f'  {label:<34} {seconds * 1000:9.3f} ms  {payload_size / 1024:10.1f} KiB')
+    return seconds
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Benchmark JSON serialization paths')
+    ap.add_argument('--towers', type=int, default=50)
+    ap.add_argument('--sensors', type=int, default=400, help='SiteBoss sensors per tower')
+    ap.add_argument('--records', type=int, default=24, help='Telemetry records per tower')
+    ap.add_argument('--number', type=int, default=5, help='Iterations per timing')
+    args = ap.parse_args()
+
+    fleet = make_fleet(args.towers, args.sensors, args.records)
+    one_tower = fleet[0]
+    print(f'Backend: {serialization.BACKEND}')
+
+    for name, payload in [('single tower (prompt context)', one_tower), (f'fleet of {args.towers} towers', fleet)]:
+        print(f'\n{name}')
+        baseline = bench('json.dumps(indent=2)  [current]', lambda: json.dumps(payload, indent=2),
+                         args.number, len(json.dumps(payload, indent=2)))
+        bench('json.dumps compact', lambda: json.dumps(payload, separators=(',', ':')),
+              args.number, len(json.dumps(payload, separators=(',', ':'))))
+        pretty = bench('serialization.dumps(pretty=True)', lambda: serialization.dumps(payload, pretty=True),
+                       args.number, len(serialization.dumps_bytes(payload, pretty=True)))
+        compact = bench('serialization.dumps_bytes', lambda: serialization.dumps_bytes(payload),
+                        args.number, len(serialization.dumps_bytes(payload)))
+        encoded = serialization.dumps_bytes(payload)
+        bench('json.loads', lambda: json.loads(encoded), args.number, len(encoded))
+        bench('serialization.loads', lambda: serialization.loads(encoded), args.number, len(encoded))
+        print(f'  speedup vs current: {baseline / compact:.1f}x compact, {baseline / pretty:.1f}x pretty')
+
+
+if __name__ == '__main__':
+    main()
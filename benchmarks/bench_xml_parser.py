@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+SiteBoss XML parser benchmark: the original ET.fromstring + findtext
+implementation vs siteboss_parser.
+
+The original code did not decode typed values (numericValue/unit), which
+siteboss_parser now does for every sensor; "legacy + decode" adds that
+step to the original so both sides produce the same fields.
+
+Usage:
+    python benchmarks/bench_xml_parser.py --sensors 100 1000 10000
+"""
+import argparse
+import sys
+import timeit
+import tracemalloc
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'siteboss-project'))
+
+import siteboss_parser  # noqa: E402
+from siteboss_values import decode_sensor  # noqa: E402
+from fixtures import make_site_status_xml  # noqa: E402
+
+
+def legacy_parse(xml_text: str, decode: bool = False) -> dict:
+    """The tree-based parse_xml_to_json that siteboss_api.py used before siteboss_parser.py"""
+    root = ET.fromstring(xml_text)
+    sensors = []
+    for es in root.findall('EventSensor'):
+        es_name_el = es.find('ES_Name')
+        es_name = es_name_el.text if es_name_el is not None else None
+        es_state = es.findtext('ES_State', '').strip()
+        for s in es.findall('Sensor'):
+            s_type = (s.findtext('Sensor_Type') or '').strip()
+            s_name = (s.findtext('Sensor_Name') or '').strip()
+            status_str = (s.findtext('Sensor_Status_String') or '').strip()
+            enabled = (s.findtext('Sensor_Enabled') or '').strip()
+            value_str = (s.findtext('Sensor_Value_String') or '').strip()
+            s_number = s.findtext('Sensor_Number', '')
+            s_value = s.findtext('Sensor_Value', '')
+            s_units = s.findtext('Sensor_Units', '')
+            if s_name.lower() in siteboss_parser.IGNORED_NAMES or enabled.upper() == 'OFF':
+                continue
+            allowed = siteboss_parser.WORKING_STATUS.get(s_type, None)
+            if allowed is not None and status_str not in allowed:
+                continue
+            alert_level = "normal"
+            if status_str in ['Active'] and s_type == 'Contact Closure':
+                if any(word in s_name.lower() for word in ['door', 'alarm', 'smoke', 'motion', 'flood']):
+                    alert_level = "warning" if 'door' in s_name.lower() else "critical"
+            unique_id = f"{es_name}_{s_type}_{s_name}_{s_number}".replace(' ', '_').replace('-', '_')
+            sensor = {'id': unique_id, 'group': es_name, 'groupState': es_state, 'type': s_type,
+                      'name': s_name, 'number': s_number, 'status': status_str, 'value': value_str,
+                      'rawValue': s_value, 'units': s_units, 'enabled': enabled.upper() == 'ON',
+                      'alertLevel': alert_level}
+            if decode:
+                sensor['numericValue'], sensor['unit'], _ = decode_sensor(
+                    s_type, value_str, s.findtext('Sensor_Value_Number'), s_units)
+            sensors.append(sensor)
+    return {'sensors': sensors}
+
+
+def peak_python_memory(fn) -> float:
+    """Peak Python-heap allocation in MiB"""
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Benchmark the SiteBoss XML parser')
+    ap.add_argument('--sensors', type=int, nargs='+', default=[100, 1000, 10000])
+    ap.add_argument('--number', type=int, default=5, help='Iterations per timing')
+    ap.add_argument('--rounds', type=int, default=10, help='Interleaved timing rounds (the best one is reported)')
+    args = ap.parse_args()
+
+    candidates = [('legacy (ET.fromstring)', legacy_parse),
+                  ('legacy + decode', lambda text: legacy_parse(text, decode=True)),
+                  ('siteboss_parser', siteboss_parser.parse_xml_to_json)]
+
+    for n_sensors in args.sensors:
+        xml_text = make_site_status_xml(n_sensors)
+        expected = [s['id'] for s in legacy_parse(xml_text)['sensors']]
+        print(f'\n{n_sensors} sensors ({len(xml_text) / 1024:.0f} KiB)')
+        for label, fn in candidates:
+            assert [s['id'] for s in fn(xml_text)['sensors']] == expected, f'{label} output differs'
+        # Rounds interleave the candidates so a noisy host slows them all alike; best round wins
+        best = dict.fromkeys((label for label, _ in candidates), float('inf'))
+        for _ in range(args.rounds):
+            for label, fn in candidates:
+                seconds = timeit.timeit(lambda: fn(xml_text), number=args.number) / args.number
+                best[label] = min(best[label], seconds)
+        baseline = best[candidates[0][0]]
+        for label, fn in candidates:
+            seconds = best[label]
+            memory = peak_python_memory(lambda: fn(xml_text))
+            print(f'  {label:<24} {seconds * 1000:9.2f} ms  {n_sensors / seconds:12,.0f} sensors/s'
+                  f'  {baseline / seconds:5.2f}x  peak py-heap {memory:7.2f} MiB')
+
+if __name__ == '__main__':
+    main()
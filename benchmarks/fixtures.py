@@ -0,0 +1,134 @@
+"""
+Synthetic fixtures for the benchmarks: SiteBoss snapshots, SiteStatus.xml
+dumps and simulator telemetry, scaled by sensor count and fleet size.
+"""
+import random
+
+SENSOR_TYPES = [
+    ('Contact Closure', ['Open', 'Closed'], ['Active', 'Inactive']),
+    ('Temperature', ['21 C', '23 C', '19 C'], ['Normal']),
+    ('Analog', ['0.0 Volts', '241 V', '50.0 Hz', '316.4 W'], ['Normal']),
+    ('Output', ['Inactive/De-energized'], ['Active', 'Inactive']),
+]
+
+
+def make_siteboss_snapshot(n_sensors: int, rng: random.Random) -> dict:
+    """SiteBoss snapshot shaped like siteboss_api.parse_xml_to_json output"""
+    sensors = []
+    for i in range(n_sensors):
+        s_type, values, statuses = SENSOR_TYPES[i % len(SENSOR_TYPES)]
+        group = f'ES_{i // 16}'
+        name = f'{s_type} {i}'
+        sensors.append({
+            'id': f'{group}_{s_type}_{name}_{i}'.replace(' ', '_'),
+            'group': group,
+            'groupState': 'Alive',
+            'type': s_type,
+            'name': name,
+            'number': str(i % 16 + 1),
+            'status': rng.choice(statuses),
+            'value': rng.choice(values),
+            'rawValue': '',
+            'units': '',
+            'enabled': True,
+            'alertLevel': rng.choice(['normal', 'normal', 'normal', 'warning', 'critical']),
+        })
+    return {
+        'unit': {
+            'siteName': '5Sky Demo Site', 'serial': '360050631', 'version': '2.12.480',
+            'build': 'STD', 'hardware': 'A44',
+            'timestamp': {'date': '10/01/25', 'time': '09:57:53', 'lastUpdated': '2025-10-01T09:59:58.413731'},
+            'location': {'latitude': 49.702006766332, 'longitude': 14.0053179478874},
+            'uptime': '761:19:45:51',
+        },
+        'sensors': sensors,
+        'summary': {
+            'totalSensors': len(sensors),
+            'sensorsByType': {t[0]: n_sensors // len(SENSOR_TYPES) for t in SENSOR_TYPES},
+            'alertCounts': {'normal': 0, 'warning': 0, 'critical': 0},
+            'lastPull': '2025-10-01T09:59:58.413731',
+        },
+    }
+
+
+def make_telemetry(tower_id: int, n_records: int, rng: random.Random) -> list:
+    """Telemetry records shaped like the simulator's TelemetryData"""
+    fields = ['battery', 'temperature', 'uptime', 'networkLoad', 'ambientTemperature', 'humidity',
+              'windSpeed', 'airQuality', 'signalStrength', 'cpuUtilization', 'memoryUsage', 'voltage',
+              'responseTime', 'throughput', 'diskSpace', 'errorRate', 'latency', 'jitter', 'bandwidth']
+    records = []
+    for i in range(n_records):
+        record = {'id': i, 'towerId': tower_id, 'towerName': f'Tower {tower_id}', 'status': 'ONLINE',
+                  'timestamp': f'2025-10-01T10:{i % 60:02d}:00', 'windDirection': 'NE'}
+        for field in fields:
+            record[field] = round(rng.uniform(0, 100), 2)
+        records.append(record)
+    return records
+
+
+def make_fleet(n_towers: int, n_sensors: int, n_records: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    return [{
+        'tower_id': tower_id,
+        'telemetry_data': make_telemetry(tower_id, n_records, rng),
+        'siteboss_data': make_siteboss_snapshot(n_sensors, rng),
+    } for tower_id in range(1, n_towers + 1)]
+
+
+def make_site_status_xml(n_sensors: int, sensors_per_group: int = 16, seed: int = 42) -> str:
+    """SiteStatus.xml with n_sensors sensors spread over EventSensor groups, like a SiteBoss 360 dump"""
+    rng = random.Random(seed)
+    parts = [
+        '<?xml version="1.0" encoding="ISO-8859-1"?>\n<Unit>\n'
+        '\t<Unit_Sitename>5Sky Demo Site</Unit_Sitename>\n\t<Unit_Answer>SiteBoss</Unit_Answer>\n'
+        '\t<Unit_Product>SiteBoss 360</Unit_Product>\n\t<Unit_Serial>360050631</Unit_Serial>\n'
+        '\t<Unit_Version>2.12.480</Unit_Version>\n\t<Unit_Build>STD</Unit_Build>\n'
+        '\t<Unit_Hardware>A44</Unit_Hardware>\n\t<Unit_Type>SiteBoss</Unit_Type>\n'
+        '\t<Unit_Latitude>49.7020067663320</Unit_Latitude>\n\t<Unit_Longitude>14.0053179478874</Unit_Longitude>\n'
+        '\t<Unit_Date>09&#x2f;29&#x2f;25</Unit_Date>\n\t<Unit_Time>14:30:04</Unit_Time>\n'
+        '\t<Unit_Uptime>760:00:18:01</Unit_Uptime>\n'
+    ]
+    names = ['Door Open - Front', 'Door Open - Back', 'Smoke Alarm', 'Flood', 'Rectifier Fail', 'unnamed']
+    for g in range((n_sensors + sensors_per_group - 1) // sensors_per_group):
+        parts.append(f'\t<EventSensor>\n\t\t<ES_Number>{200 + g}</ES_Number>\n\t\t<ES_Name>ES{g:03d}</ES_Name>\n'
+                     f'\t\t<ES_Configuration>16-CC, 3-VS, 2-RL</ES_Configuration>\n\t\t<ES_State>Alive</ES_State>\n')
+        for i in range(min(sensors_per_group, n_sensors - g * sensors_per_group)):
+            s_type, values, statuses = SENSOR_TYPES[i % len(SENSOR_TYPES)]
+            name = names[i % len(names)] if s_type == 'Contact Closure' else f'{s_type} {i + 1}'
+            parts.append(
+                f'\t\t<Sensor>\n\t\t\t<Sensor_Number>{i + 1}</Sensor_Number>\n'
+                f'\t\t\t<Sensor_Type>{s_type}</Sensor_Type>\n\t\t\t<Sensor_Name>{name}</Sensor_Name>\n'
+                f'\t\t\t<Sensor_Enabled>{"ON" if rng.random() > 0.05 else "OFF"}</Sensor_Enabled>\n'
+                f'\t\t\t<Sensor_Value_String>{rng.choice(values)}</Sensor_Value_String>\n'
+                f'\t\t\t<Sensor_Value_Number>0</Sensor_Value_Number>\n'
+                f'\t\t\t<Sensor_Status_String>{rng.choice(statuses)}</Sensor_Status_String>\n'
+                f'\t\t\t<Sensor_Status_Value>1</Sensor_Status_Value>\n\t\t</Sensor>\n'
+            )
+        parts.append('\t</EventSensor>\n')
+    parts.append('</Unit>\n')
+    return ''.join(parts)
+
+
+ANALYSIS_PARAGRAPHS = [
+    '**OVERALL HEALTH SCORE**: 6/10. The tower is operating but several sensors need attention.',
+    '**CRITICAL ISSUES FOUND**: The *front door* sensor reports Open while the site is unattended, '
+    'a possible security breach. See [runbook](https://wiki.example.com/runbooks/door) for escalation.',
+    '**HARDWARE COMPONENT STATUS**: Rectifier 2 shows intermittent fault codes; battery string voltage is nominal.',
+    '**MAINTENANCE RECOMMENDATIONS**: The cooling system inspection is overdue by 14 days. '
+    'Schedule *preventive maintenance* for the HVAC unit.',
+    '**PRIORITY LEVEL**: HIGH',
+    '**NEXT ACTIONS REQUIRED**: Dispatch a technician, verify door contacts, review [alarm history](http://x/y).',
+    'Network performance is degraded during peak hours with high load on the backhaul link.',
+]
+
+
+def make_analysis_text(n_chars: int, seed: int = 42) -> str:
+    """Markdown analysis of roughly n_chars characters, like a Gemini tower analysis response"""
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < n_chars:
+        paragraph = rng.choice(ANALYSIS_PARAGRAPHS)
+        parts.append(paragraph)
+        size += len(paragraph) + 3
+    return '\n\n \n'.join(parts)
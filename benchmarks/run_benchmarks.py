@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark suite for the per-cycle CPU paths: SiteBoss XML parsing,
+the Prometheus exporter, alert extraction, markdown cleanup and prompt
+construction. Fixtures are synthetic and scaled by sensor count, fleet
+size and analysis text length.
+
+Results are written as JSON and can be compared against a saved baseline;
+a case slower than the baseline by more than --threshold (default 10%)
+is a regression and makes the run exit with status 1.
+
+Usage:
+    python benchmarks/run_benchmarks.py --save-baseline            # on the reference commit
+    python benchmarks/run_benchmarks.py                            # compare against it
+    python benchmarks/run_benchmarks.py --filter parse --quick
+"""
+import argparse
+import fnmatch
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+sys.path.insert(0, str(ROOT / 'siteboss-project'))
+sys.path.insert(1, str(ROOT / 'ai-service'))
+sys.path.insert(2, str(ROOT))
+
+import serialization  # noqa: E402
+import siteboss_parser  # noqa: E402
+from fixtures import make_analysis_text, make_fleet, make_site_status_xml  # noqa: E402
+
+SCALES = {
+    'sensors': [100, 1000, 10000],
+    'towers': [10, 50],
+    'chars': [2000, 20000],
+}
+QUICK_SCALES = {
+    'sensors': [100, 1000],
+    'towers': [10],
+    'chars': [2000],
+}
+
+
+def import_ai_app():
+    """ai-service/app.py (the cases used here never open its analysis store)"""
+    import app
+    return app
+
+
+_exporter = None
+
+
+def get_exporter():
+    """One exporter per process: its metrics register in the global Prometheus registry"""
+    global _exporter
+    if _exporter is None:
+        from json_metrics_exporter import SiteBossMetricsExporter
+        _exporter = SiteBossMetricsExporter('http://localhost:0/unused', port=0)
+    return _exporter
+
+
+class CapturePromptModel:
+    """Stands in for the Gemini model so analyze_tower_data only builds the prompt"""
+
+    class Response:
+        text = ''
+        usage_metadata = None
+
+    def generate_content(self, prompt: str):
+        self.last_prompt = prompt
+        return self.Response
+
+
+# Case setups: take the scale, return the function to time
+
+def setup_parse(n_sensors: int):
+    xml_text = make_site_status_xml(n_sensors)
+    return lambda: siteboss_parser.parse_xml_to_json(xml_text)
+
+
+def setup_update_metrics(n_sensors: int):
+    exporter = get_exporter()
+    snapshot = siteboss_parser.parse_xml_to_json(make_site_status_xml(n_sensors))
+    payload = {'data': snapshot}
+    return lambda: exporter.update_metrics(payload, '49')
+
+
+def setup_parse_uptime(n_sensors: int):
+    exporter = get_exporter()
+    values = [f'{760 + i % 30}:{i % 24:02d}:{i % 60:02d}:{(i * 7) % 60:02d}' for i in range(n_sensors)]
+    return lambda: [exporter.parse_uptime(v) for v in values]
+
+
+def setup_parse_temperature(n_sensors: int):
+    exporter = get_exporter()
+    values = [f'{15 + i % 30} C' for i in range(n_sensors)]
+    return lambda: [exporter.parse_temperature(v) for v in values]
+
+
+def setup_extract_alerts(n_chars: int):
+    app = import_ai_app()
+    text = make_analysis_text(n_chars)
+    return lambda: app.extract_alerts_from_analysis(text, 49)
+
+
+def setup_clean_markdown(n_chars: int):
+    app = import_ai_app()
+    text = make_analysis_text(n_chars)
+    return lambda: app.clean_markdown_formatting(text)
+
+
+def setup_prompt(n_towers: int):
+    from gemini_integration import GeminiTowerAnalyzer
+    analyzer = GeminiTowerAnalyzer('benchmark')
+    analyzer.model = CapturePromptModel()
+    fleet = make_fleet(n_towers, 400, 24)
+
+    def build_prompts():
+        for tower in fleet:
+            analyzer.analyze_tower_data(tower['tower_id'], tower['telemetry_data'], tower['siteboss_data'])
+    return build_prompts
+
+
+CASES = [
+    ('parse_xml_to_json', 'sensors', setup_parse),
+    ('exporter.update_metrics', 'sensors', setup_update_metrics),
+    ('exporter.parse_uptime', 'sensors', setup_parse_uptime),
+    ('exporter.parse_temperature', 'sensors', setup_parse_temperature),
+    ('extract_alerts_from_analysis', 'chars', setup_extract_alerts),
+    ('clean_markdown_formatting', 'chars', setup_clean_markdown),
+    ('analyze_tower_data.prompt', 'towers', setup_prompt),
+]
+
+
+def time_case(fn, repeat: int, min_time: float) -> dict:
+    """Per-call seconds: best and median of `repeat` runs, each long enough to beat timer noise"""
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    runs = [elapsed / number] + [t / number for t in timer.repeat(repeat - 1, number)]
+    return {'best': min(runs), 'median': statistics.median(runs), 'number': number, 'repeat': repeat}
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'jsonBackend': serialization.BACKEND,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Print current vs baseline per case; returns the names of regressed cases"""
+    regressions = []
+    print(f"\n{'case':<48} {'baseline':>11} {'current':>11} {'change':>8}")
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<48} {'-':>11} {result['best'] * 1000:9.3f}ms {'new':>8}")
+            continue
+        ratio = result['best'] / base['best']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  ❌ regression'
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = '  ✅ faster'
+        print(f"{name:<48} {base['best'] * 1000:9.3f}ms {result['best'] * 1000:9.3f}ms {ratio - 1:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Run the micro-benchmark suite and compare against a baseline')
+    ap.add_argument('--filter', action='append', default=[], metavar='PATTERN',
+                    help='Only run cases whose name matches this glob or substring (repeatable)')
+    ap.add_argument('--quick', action='store_true', help='Smaller scales, for a fast check')
+    ap.add_argument('--repeat', type=int, default=5, help='Timing runs per case (best and median are kept)')
+    ap.add_argument('--min-time', type=float, default=0.2, help='Minimum seconds per timing run')
+    ap.add_argument('--out', default=str(RESULTS_DIR / 'latest.json'), help='Results JSON file')
+    ap.add_argument('--baseline', default=str(RESULTS_DIR / 'baseline.json'), help='Baseline JSON to compare against')
+    ap.add_argument('--save-baseline', action='store_true', help='Also write the results as the new baseline')
+    ap.add_argument('--threshold', type=float, default=0.10, help='Slowdown fraction that counts as a regression')
+    args = ap.parse_args()
+
+    scales = QUICK_SCALES if args.quick else SCALES
+    results = {}
+    for label, dimension, setup in CASES:
+        for scale in scales[dimension]:
+            name = f'{label} {dimension}={scale}'
+            if args.filter and not any(p in name or fnmatch.fnmatch(name, p) for p in args.filter):
+                continue
+            fn = setup(scale)
+            fn()  # warm up caches and imports outside the timing
+            result = time_case(fn, args.repeat, args.min_time)
+            results[name] = result
+            print(f"  {name:<48} {result['best'] * 1000:9.3f} ms  (median {result['median'] * 1000:.3f} ms, "
+                  f"{result['number']} calls x {result['repeat']})")
+
+    report = {'environment': environment(), 'threshold': args.threshold, 'results': results}
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    serialization.dump_file(report, args.out, pretty=True)
+    print(f"💾 Results written to {args.out}")
+
+    if args.save_baseline:
+        Path(args.baseline).parent.mkdir(parents=True, exist_ok=True)
+        serialization.dump_file(report, args.baseline, pretty=True)
+        print(f"💾 Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ No baseline at {args.baseline} (run with --save-baseline first)")
+        return 0
+    baseline = serialization.load_file(args.baseline)
+    base_env = baseline.get('environment', {})
+    print(f"\nBaseline: commit {base_env.get('commit')} from {base_env.get('timestamp')} ({base_env.get('platform')})")
+    regressions = compare(results, baseline.get('results', {}), args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"\n✅ No regressions over {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
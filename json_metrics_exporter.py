@@ -1,58 +1,356 @@
 #!/usr/bin/env python3
 """
 Custom JSON Metrics Exporter for SiteBoss Data
-This script fetches JSON data and exposes it as Prometheus metrics
+This script fetches JSON data for one or many towers and exposes it as
+Prometheus metrics. Towers are fetched concurrently over one pooled HTTP
+session, and every series is labelled with its tower ID.
+
+By default all towers are polled every --interval seconds. With
+--collect-on-scrape they are fetched when /metrics is scraped instead,
+so freshness follows the Prometheus scrape interval and nothing is
+fetched while nobody scrapes.
+
+Series a tower's latest payload no longer has (removed or renamed
+sensors) are deleted, and every metric is capped at --max-series series;
+series over the cap are counted in siteboss_series_dropped_custom.
+
+The exporter also reports its own cost (siteboss_exporter_*): fetch
+latency, payload size, JSON decode and metric update time, collection
+round time and active series per metric.
+
+Towers can also be SiteBoss devices (host + credentials, e.g. the
+poller's devices.json inventory). Those are pulled directly: SiteStatus.xml
+over a reused, authenticated HTTP session, parsed in-process with
+siteboss-project/siteboss_parser.py, with no backend in between.
+
+Towers can also be snapshot files the puller writes on the same host
+(JSON or binary .sbs; --watch or a "file" entry in --towers). A file is
+re-read only when it changes: a watcher thread (inotify when the optional
+inotify_simple package is installed, mtime polling otherwise) updates that
+tower's metrics as soon as a new snapshot lands.
+
+/metrics is served from a pre-rendered cache (text and OpenMetrics, plain
+and gzip) that is rebuilt once per data update, so a scrape costs the
+same whatever the series count.
+
+Usage:
+    python json_metrics_exporter.py                                  # tower 49 from the backend
+    python json_metrics_exporter.py --towers towers.json --concurrency 100
+    python json_metrics_exporter.py --towers towers.json --collect-on-scrape --cache-ttl 5
+    python json_metrics_exporter.py --towers siteboss-project/devices.example.json   # direct device pulls
+    python json_metrics_exporter.py --watch siteboss-project/siteboss_api_data.json --tower-id 49   # snapshot file
 """
 
+import argparse
+import asyncio
+import itertools
 import json
+import os
+import re
 import requests
+import sys
+import threading
 import time
-from prometheus_client import start_http_server, Gauge, Counter, Info
-from typing import Dict, Any
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from requests.adapters import HTTPAdapter
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Gauge, Counter, Histogram, Info, REGISTRY
+from prometheus_client import generate_latest
+from prometheus_client.core import GaugeMetricFamily, InfoMetricFamily
+from prometheus_client.openmetrics import exposition as openmetrics
+from typing import Dict, Any, List
+
+# Direct device pulls and snapshot files reuse the SiteBoss puller's modules
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'siteboss-project'))
+try:
+    from siteboss_http import SiteBossHttpSession
+    from siteboss_parser import parse_xml_to_json
+    from siteboss_snapshot import load_snapshot
+except ImportError:
+    SiteBossHttpSession = None
+
+# Optional: file watch mode waits on inotify instead of polling mtimes
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+# Fallback for payloads without numericValue (pre-typed SiteBoss snapshots)
+NON_NUMERIC = re.compile(r'[^\d.-]')
+
+DEFAULT_URL = 'http://localhost:8088/api/siteboss/latest'
+
+# attribute -> (metric name, help, labels). Poll mode keeps these as Gauges;
+# SiteBossCollector builds the same metrics as families at scrape time.
+GAUGE_METRICS = {
+    'alert_count': ('siteboss_alert_count_custom', 'SiteBoss alert count by level',
+                    ['tower_id', 'level']),
+    'sensor_status': ('siteboss_sensor_status_custom', 'SiteBoss sensor status (0=normal, 1=warning, 2=critical)',
+                      ['tower_id', 'sensor_name', 'sensor_id', 'sensor_type']),
+    'temperature': ('siteboss_temperature_custom', 'SiteBoss temperature readings',
+                    ['tower_id', 'sensor_name', 'location']),
+    'sensor_type_count': ('siteboss_sensor_type_count_custom', 'SiteBoss sensor count by type',
+                          ['tower_id', 'sensor_type']),
+    'last_pull': ('siteboss_last_pull_timestamp_custom', 'Timestamp of last successful pull',
+                  ['tower_id']),
+}
+UNIT_INFO = ('siteboss_unit_info_custom', 'SiteBoss unit information', ['tower_id'])
+ALERT_LEVEL_VALUES = {'normal': 0, 'warning': 1, 'critical': 2}
+DATA_AGE = ('siteboss_data_age_seconds_custom', 'Age of the SiteBoss data served for each tower', ['tower_id'])
+
+# Buckets for the exporter's own timings (seconds) and payload sizes (bytes, 1 KiB .. 16 MiB)
+TIME_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+BYTE_BUCKETS = tuple(1024 * 4 ** i for i in range(8))
+
+
+def load_towers(path: str) -> List[Dict[str, str]]:
+    """Towers from a JSON file: a list, or {"defaults": {...}, "towers": [...]} ("devices" also works,
+    so the poller's inventory can be used as is). An entry with a url reads SiteBoss JSON from it
+    (the url may contain {tower_id}, so one template in defaults can cover a fleet behind a per-tower
+    endpoint; the backend's /api/siteboss/latest serves a single tower and takes no towerId); an entry
+    with a host and username/password pulls the device directly; an entry with a file watches that
+    snapshot file (which may also contain {tower_id})."""
+    with open(path) as f:
+        data = json.load(f)
+    defaults = {}
+    entries = data
+    if isinstance(data, dict):
+        defaults = data.get('defaults', {})
+        entries = data.get('towers', data.get('devices', []))
+    towers = []
+    for entry in entries:
+        merged = {**defaults, **entry}
+        tower_id = merged.get('tower_id', merged.get('towerId'))
+        if 'file' in entry or ('file' in merged and 'url' not in merged and 'host' not in merged):
+            tower_id = str(tower_id if tower_id is not None else watch_tower_id(merged['file']))
+            towers.append({'tower_id': tower_id, 'file': merged['file'].format(tower_id=tower_id)})
+        elif 'host' in entry or ('host' in merged and 'url' not in merged):
+            towers.append({
+                'tower_id': str(tower_id if tower_id is not None else merged['host']),
+                'host': merged['host'],
+                'username': merged.get('username') or merged.get('user'),
+                'password': merged.get('password') or merged.get('pass'),
+            })
+        else:
+            tower_id = str(tower_id)
+            towers.append({'tower_id': tower_id, 'url': merged['url'].format(tower_id=tower_id)})
+    return towers
+
+
+def watch_tower_id(path: str) -> str:
+    """Tower ID for a snapshot file named after its device (siteboss_<name>.json -> <name>)"""
+    stem = Path(path).stem
+    return stem[len('siteboss_'):] if stem.startswith('siteboss_') else stem
+
+
+def file_key(path: str):
+    """What identifies one version of a snapshot file (writers replace it atomically or rewrite it)"""
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
 
 class SiteBossMetricsExporter:
-    def __init__(self, siteboss_url: str, port: int = 8000):
-        self.siteboss_url = siteboss_url
+    def __init__(self, siteboss_url: str = None, port: int = 9101, towers: List[Dict[str, str]] = None,
+                 concurrency: int = 50, interval: float = 30, timeout: float = 10,
+                 collect_on_scrape: bool = False, cache_ttl: float = 5, scrape_timeout: float = 8,
+                 max_series: int = 50000):
+        # Either a list of towers ({tower_id, url}, {tower_id, host, username, password} or
+        # {tower_id, file}) or the single URL of the original exporter (tower 49)
+        self.towers = towers or [{'tower_id': '49', 'url': siteboss_url or DEFAULT_URL}]
+        self.siteboss_url = self.towers[0].get('url', DEFAULT_URL)
+        if SiteBossHttpSession is None and any('host' in tower or 'file' in tower for tower in self.towers):
+            raise RuntimeError("Direct device pulls and snapshot files need the modules in siteboss-project/")
+        # Snapshot files are watched, not polled on the interval
+        self.file_towers = [tower for tower in self.towers if 'file' in tower]
+        self.polled_towers = [tower for tower in self.towers if 'file' not in tower]
         self.port = port
+        self.concurrency = concurrency
+        self.interval = interval
+        self.timeout = timeout
+        self.collect_on_scrape = collect_on_scrape
+        self.cache_ttl = cache_ttl
+        self.scrape_timeout = scrape_timeout
+        # Per-metric series cap (0 = unlimited)
+        self.max_series = max_series
+        
+        # Direct devices: one authenticated session each, kept across pulls (re-login only on expiry)
+        self.device_sessions = {}
         
-        # Define Prometheus metrics
-        self.alert_count = Gauge('siteboss_alert_count_custom', 
-                                'SiteBoss alert count by level', 
-                                ['tower_id', 'level'])
+        # Snapshot files: tower_id -> (file key, payload) of the last version read
+        self._files = {}
         
-        self.sensor_status = Gauge('siteboss_sensor_status_custom',
-                                 'SiteBoss sensor status (0=normal, 1=warning, 2=critical)',
-                                 ['tower_id', 'sensor_name', 'sensor_id', 'sensor_type'])
+        # One keep-alive pool shared by all towers, sized to the concurrency limit
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         
-        self.temperature = Gauge('siteboss_temperature_custom',
-                               'SiteBoss temperature readings',
-                               ['tower_id', 'sensor_name', 'location'])
+        # Define Prometheus metrics. In collect-on-scrape mode the collector exports
+        # these names itself, so the gauges stay out of the registry.
+        registry = None if collect_on_scrape else REGISTRY
+        for attr, (name, documentation, labels) in GAUGE_METRICS.items():
+            setattr(self, attr, Gauge(name, documentation, labels, registry=registry))
         
-        self.sensor_type_count = Gauge('siteboss_sensor_type_count_custom',
-                                     'SiteBoss sensor count by type',
-                                     ['tower_id', 'sensor_type'])
+        self.unit_info = Info(*UNIT_INFO, registry=registry)
         
-        self.unit_info = Info('siteboss_unit_info_custom',
-                            'SiteBoss unit information')
+        # Values that change between updates are rendered on every scrape, not cached
+        self.live_registry = CollectorRegistry()
+        self.data_age = Gauge(*DATA_AGE, registry=None if collect_on_scrape else self.live_registry)
         
         self.pull_errors = Counter('siteboss_pull_errors_custom',
                                  'SiteBoss pull errors',
                                  ['tower_id'])
         
-        self.last_pull = Gauge('siteboss_last_pull_timestamp_custom',
-                             'Timestamp of last successful pull',
-                             ['tower_id'])
+        # Set while collecting on scrape, so then the collector exports it after updating it
+        self.series_dropped = Counter('siteboss_series_dropped_custom',
+                                    'Samples not exported because the metric reached --max-series',
+                                    ['metric'], registry=registry)
+        
+        self.series_removed = Counter('siteboss_series_removed_custom',
+                                    'Stale series removed after they disappeared from a payload',
+                                    ['metric'])
+        
+        # Series set by each tower's latest update: attribute -> tower_id -> label tuples.
+        # update_metrics runs on several threads, so the bookkeeping is locked.
+        self._series = {attr: {} for attr in GAUGE_METRICS}
+        self._series_count = dict.fromkeys(GAUGE_METRICS, 0)
+        self._series_lock = threading.Lock()
+        self._updated_at = {}
+        
+        # Self-instrumentation: where a slow collection spends its time
+        self.fetch_seconds = Histogram('siteboss_exporter_fetch_seconds',
+                                     'HTTP fetch time per tower (request and body download)',
+                                     buckets=TIME_BUCKETS)
+        
+        self.payload_bytes = Histogram('siteboss_exporter_payload_bytes',
+                                     'Size of each fetched payload (JSON, or SiteStatus.xml for direct devices)',
+                                     buckets=BYTE_BUCKETS)
+        
+        self.decode_seconds = Histogram('siteboss_exporter_decode_seconds',
+                                      'Decode time per payload (JSON, or XML parse for direct devices)',
+                                      buckets=TIME_BUCKETS)
+        
+        self.update_seconds = Histogram('siteboss_exporter_update_seconds',
+                                      'Time turning one payload into metric samples',
+                                      buckets=TIME_BUCKETS)
+        
+        self.round_seconds = Histogram('siteboss_exporter_round_seconds',
+                                     'Time to collect all towers (one poll round or one scrape-time refresh)',
+                                     buckets=TIME_BUCKETS)
+        
+        self.render_seconds = Histogram('siteboss_exporter_render_seconds',
+                                      'Time rendering the cached /metrics exposition',
+                                      buckets=TIME_BUCKETS)
+        
+        self.exposition = ExpositionCache(REGISTRY, self.live_registry, self.render_seconds)
+        
+        self.active_series = Gauge('siteboss_exporter_series',
+                                 'Series currently exported per metric',
+                                 ['metric'], registry=registry)
+        if not collect_on_scrape:
+            for attr in GAUGE_METRICS:
+                self.active_series.labels(metric=attr).set_function(lambda attr=attr: self._series_count[attr])
 
-    def fetch_siteboss_data(self) -> Dict[str, Any]:
+    def fetch_siteboss_data(self, url: str = None, tower_id: str = None) -> Dict[str, Any]:
         """Fetch JSON data from SiteBoss API"""
         try:
-            response = requests.get(self.siteboss_url, timeout=30)
+            start = time.perf_counter()
+            response = self.session.get(url or self.siteboss_url, timeout=self.timeout)
             response.raise_for_status()
-            return response.json()
+            fetched = time.perf_counter()
+            self.fetch_seconds.observe(fetched - start)
+            self.payload_bytes.observe(len(response.content))
+            data = response.json()
+            self.decode_seconds.observe(time.perf_counter() - fetched)
+            return data
+        except Exception as e:
+            print(f"Error fetching SiteBoss data{f' for tower {tower_id}' if tower_id else ''}: {e}")
+            if tower_id is not None:
+                self.pull_errors.labels(tower_id=tower_id).inc()
+            return None
+
+    def fetch_device(self, tower: Dict[str, str]) -> Dict[str, Any]:
+        """Pull SiteStatus.xml from a device and parse it in-process (same shape as the backend's JSON)"""
+        tower_id = tower['tower_id']
+        try:
+            client = self.device_sessions.get(tower_id)
+            if client is None:
+                client = SiteBossHttpSession(tower['host'], tower['username'], tower['password'], self.timeout)
+                self.device_sessions[tower_id] = client
+            start = time.perf_counter()
+            xml_text = client.fetch_xml()
+            fetched = time.perf_counter()
+            self.fetch_seconds.observe(fetched - start)
+            self.payload_bytes.observe(len(xml_text))
+            snapshot = parse_xml_to_json(xml_text)
+            self.decode_seconds.observe(time.perf_counter() - fetched)
+            return {'data': snapshot}
+        except Exception as e:
+            print(f"Error pulling SiteBoss device {tower['host']} for tower {tower_id}: {e}")
+            self.pull_errors.labels(tower_id=tower_id).inc()
+            return None
+
+    def read_snapshot_file(self, tower: Dict[str, str]) -> Dict[str, Any]:
+        """A tower's snapshot file (JSON or binary), re-read only when it has changed since the last read"""
+        tower_id = tower['tower_id']
+        path = tower['file']
+        try:
+            key = file_key(path)
+            cached = self._files.get(tower_id)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+            # Remembered before decoding, so a broken file is retried when it changes, not on every poll
+            self._files[tower_id] = (key, None)
+            start = time.perf_counter()
+            snapshot = load_snapshot(path)
+            self.payload_bytes.observe(key[2])
+            self.decode_seconds.observe(time.perf_counter() - start)
+            # Backend payloads wrap the snapshot in {'data': ...}; the puller's files are the bare snapshot
+            data = snapshot if 'data' in snapshot else {'data': snapshot}
+            self._files[tower_id] = (key, data)
+            return data
         except Exception as e:
-            print(f"Error fetching SiteBoss data: {e}")
+            print(f"Error reading snapshot file {path} for tower {tower_id}: {e}")
+            self.pull_errors.labels(tower_id=tower_id).inc()
             return None
 
+    def file_changed(self, tower: Dict[str, str]) -> bool:
+        """True when a tower's snapshot file differs from the version last read"""
+        try:
+            key = file_key(tower['file'])
+        except OSError:
+            return False
+        cached = self._files.get(tower['tower_id'])
+        return cached is None or cached[0] != key
+
+    def fetch_tower(self, tower: Dict[str, str]) -> Dict[str, Any]:
+        """One tower's data, from the device itself, a snapshot file or its JSON endpoint"""
+        if 'host' in tower:
+            return self.fetch_device(tower)
+        if 'file' in tower:
+            return self.read_snapshot_file(tower)
+        return self.fetch_siteboss_data(tower['url'], tower['tower_id'])
+
+    def collect_tower(self, tower: Dict[str, str]) -> bool:
+        """Fetch one tower and update its series (runs in a worker thread)"""
+        data = self.fetch_tower(tower)
+        if not data:
+            return False
+        return self.update_metrics(data, tower['tower_id'])
+
+    async def collect_all(self) -> int:
+        """Fetch every polled tower concurrently; returns how many were updated"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def collect(tower):
+            async with semaphore:
+                return await asyncio.to_thread(self.collect_tower, tower)
+
+        results = await asyncio.gather(*(collect(tower) for tower in self.polled_towers))
+        return sum(1 for ok in results if ok)
+
     def parse_uptime(self, uptime_str: str) -> float:
         """Parse uptime string to hours"""
         try:
@@ -72,116 +370,429 @@ class SiteBossMetricsExporter:
         """Extract numeric temperature value"""
         try:
             # Remove non-numeric characters except decimal point and minus
-            import re
-            numeric_part = re.sub(r'[^\d.-]', '', value_str)
+            numeric_part = NON_NUMERIC.sub('', value_str)
             return float(numeric_part)
         except (ValueError, TypeError):
             return 0
 
-    def update_metrics(self, data: Dict[str, Any]):
-        """Update Prometheus metrics from JSON data"""
+    def sensor_number(self, sensor: Dict[str, Any]):
+        """Decoded numeric value of a sensor; only older payloads fall back to string parsing"""
+        if 'numericValue' in sensor:
+            return sensor['numericValue']
+        if sensor.get('type') == 'Temperature':
+            return self.parse_temperature(sensor.get('value', '0'))
+        return None
+
+    def tower_samples(self, data: Dict[str, Any], tower_id: str) -> Dict[str, Dict[tuple, float]]:
+        """Gauge samples for one tower's JSON: metric attribute -> {label values: value}"""
+        samples = {attr: {} for attr in GAUGE_METRICS if attr != 'last_pull'}
+        snapshot = data.get('data') or {}
+        summary = snapshot.get('summary') or {}
+        
+        # Alert counts
+        for level, count in (summary.get('alertCounts') or {}).items():
+            samples['alert_count'][(tower_id, level)] = count
+        
+        # Sensor status (alert level as a number) and temperatures
+        for sensor in snapshot.get('sensors') or []:
+            sensor_name = sensor.get('name', 'unknown')
+            sensor_id = sensor.get('id', 'unknown')
+            sensor_type = sensor.get('type', 'unknown')
+            status_value = ALERT_LEVEL_VALUES.get(sensor.get('alertLevel', 'normal'), 0)
+            samples['sensor_status'][(tower_id, sensor_name, sensor_id, sensor_type)] = status_value
+            
+            # Numeric values come decoded from the parser (numericValue/unit)
+            if sensor_type == 'Temperature':
+                number = self.sensor_number(sensor)
+                if number is not None:
+                    samples['temperature'][(tower_id, sensor_name, sensor.get('group', 'unknown'))] = number
+        
+        # Sensor type counts
+        for sensor_type, count in (summary.get('sensorsByType') or {}).items():
+            samples['sensor_type_count'][(tower_id, sensor_type)] = count
+        return samples
+
+    def unit_labels(self, data: Dict[str, Any]):
+        """Unit info for one tower's JSON, or None when the payload has no unit block"""
+        unit = (data.get('data') or {}).get('unit')
+        if unit is None:
+            return None
+        return {
+            'site_name': str(unit.get('siteName') or 'unknown'),
+            'serial': str(unit.get('serial') or 'unknown'),
+            'version': str(unit.get('version') or 'unknown'),
+            'hardware': str(unit.get('hardware') or 'unknown')
+        }
+
+    def update_metrics(self, data: Dict[str, Any], tower_id: str = '49') -> bool:
+        """Update Prometheus metrics for one tower from its JSON data"""
         if not data:
-            return
+            return False
 
-        tower_id = "49"  # Extract from data if available
+        tower_id = str(tower_id)
         
         try:
-            # Update alert counts
-            if 'data' in data and 'summary' in data['data']:
-                alert_counts = data['data']['summary'].get('alertCounts', {})
-                for level, count in alert_counts.items():
-                    self.alert_count.labels(tower_id=tower_id, level=level).set(count)
-            
-            # Update sensor status
-            if 'data' in data and 'sensors' in data['data']:
-                for sensor in data['data']['sensors']:
-                    sensor_name = sensor.get('name', 'unknown')
-                    sensor_id = sensor.get('id', 'unknown')
-                    sensor_type = sensor.get('type', 'unknown')
-                    alert_level = sensor.get('alertLevel', 'normal')
-                    
-                    # Convert alert level to numeric value
-                    status_value = 0  # normal
-                    if alert_level == 'warning':
-                        status_value = 1
-                    elif alert_level == 'critical':
-                        status_value = 2
-                    
-                    self.sensor_status.labels(
-                        tower_id=tower_id,
-                        sensor_name=sensor_name,
-                        sensor_id=sensor_id,
-                        sensor_type=sensor_type
-                    ).set(status_value)
-                    
-                    # Extract temperature values
-                    if sensor_type == 'Temperature':
-                        temp_value = self.parse_temperature(sensor.get('value', '0'))
-                        self.temperature.labels(
-                            tower_id=tower_id,
-                            sensor_name=sensor_name,
-                            location=sensor.get('group', 'unknown')
-                        ).set(temp_value)
-            
-            # Update sensor type counts
-            if 'data' in data and 'summary' in data['data']:
-                sensor_types = data['data']['summary'].get('sensorsByType', {})
-                for sensor_type, count in sensor_types.items():
-                    self.sensor_type_count.labels(
-                        tower_id=tower_id,
-                        sensor_type=sensor_type
-                    ).set(count)
+            start = time.perf_counter()
+            samples = self.tower_samples(data, tower_id)
+            # Update last pull timestamp
+            samples['last_pull'] = {(tower_id,): time.time()}
+            with self._series_lock:
+                for attr, values in samples.items():
+                    self._set_tower_series(attr, tower_id, values)
             
             # Update unit info
-            if 'data' in data and 'unit' in data['data']:
-                unit = data['data']['unit']
-                self.unit_info.labels(
-                    site_name=unit.get('siteName', 'unknown'),
-                    serial=unit.get('serial', 'unknown'),
-                    version=unit.get('version', 'unknown'),
-                    hardware=unit.get('hardware', 'unknown')
-                ).set(1)  # Info metrics need a value
+            unit = self.unit_labels(data)
+            if unit is not None:
+                self.unit_info.labels(tower_id=tower_id).info(unit)
             
-            # Update last pull timestamp
-            self.last_pull.labels(tower_id=tower_id).set(time.time())
+            if tower_id not in self._updated_at:
+                self.data_age.labels(tower_id=tower_id).set_function(
+                    lambda: time.time() - self._updated_at[tower_id])
+            self._updated_at[tower_id] = time.time()
+            self.update_seconds.observe(time.perf_counter() - start)
             
         except Exception as e:
-            print(f"Error updating metrics: {e}")
+            print(f"Error updating metrics for tower {tower_id}: {e}")
             self.pull_errors.labels(tower_id=tower_id).inc()
+            return False
+        return True
 
-    def run(self):
-        """Main loop"""
-        print(f"Starting SiteBoss metrics exporter on port {self.port}")
-        start_http_server(self.port)
-        
+    def _set_tower_series(self, attr: str, tower_id: str, values: Dict[tuple, float]):
+        """Set one tower's samples for one gauge: series the tower had last time but not now
+        are removed, and new series are only added while the metric is under max_series"""
+        gauge = getattr(self, attr)
+        towers = self._series[attr]
+        previous = towers.get(tower_id, set())
+        others = self._series_count[attr] - len(previous)
+        allowed = self.max_series - others if self.max_series else None
+        current = set()
+        dropped = 0
+        for labels, value in values.items():
+            if allowed is not None and len(current) >= allowed:
+                dropped += 1
+                continue
+            gauge.labels(*labels).set(value)
+            current.add(labels)
+        stale = previous - current
+        for labels in stale:
+            gauge.remove(*labels)
+        towers[tower_id] = current
+        self._series_count[attr] = others + len(current)
+        if dropped:
+            self.series_dropped.labels(metric=attr).inc(dropped)
+        if stale:
+            self.series_removed.labels(metric=attr).inc(len(stale))
+
+    async def run_async(self):
+        """Collect all towers every interval; a slow round delays the next one instead of overlapping it"""
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency))
         while True:
+            start = time.monotonic()
             try:
-                data = self.fetch_siteboss_data()
-                self.update_metrics(data)
-                print(f"Metrics updated at {time.strftime('%Y-%m-%d %H:%M:%S')}")
-            except KeyboardInterrupt:
-                print("Exiting...")
-                break
+                updated = await self.collect_all()
+                elapsed = time.monotonic() - start
+                self.round_seconds.observe(elapsed)
+                # Render once per update; scrapes until the next round are served from the cache
+                await asyncio.to_thread(self.exposition.refresh)
+                print(f"Metrics updated for {updated}/{len(self.polled_towers)} towers in {elapsed:.2f}s "
+                      f"at {time.strftime('%Y-%m-%d %H:%M:%S')}")
+                if elapsed > self.interval:
+                    print(f"Warning: collection took longer than the {self.interval:g}s interval "
+                          f"(raise --concurrency)")
             except Exception as e:
                 print(f"Unexpected error: {e}")
-            
-            time.sleep(30)  # Update every 30 seconds
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - start)))
 
-if __name__ == '__main__':
-    exporter = SiteBossMetricsExporter(
-        siteboss_url='http://localhost:8088/api/siteboss/latest',
-        port=8000
-    )
-    exporter.run()
+    def watch_files(self, poll_interval: float = 1.0):
+        """Update file towers whenever their snapshot changes (runs in its own thread)"""
+        watcher = SnapshotWatcher([tower['file'] for tower in self.file_towers], poll_interval)
+        print(f"Watching {len(self.file_towers)} snapshot file(s) ({watcher.method})")
+        while True:
+            start = time.monotonic()
+            updated = sum(1 for tower in self.file_towers
+                          if self.file_changed(tower) and self.collect_tower(tower))
+            if updated:
+                self.round_seconds.observe(time.monotonic() - start)
+                self.exposition.refresh()
+                print(f"Metrics updated for {updated} snapshot file(s) at {time.strftime('%Y-%m-%d %H:%M:%S')}")
+            watcher.wait()
 
+    def run(self, watch_interval: float = 1.0):
+        """Main loop"""
+        print(f"Starting SiteBoss metrics exporter on port {self.port} for {len(self.towers)} tower(s)")
+        before_scrape = None
+        if self.collect_on_scrape:
+            collector = SiteBossCollector(self, self.cache_ttl, self.scrape_timeout)
+            REGISTRY.register(collector)
+            print(f"Collecting on scrape (cache TTL {self.cache_ttl:g}s, scrape timeout {self.scrape_timeout:g}s)")
 
+            def before_scrape():
+                # A new fetch round means new data: drop the rendered exposition
+                if collector.refresh():
+                    self.exposition.invalidate()
+        serve_metrics(self.port, self.exposition, before_scrape)
+        if self.file_towers and not self.collect_on_scrape:
+            threading.Thread(target=self.watch_files, args=(watch_interval,), daemon=True).start()
+        try:
+            if self.collect_on_scrape or not self.polled_towers:
+                threading.Event().wait()
+            else:
+                asyncio.run(self.run_async())
+        except KeyboardInterrupt:
+            print("Exiting...")
+        finally:
+            self.session.close()
+            for client in self.device_sessions.values():
+                client.close()
 
 
+class SnapshotWatcher:
+    """Blocks until one of the watched snapshot files may have changed.
+    With inotify the parent directories are watched for files written or moved into place (atomic
+    replaces included); without it, wait() just sleeps poll_interval and callers compare file keys."""
 
+    def __init__(self, paths: List[str], poll_interval: float = 1.0):
+        self.poll_interval = poll_interval
+        self.names = {Path(path).name for path in paths}
+        self.inotify = None
+        self.method = f"polling every {poll_interval:g}s"
+        if INotify is not None:
+            self.inotify = INotify()
+            mask = inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.CREATE
+            for directory in {str(Path(path).resolve().parent) for path in paths}:
+                self.inotify.add_watch(directory, mask)
+            self.method = "inotify"
 
+    def wait(self):
+        if self.inotify is None:
+            time.sleep(self.poll_interval)
+            return
+        # Other files in the same directories (.tmp files, state sidecars) wake us but don't count
+        while not any(event.name in self.names for event in self.inotify.read()):
+            pass
 
 
+class SiteBossCollector:
+    """Fetch-on-scrape collector: towers are fetched when /metrics is scraped.
+    A round of fetches is reused for ttl seconds, so concurrent scrapers share it. Towers that
+    don't answer within scrape_timeout keep serving their last good payload while the fetch
+    finishes in the background."""
 
+    def __init__(self, exporter: SiteBossMetricsExporter, ttl: float = 5, scrape_timeout: float = 8):
+        self.exporter = exporter
+        self.ttl = ttl
+        self.scrape_timeout = scrape_timeout
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=exporter.concurrency)
+        self._pending = {}
+        self._payloads = {}
+        self._refreshed = None
 
+    def describe(self):
+        # Nothing up front: registering must not trigger a fetch
+        return []
 
+    def _fetch(self, tower: Dict[str, str]):
+        data = self.exporter.fetch_tower(tower)
+        if data:
+            self._payloads[tower['tower_id']] = (data, time.time())
 
+    def refresh(self) -> bool:
+        """Fetch all towers unless the last round is younger than the TTL. True if a round ran."""
+        with self._lock:
+            if self._refreshed is not None and time.monotonic() - self._refreshed < self.ttl:
+                return False
+            futures = []
+            for tower in self.exporter.towers:
+                future = self._pending.get(tower['tower_id'])
+                # A fetch still running from an earlier scrape is awaited, not duplicated
+                if future is None or future.done():
+                    future = self._executor.submit(self._fetch, tower)
+                    self._pending[tower['tower_id']] = future
+                futures.append(future)
+            start = time.perf_counter()
+            wait(futures, timeout=self.scrape_timeout)
+            self.exporter.round_seconds.observe(time.perf_counter() - start)
+            self._refreshed = time.monotonic()
+            return True
+
+    def collect(self):
+        self.refresh()
+        exporter = self.exporter
+        families = {attr: GaugeMetricFamily(name, documentation, labels=labels)
+                    for attr, (name, documentation, labels) in GAUGE_METRICS.items()}
+        unit_info = InfoMetricFamily(*UNIT_INFO[:2], labels=UNIT_INFO[2])
+        data_age = GaugeMetricFamily(*DATA_AGE[:2], labels=DATA_AGE[2])
+        now = time.time()
+        counts = dict.fromkeys(families, 0)
+        limit = exporter.max_series
+        for tower_id, (data, fetched_at) in list(self._payloads.items()):
+            try:
+                start = time.perf_counter()
+                samples = exporter.tower_samples(data, tower_id)
+                unit = exporter.unit_labels(data)
+                exporter.update_seconds.observe(time.perf_counter() - start)
+            except Exception as e:
+                print(f"Error updating metrics for tower {tower_id}: {e}")
+                exporter.pull_errors.labels(tower_id=tower_id).inc()
+                continue
+            samples['last_pull'] = {(tower_id,): fetched_at}
+            for attr, values in samples.items():
+                # Families are rebuilt every scrape, so stale series disappear by themselves; only the cap applies
+                room = limit - counts[attr] if limit else len(values)
+                if len(values) > room:
+                    exporter.series_dropped.labels(metric=attr).inc(len(values) - max(room, 0))
+                for labels, value in itertools.islice(values.items(), max(room, 0)):
+                    families[attr].add_metric(labels, value)
+                counts[attr] += min(len(values), max(room, 0))
+            if unit is not None:
+                unit_info.add_metric([tower_id], unit)
+            data_age.add_metric([tower_id], now - fetched_at)
+        for attr, count in counts.items():
+            exporter.active_series.labels(metric=attr).set(count)
+        yield from families.values()
+        yield unit_info
+        yield data_age
+        # Exported here, not from REGISTRY: the registry renders its own metrics before this
+        # collector, so they would show the previous scrape's counts
+        yield from exporter.active_series.collect()
+        yield from exporter.series_dropped.collect()
+
+
+class ExpositionCache:
+    """Pre-rendered /metrics bodies, rebuilt once per data update instead of once per scrape.
+    Each format (text, OpenMetrics) is rendered once, and its gzip variant is kept as compressed
+    bytes plus the compressor state. A scrape only adds the small live registry (values that
+    change between updates) and the OpenMetrics '# EOF' to the cached prefix."""
+
+    def __init__(self, registry=REGISTRY, live_registry=None, render_seconds=None):
+        self.registry = registry
+        self.live_registry = live_registry
+        self.render_seconds = render_seconds
+        self._lock = threading.Lock()
+        self._bodies = {}
+
+    def _render(self, use_openmetrics: bool):
+        start = time.perf_counter()
+        if use_openmetrics:
+            body = openmetrics.generate_latest(self.registry)
+            body = body[:-len(b'# EOF\n')] if body.endswith(b'# EOF\n') else body
+        else:
+            body = generate_latest(self.registry)
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+        compressed = compressor.compress(body)
+        if self.render_seconds is not None:
+            self.render_seconds.observe(time.perf_counter() - start)
+        return body, compressed, compressor
+
+    def refresh(self):
+        """Render the text format now (OpenMetrics is rendered on first request)"""
+        self._bodies = {False: self._render(False)}
+
+    def invalidate(self):
+        self._bodies = {}
+
+    def get(self, use_openmetrics: bool = False, gzipped: bool = False) -> bytes:
+        bodies = self._bodies
+        entry = bodies.get(use_openmetrics)
+        if entry is None:
+            with self._lock:
+                bodies = self._bodies
+                entry = bodies.get(use_openmetrics)
+                if entry is None:
+                    entry = self._render(use_openmetrics)
+                    bodies[use_openmetrics] = entry
+        body, compressed, compressor = entry
+        tail = b''
+        if self.live_registry is not None:
+            tail = (openmetrics.generate_latest(self.live_registry) if use_openmetrics
+                    else generate_latest(self.live_registry))
+        elif use_openmetrics:
+            tail = b'# EOF\n'
+        if not gzipped:
+            return body + tail
+        # Finish a copy of the stored compressor: only the tail is compressed per scrape
+        finish = compressor.copy()
+        return compressed + finish.compress(tail) + finish.flush()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the exposition cache (Accept picks OpenMetrics, Accept-Encoding picks gzip)"""
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        if self.server.before_scrape is not None:
+            self.server.before_scrape()
+        use_openmetrics = 'application/openmetrics-text' in (self.headers.get('Accept') or '')
+        gzipped = 'gzip' in (self.headers.get('Accept-Encoding') or '')
+        body = self.server.exposition.get(use_openmetrics, gzipped)
+        self.send_response(200)
+        self.send_header('Content-Type', openmetrics.CONTENT_TYPE_LATEST if use_openmetrics else CONTENT_TYPE_LATEST)
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_metrics(port: int, exposition: ExpositionCache, before_scrape=None, addr: str = '0.0.0.0'):
+    """Start the /metrics server in a daemon thread (replaces prometheus_client.start_http_server)"""
+    server = ThreadingHTTPServer((addr, port), MetricsHandler)
+    server.daemon_threads = True
+    server.exposition = exposition
+    server.before_scrape = before_scrape
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SiteBoss JSON -> Prometheus metrics exporter')
+    parser.add_argument('--towers', help='JSON file listing towers: {tower_id, url} (url may use {tower_id}) '
+                                         'or devices to pull directly {tower_id, host, username, password}')
+    parser.add_argument('--watch', action='append', default=[], metavar='FILE',
+                        help='Snapshot file written by the puller to watch (repeatable; tower ID from the file '
+                             'name, siteboss_<tower id>.json, or --tower-id for a single file)')
+    parser.add_argument('--watch-interval', type=float, default=1.0,
+                        help='Seconds between mtime checks of watched files when inotify is unavailable')
+    parser.add_argument('--url', default=DEFAULT_URL, help='SiteBoss JSON endpoint when --towers is not given')
+    parser.add_argument('--tower-id', help='Tower ID for --url (default 49) or a single --watch file')
+    parser.add_argument('--port', type=int, default=9101, help='Port for the /metrics endpoint')
+    parser.add_argument('--interval', type=float, default=30, help='Seconds between collections')
+    parser.add_argument('--concurrency', type=int, default=50, help='Max simultaneous tower fetches')
+    parser.add_argument('--timeout', type=float, default=10, help='Per-request timeout in seconds')
+    parser.add_argument('--collect-on-scrape', action='store_true',
+                        help='Fetch towers when /metrics is scraped instead of every --interval')
+    parser.add_argument('--cache-ttl', type=float, default=5,
+                        help='Seconds a scrape-time fetch is reused by later scrapes')
+    parser.add_argument('--scrape-timeout', type=float, default=8,
+                        help='Max seconds a scrape waits for fetches before serving the last good data')
+    parser.add_argument('--max-series', type=int, default=50000,
+                        help='Max series per metric across all towers (0 = unlimited)')
+    args = parser.parse_args()
+
+    towers = load_towers(args.towers) if args.towers else []
+    if args.tower_id is not None and len(args.watch) == 1:
+        towers.append({'tower_id': str(args.tower_id), 'file': args.watch[0]})
+    else:
+        for path in args.watch:
+            # Snapshots don't record their tower, so only a file named after one can be labelled
+            tower_id = watch_tower_id(path)
+            if not tower_id.isdigit():
+                parser.error(f"can't tell the tower of {path}: name it siteboss_<tower id>.json or pass --tower-id")
+            towers.append({'tower_id': tower_id, 'file': path})
+    if not towers:
+        towers = [{'tower_id': str(args.tower_id or '49'), 'url': args.url}]
+    exporter = SiteBossMetricsExporter(port=args.port, towers=towers, concurrency=args.concurrency,
+                                       interval=args.interval, timeout=args.timeout,
+                                       collect_on_scrape=args.collect_on_scrape, cache_ttl=args.cache_ttl,
+                                       scrape_timeout=args.scrape_timeout, max_series=args.max_series)
+    exporter.run(args.watch_interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+JSON serialization with an optional fast backend.
+
+orjson is used when it is installed, otherwise the stdlib json module.
+Output is compact by default; pass pretty=True for 2-space indentation.
+Both backends produce UTF-8 (no \\u escaping), write datetimes, dates
+and times as ISO 8601 (orjson's RFC 3339 form) and fall back to str()
+for other unknown types, so the output does not depend on which backend
+is installed.
+
+This is the only copy: ai-service imports it from siteboss-project/.
+"""
+import json
+import os
+from datetime import date, datetime, time
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+if orjson is not None:
+    _COMPACT_OPTS = orjson.OPT_NON_STR_KEYS
+    _PRETTY_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2
+
+
+def _default(obj: Any) -> Any:
+    # Matches what orjson does natively for these types
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def dumps_bytes(obj: Any, pretty: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=_PRETTY_OPTS if pretty else _COMPACT_OPTS)
+    return dumps(obj, pretty).encode("utf-8")
+
+
+def dumps(obj: Any, pretty: bool = False) -> str:
+    """Serialize obj to a JSON string"""
+    if orjson is not None:
+        return dumps_bytes(obj, pretty).decode("utf-8")
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=_default)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default)
+
+
+def loads(data: Any) -> Any:
+    """Parse JSON from str, bytes, bytearray or memoryview"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dump_file(obj: Any, path: str, pretty: bool = False) -> int:
+    """Write obj as JSON to path atomically, so readers never see a partial file. Returns the number of bytes written."""
+    payload = dumps_bytes(obj, pretty)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+    os.replace(tmp, path)
+    return len(payload)
+
+
+def load_file(path: str) -> Any:
+    """Read and parse a JSON file"""
+    with open(path, "rb") as f:
+        return loads(f.read())
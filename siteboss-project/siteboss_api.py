@@ -5,25 +5,24 @@ Pulls XML data, converts to JSON, and prepares for API consumption
 """
 import asyncio
 import argparse
-import json
-import xml.etree.ElementTree as ET
-from pathlib import Path
-from playwright.async_api import async_playwright
+import serialization
+import urllib.request
 from datetime import datetime
-
-# Define which sensors are considered "working" by status strings mapping
-WORKING_STATUS = {
-    'Contact Closure': {'Active', 'Inactive'},
-    'Temperature': {'Normal'},
-    'Analog': {'Normal'},
-    'Output': {'Active', 'Inactive'},
-}
-
-IGNORED_NAMES = {'unnamed'}
-
-
-async def pull_xml_data(host: str, username: str, password: str) -> str:
-    """Pull XML data from SiteBoss device using Playwright"""
+from pathlib import Path
+from siteboss_http import pull_xml_data_http
+from siteboss_delta import DeltaTracker, DEFAULT_KEYFRAME_EVERY
+from siteboss_archive import SiteBossArchive, archive_key
+from siteboss_snapshot import write_snapshot, output_path
+import siteboss_parser
+
+
+async def pull_xml_data(host: str, username: str, password: str, pool=None) -> str:
+    """Pull XML data from SiteBoss device using Playwright.
+    With a BrowserPool (siteboss_browser_pool.py) the device's authenticated context is reused."""
+    if pool is not None:
+        return await pool.fetch_xml(host, username, password)
+    
+    from playwright.async_api import async_playwright  # only needed for browser mode
     base = f'http://{host}'
     
     async with async_playwright() as p:
@@ -68,111 +67,56 @@ async def pull_xml_data(host: str, username: str, password: str) -> str:
             raise Exception("Failed to retrieve XML data - got HTML instead")
 
 
+async def pull_xml(host: str, username: str, password: str, mode: str = 'auto', pool=None) -> str:
+    """Pull XML over a plain HTTP session ('http'), a headless browser ('browser'),
+    or HTTP with the browser as fallback ('auto')"""
+    if mode == 'browser':
+        return await pull_xml_data(host, username, password, pool)
+    try:
+        print("🔌 Connecting to SiteBoss device (HTTP session)...")
+        xml_text = await asyncio.to_thread(pull_xml_data_http, host, username, password)
+        print("✅ XML data retrieved successfully")
+        return xml_text
+    except Exception as e:
+        if mode == 'http':
+            raise
+        print(f"⚠️ HTTP pull failed ({e}), falling back to browser...")
+        return await pull_xml_data(host, username, password, pool)
+
+
 def parse_xml_to_json(xml_text: str) -> dict:
-    """Convert XML text to filtered JSON format"""
+    """Convert XML text to filtered JSON format (see siteboss_parser.py)"""
     print("🔄 Converting XML to JSON...")
-    
-    root = ET.fromstring(xml_text)
-
-    def text(tag):
-        el = root.find(tag)
-        return el.text if el is not None else None
-
-    # Extract unit information
-    unit = {
-        'siteName': text('Unit_Sitename'),
-        'serial': text('Unit_Serial'),
-        'version': text('Unit_Version'),
-        'build': text('Unit_Build'),
-        'hardware': text('Unit_Hardware'),
-        'timestamp': {
-            'date': text('Unit_Date'),
-            'time': text('Unit_Time'),
-            'lastUpdated': datetime.now().isoformat()
-        },
-        'location': {
-            'latitude': float(text('Unit_Latitude')) if text('Unit_Latitude') else None,
-            'longitude': float(text('Unit_Longitude')) if text('Unit_Longitude') else None,
-        },
-        'uptime': text('Unit_Uptime')
-    }
-
-    # Collect sensors grouped by EventSensor (ES)
-    sensors = []
-    for es in root.findall('EventSensor'):
-        es_name_el = es.find('ES_Name')
-        es_name = es_name_el.text if es_name_el is not None else None
-        es_state = es.findtext('ES_State', '').strip()
-        
-        for s in es.findall('Sensor'):
-            s_type = (s.findtext('Sensor_Type') or '').strip()
-            s_name = (s.findtext('Sensor_Name') or '').strip()
-            status_str = (s.findtext('Sensor_Status_String') or '').strip()
-            enabled = (s.findtext('Sensor_Enabled') or '').strip()
-            value_str = (s.findtext('Sensor_Value_String') or '').strip()
-            
-            # Additional sensor details
-            s_number = s.findtext('Sensor_Number', '')
-            s_value = s.findtext('Sensor_Value', '')
-            s_units = s.findtext('Sensor_Units', '')
-
-            # Skip unnamed or disabled sensors
-            if s_name.lower() in IGNORED_NAMES:
-                continue
-            if enabled.upper() == 'OFF':
-                continue
-
-            # Keep only if status is in working set for that type
-            allowed = WORKING_STATUS.get(s_type, None)
-            if allowed is not None and status_str not in allowed:
-                continue
-
-            # Determine alert status
-            alert_level = "normal"
-            if status_str in ['Active'] and s_type == 'Contact Closure':
-                # For contact closures, Active might be an alert depending on sensor
-                if any(word in s_name.lower() for word in ['door', 'alarm', 'smoke', 'motion', 'flood']):
-                    alert_level = "warning" if 'door' in s_name.lower() else "critical"
-            
-            # Create unique ID by combining group, type, name, and number
-            unique_id = f"{es_name}_{s_type}_{s_name}_{s_number}".replace(' ', '_').replace('-', '_')
-            if not unique_id or unique_id == "None_None_None_":
-                unique_id = f"{es_name}_{s_type}_{len(sensors)}"
-            
-            sensors.append({
-                'id': unique_id,
-                'group': es_name,
-                'groupState': es_state,
-                'type': s_type,
-                'name': s_name,
-                'number': s_number,
-                'status': status_str,
-                'value': value_str,
-                'rawValue': s_value,
-                'units': s_units,
-                'enabled': enabled.upper() == 'ON',
-                'alertLevel': alert_level
-            })
-
-    # Calculate summary statistics
-    sensor_stats = {}
-    alert_counts = {'normal': 0, 'warning': 0, 'critical': 0}
-    
-    for sensor in sensors:
-        s_type = sensor['type']
-        sensor_stats[s_type] = sensor_stats.get(s_type, 0) + 1
-        alert_counts[sensor['alertLevel']] += 1
-
-    return {
-        'unit': unit,
-        'sensors': sensors,
-        'summary': {
-            'totalSensors': len(sensors),
-            'sensorsByType': sensor_stats,
-            'alertCounts': alert_counts,
-            'lastPull': datetime.now().isoformat()
-        }
-    }
+    return siteboss_parser.parse_xml_to_json(xml_text)
+
+
+def push_snapshot(url: str, tower_id: int, json_data: dict) -> int:
+    """POST a parsed snapshot to an ingest endpoint (e.g. the AI service /ingest)"""
+    body = serialization.dumps_bytes({'tower_id': tower_id, 'siteboss_data': json_data})
+    req = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'}, method='POST')
+    with urllib.request.urlopen(req, timeout=10) as resp:
+        return resp.status
+
+
+def load_pull_state(path: str) -> dict:
+    """Read the --skip-unchanged sidecar (last fingerprint, heartbeat, counters)"""
+    try:
+        return serialization.load_file(path)
+    except (OSError, ValueError):
+        return {'pulls': 0, 'skipped': 0}
+
+
+def record_pull(state: dict, path: str, fingerprint: str, changed: bool):
+    """Update and save the sidecar for one pull"""
+    now = datetime.now().isoformat()
+    state['pulls'] = state.get('pulls', 0) + 1
+    state['heartbeat'] = now
+    if changed:
+        state['fingerprint'] = fingerprint
+        state['lastChanged'] = now
+    else:
+        state['skipped'] = state.get('skipped', 0) + 1
+    serialization.dump_file(state, path)
 
 
 async def main():
@@ -182,32 +126,85 @@ async def main():
     parser.add_argument('--pass', dest='password', required=True, help='Password')
     parser.add_argument('--output', default='siteboss_api_data.json', help='Output JSON filename')
     parser.add_argument('--save-xml', action='store_true', help='Also save raw XML file')
+    parser.add_argument('--mode', choices=['auto', 'http', 'browser'], default='auto',
+                        help='Pull over HTTP, with Playwright (browser), or HTTP with browser fallback (auto)')
+    parser.add_argument('--pretty', action='store_true', help='Indent the JSON output (default: compact)')
+    parser.add_argument('--format', choices=['json', 'binary'], default='json',
+                        help='Output format; binary writes a memory-mappable .sbs snapshot (see siteboss_snapshot.py)')
+    parser.add_argument('--push-url', help='Also push the snapshot to this ingest URL (e.g. http://localhost:8000/ingest)')
+    parser.add_argument('--tower-id', type=int, help='Tower ID to attach to pushed snapshots')
+    parser.add_argument('--delta', metavar='STREAM', help='Append sensor deltas to this NDJSON stream instead of writing the full --output file')
+    parser.add_argument('--skip-unchanged', action='store_true',
+                        help='Skip parse/write/push when the XML matches the last pull (ignoring the unit clock); '
+                             'only the heartbeat in <output>.state.json is updated')
+    parser.add_argument('--archive', metavar='DIR', help='Also append the readings to this time-series archive (see siteboss_archive.py)')
+    parser.add_argument('--keyframe-every', type=int, default=DEFAULT_KEYFRAME_EVERY, help='Records between full keyframes in --delta mode')
     args = parser.parse_args()
 
+    if args.push_url and args.tower_id is None:
+        parser.error('--push-url requires --tower-id')
+    args.output = output_path(args.output, args.format)
+
     try:
         print("🚀 SiteBoss API Data Puller")
         print(f"   Target: {args.host}")
         print(f"   Output: {args.output}")
         
         # Step 1: Pull XML data
-        xml_data = await pull_xml_data(args.host, args.user, args.password)
+        xml_data = await pull_xml(args.host, args.user, args.password, args.mode)
+        
+        # Step 1b: Nothing to do if only the unit clock moved since the last pull
+        if args.skip_unchanged:
+            output = args.delta or args.output
+            state_path = f"{output}.state.json"
+            state = load_pull_state(state_path)
+            fingerprint = siteboss_parser.payload_fingerprint(xml_data)
+            if fingerprint == state.get('fingerprint') and Path(output).exists():
+                record_pull(state, state_path, fingerprint, changed=False)
+                print(f"⏭️ Payload unchanged since {state['lastChanged']}, skipped parse and write "
+                      f"({state['skipped']} of {state['pulls']} pulls skipped)")
+                return 0
         
         # Step 2: Convert to JSON
         json_data = parse_xml_to_json(xml_data)
         
-        # Step 3: Save JSON for API consumption
-        with open(args.output, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, indent=2)
+        # Step 3: Save JSON for API consumption (or just what changed since the last pull)
+        if args.delta:
+            tracker = DeltaTracker.from_stream(args.delta, args.keyframe_every)
+            record = tracker.update(json_data)
+            written = tracker.write(record, args.delta)
+            if record['type'] == 'keyframe':
+                print(f"✅ Keyframe seq {record['seq']} written to: {args.delta} ({written:,} bytes)")
+            else:
+                print(f"✅ Delta seq {record['seq']} appended to: {args.delta} ({written:,} bytes: "
+                      f"{len(record['added'])} added, {len(record['removed'])} removed, {len(record['changed'])} changed)")
+        elif args.format == 'binary':
+            write_snapshot(json_data, args.output)
+            print(f"✅ Binary snapshot saved to: {args.output}")
+        else:
+            serialization.dump_file(json_data, args.output, pretty=args.pretty)
+            print(f"✅ JSON data saved to: {args.output}")
+        
+        if args.archive:
+            device = archive_key(args.tower_id, args.host)
+            rows = SiteBossArchive(args.archive).append(device, json_data)
+            print(f"🗄️ {rows} readings archived under: {args.archive}/{device}")
         
-        print(f"✅ JSON data saved to: {args.output}")
+        if args.skip_unchanged:
+            record_pull(state, state_path, fingerprint, changed=True)
         
         # Step 4: Optionally save raw XML
         if args.save_xml:
-            xml_filename = args.output.replace('.json', '.xml')
+            xml_filename = str(Path(args.output).with_suffix('.xml'))
             with open(xml_filename, 'w', encoding='utf-8') as f:
                 f.write(xml_data)
             print(f"📄 Raw XML saved to: {xml_filename}")
         
+        # Step 4b: Optionally push to the ingest endpoint
+        if args.push_url:
+            status = push_snapshot(args.push_url, args.tower_id, json_data)
+            print(f"📤 Snapshot pushed to {args.push_url} (HTTP {status})")
+        
         # Step 5: Display summary
         unit = json_data['unit']
         summary = json_data['summary']
@@ -220,8 +217,9 @@ async def main():
         print(f"   Alerts: {summary['alertCounts']['critical']} critical, {summary['alertCounts']['warning']} warnings")
         
         print(f"\n🔌 Backend Integration Ready!")
-        print(f"   JSON endpoint data: {args.output}")
-        print(f"   File size: {Path(args.output).stat().st_size:,} bytes")
+        output = args.delta or args.output
+        print(f"   JSON endpoint data: {output}")
+        print(f"   File size: {Path(output).stat().st_size:,} bytes")
         
         return 0
         
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+SiteBoss Archive - append-only compressed time-series history of pulls
+Every pull is appended as one zlib-compressed columnar block (timestamp,
+sensor index, status code, numeric value) to a per-device, per-day
+partition. Compaction rewrites finished days into one segment per sensor
+with a small index, so reading a sensor's history touches one short
+compressed segment per day.
+
+Layout:
+    <root>/<device>/catalog.json     sensor ids and status strings (indices are stable)
+    <root>/<device>/YYYY-MM-DD.log   blocks appended by append() (UTC days)
+    <root>/<device>/YYYY-MM-DD.seg   compacted day
+
+One writer per device at a time; queries can run alongside it.
+
+Usage:
+    python siteboss_archive.py --root archive query --device 49 --sensor <id> --since 2025-10-01
+    python siteboss_archive.py --root archive compact
+    python siteboss_archive.py --root archive retention --keep-days 180
+"""
+import argparse
+import math
+import os
+import re
+import struct
+import sys
+import time
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone, timedelta
+from itertools import accumulate
+from pathlib import Path
+import serialization
+
+BLOCK_MAGIC = b'SBA1'
+SEGMENT_MAGIC = b'SBC1'
+BLOCK_HEADER = struct.Struct('<4sII')    # magic, row count, compressed length
+SEGMENT_HEADER = struct.Struct('<4sI')   # magic, index length
+COMPRESS_LEVEL = 6
+
+_NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+_PARTITION = re.compile(r'^(\d{4}-\d{2}-\d{2})\.(log|seg)$')
+
+
+def sensor_value(sensor: dict) -> float:
+    """Numeric value of a parsed sensor, NaN if none.
+    Uses the decoded numericValue; snapshots from before it existed fall back to the value strings."""
+    if 'numericValue' in sensor:
+        number = sensor['numericValue']
+        return math.nan if number is None else number
+    for text in (sensor.get('rawValue'), sensor.get('value')):
+        if text:
+            match = _NUMBER.match(text.strip())
+            if match:
+                return float(match.group())
+    return math.nan
+
+
+def _column(typecode: str, data: bytes = b'') -> array:
+    col = array(typecode)
+    col.frombytes(data)
+    if sys.byteorder == 'big':
+        col.byteswap()
+    return col
+
+
+def _column_bytes(col: array) -> bytes:
+    if sys.byteorder == 'big':
+        col = array(col.typecode, col)
+        col.byteswap()
+    return col.tobytes()
+
+
+def archive_key(tower_id=None, host: str = None) -> str:
+    """Canonical device key: the tower ID, or the host (':' -> '_') for a device without one.
+    Every writer uses it, so a tower's history stays in one place however it was ingested."""
+    if tower_id is not None:
+        return str(tower_id)
+    if not host:
+        raise ValueError('an archive key needs a tower ID or a host')
+    return host.replace(':', '_')
+
+
+def _day(ts_ms: int) -> str:
+    return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+
+
+def _to_ms(value) -> int:
+    """Epoch ms from epoch seconds, a datetime, or an ISO date/datetime string (naive = UTC)"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        value = value.timestamp()
+    return int(value * 1000)
+
+
+def _write_atomic(path: Path, payload: bytes):
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp, path)
+
+
+class DeviceCatalog:
+    """Append-only sensor id and status string dictionaries for one device"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        data = serialization.load_file(path) if path.exists() else {}
+        self.sensors = data.get('sensors', [])
+        self.statuses = data.get('statuses', [])
+        self._sensor_index = {sensor_id: i for i, sensor_id in enumerate(self.sensors)}
+        self._status_index = {status: i for i, status in enumerate(self.statuses)}
+        self.dirty = False
+
+    def sensor(self, sensor_id: str) -> int:
+        index = self._sensor_index.get(sensor_id)
+        if index is None:
+            index = self._sensor_index[sensor_id] = len(self.sensors)
+            self.sensors.append(sensor_id)
+            self.dirty = True
+        return index
+
+    def status(self, status: str) -> int:
+        index = self._status_index.get(status)
+        if index is None:
+            index = self._status_index[status] = len(self.statuses)
+            self.statuses.append(status)
+            self.dirty = True
+        return index
+
+    def find_sensor(self, sensor_id: str):
+        return self._sensor_index.get(sensor_id)
+
+    def save(self):
+        if self.dirty:
+            _write_atomic(self.path, serialization.dumps_bytes({'sensors': self.sensors, 'statuses': self.statuses}))
+            self.dirty = False
+
+
+class SiteBossArchive:
+    """Per-device, day-partitioned, compressed columnar store of sensor readings"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._catalogs = {}
+
+    def _device_dir(self, device) -> Path:
+        return self.root / str(device)
+
+    def catalog(self, device) -> DeviceCatalog:
+        catalog = self._catalogs.get(str(device))
+        if catalog is None:
+            device_dir = self._device_dir(device)
+            device_dir.mkdir(exist_ok=True)
+            catalog = self._catalogs[str(device)] = DeviceCatalog(device_dir / 'catalog.json')
+        return catalog
+
+    def devices(self) -> list:
+        return sorted(p.name for p in self.root.iterdir() if (p / 'catalog.json').exists())
+
+    def partitions(self, device) -> dict:
+        """{day: {'log': Path, 'seg': Path}} for one device"""
+        days = {}
+        device_dir = self._device_dir(device)
+        if device_dir.exists():
+            for path in device_dir.iterdir():
+                match = _PARTITION.match(path.name)
+                if match:
+                    days.setdefault(match.group(1), {})[match.group(2)] = path
+        return dict(sorted(days.items()))
+
+    # Writing
+
+    def append(self, device, snapshot: dict, timestamp=None) -> int:
+        """Append one parsed snapshot as a block. Returns the number of rows written."""
+        ts_ms = _to_ms(timestamp if timestamp is not None else time.time())
+        catalog = self.catalog(device)
+        sensors = snapshot['sensors']
+        if not sensors:
+            return 0
+
+        ids = array('I', (catalog.sensor(s['id']) for s in sensors))
+        statuses = array('H', (catalog.status(s.get('status') or '') for s in sensors))
+        values = array('d', (sensor_value(s) for s in sensors))
+        timestamps = array('q', [ts_ms]) * len(sensors)
+        payload = zlib.compress(b''.join(_column_bytes(c) for c in (timestamps, ids, statuses, values)), COMPRESS_LEVEL)
+
+        # Catalog first, so a block never references an unknown sensor
+        catalog.save()
+        with open(self._device_dir(device) / f'{_day(ts_ms)}.log', 'ab') as f:
+            f.write(BLOCK_HEADER.pack(BLOCK_MAGIC, len(sensors), len(payload)) + payload)
+        return len(sensors)
+
+    # Reading
+
+    @staticmethod
+    def _read_blocks(path: Path):
+        """Yield (timestamps, sensor ids, statuses, values) columns for each block of a .log file"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        offset = 0
+        while offset + BLOCK_HEADER.size <= len(data):
+            magic, rows, length = BLOCK_HEADER.unpack_from(data, offset)
+            start = offset + BLOCK_HEADER.size
+            if magic != BLOCK_MAGIC or start + length > len(data):
+                break  # torn final write; everything before it is intact
+            raw = zlib.decompress(data[start:start + length])
+            offset = start + length
+            edges = (0, rows * 8, rows * 12, rows * 14, rows * 22)
+            yield (_column('q', raw[edges[0]:edges[1]]), _column('I', raw[edges[1]:edges[2]]),
+                   _column('H', raw[edges[2]:edges[3]]), _column('d', raw[edges[3]:edges[4]]))
+
+    @staticmethod
+    def _read_segment_index(f):
+        """(index, data offset): index maps sensor index -> [offset, length, rows, first ts, last ts]
+        with offsets relative to the data offset"""
+        magic, index_length = SEGMENT_HEADER.unpack(f.read(SEGMENT_HEADER.size))
+        if magic != SEGMENT_MAGIC:
+            raise ValueError(f'{f.name} is not a compacted archive segment')
+        return serialization.loads(f.read(index_length)), SEGMENT_HEADER.size + index_length
+
+    @staticmethod
+    def _decode_segment(raw: bytes, rows: int):
+        # Timestamps are stored as deltas (regular pull intervals compress to almost nothing)
+        timestamps = array('q', accumulate(_column('q', raw[:rows * 8])))
+        return timestamps, _column('H', raw[rows * 8:rows * 10]), _column('d', raw[rows * 10:rows * 18])
+
+    def _read_segment(self, path: Path, sensor_index: int):
+        """(timestamps, statuses, values) for one sensor from a .seg file, or None"""
+        with open(path, 'rb') as f:
+            index, data_offset = self._read_segment_index(f)
+            entry = index.get(str(sensor_index))
+            if entry is None:
+                return None
+            offset, length, rows = entry[:3]
+            f.seek(data_offset + offset)
+            return self._decode_segment(zlib.decompress(f.read(length)), rows)
+
+    def _day_rows(self, files: dict, sensor_index: int):
+        """All (ts, status code, value) rows of one sensor in one day partition"""
+        rows = []
+        if 'seg' in files:
+            segment = self._read_segment(files['seg'], sensor_index)
+            if segment is not None:
+                rows.extend(zip(*segment))
+        if 'log' in files:
+            for timestamps, ids, statuses, values in self._read_blocks(files['log']):
+                rows.extend((timestamps[i], statuses[i], values[i])
+                            for i, sensor in enumerate(ids) if sensor == sensor_index)
+        rows.sort(key=lambda row: row[0])
+        return rows
+
+    def query(self, device, sensor_id: str, start=None, end=None) -> list:
+        """Readings of one sensor with start <= t <= end (epoch seconds, datetime or ISO string), oldest first.
+        Each reading is {'t': epoch seconds, 'status': str, 'value': float or None}."""
+        catalog = self.catalog(device)
+        sensor_index = catalog.find_sensor(sensor_id)
+        if sensor_index is None:
+            return []
+        start_ms = _to_ms(start) if start is not None else None
+        end_ms = _to_ms(end) if end is not None else None
+        first_day = _day(start_ms) if start_ms is not None else None
+        last_day = _day(end_ms) if end_ms is not None else None
+
+        readings = []
+        for day, files in self.partitions(device).items():
+            if (first_day and day < first_day) or (last_day and day > last_day):
+                continue
+            rows = self._day_rows(files, sensor_index)
+            times = [row[0] for row in rows]
+            lo = bisect_left(times, start_ms) if start_ms is not None else 0
+            hi = bisect_right(times, end_ms) if end_ms is not None else len(rows)
+            for ts_ms, status, value in rows[lo:hi]:
+                readings.append({
+                    't': ts_ms / 1000,
+                    'status': catalog.statuses[status],
+                    'value': None if math.isnan(value) else value,
+                })
+        return readings
+
+    # Maintenance
+
+    def compact_day(self, device, day: str) -> int:
+        """Merge a day's appended blocks (and any earlier segment) into one per-sensor segment file"""
+        files = self.partitions(device).get(day, {})
+        if 'log' not in files:
+            return 0
+        per_sensor = {}
+        if 'seg' in files:
+            with open(files['seg'], 'rb') as f:
+                index, data_offset = self._read_segment_index(f)
+                for sensor, (offset, length, rows) in ((k, v[:3]) for k, v in index.items()):
+                    f.seek(data_offset + offset)
+                    per_sensor[int(sensor)] = list(zip(*self._decode_segment(zlib.decompress(f.read(length)), rows)))
+        for timestamps, ids, statuses, values in self._read_blocks(files['log']):
+            for i, sensor in enumerate(ids):
+                per_sensor.setdefault(sensor, []).append((timestamps[i], statuses[i], values[i]))
+
+        index = {}
+        segments = []
+        offset = 0
+        for sensor in sorted(per_sensor):
+            rows = sorted(per_sensor[sensor], key=lambda row: row[0])
+            timestamps, statuses, values = zip(*rows)
+            deltas = array('q', [timestamps[0]] + [b - a for a, b in zip(timestamps, timestamps[1:])])
+            payload = zlib.compress(_column_bytes(deltas) + _column_bytes(array('H', statuses)) +
+                                    _column_bytes(array('d', values)), COMPRESS_LEVEL)
+            index[str(sensor)] = [offset, len(payload), len(rows), timestamps[0], timestamps[-1]]
+            segments.append(payload)
+            offset += len(payload)
+
+        index_bytes = serialization.dumps_bytes(index)
+        seg_path = self._device_dir(device) / f'{day}.seg'
+        _write_atomic(seg_path, SEGMENT_HEADER.pack(SEGMENT_MAGIC, len(index_bytes)) + index_bytes + b''.join(segments))
+        files['log'].unlink()
+        return sum(len(rows) for rows in per_sensor.values())
+
+    def compact(self, device=None, include_today: bool = False) -> int:
+        """Compact every finished day (all days with include_today). Returns partitions compacted."""
+        today = _day(time.time() * 1000)
+        compacted = 0
+        for dev in ([device] if device is not None else self.devices()):
+            for day, files in self.partitions(dev).items():
+                if 'log' in files and (include_today or day < today):
+                    self.compact_day(dev, day)
+                    compacted += 1
+        return compacted
+
+    def apply_retention(self, keep_days: int, device=None) -> int:
+        """Delete partitions older than keep_days. Returns files removed."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=keep_days)).strftime('%Y-%m-%d')
+        removed = 0
+        for dev in ([device] if device is not None else self.devices()):
+            for day, files in self.partitions(dev).items():
+                if day < cutoff:
+                    for path in files.values():
+                        path.unlink()
+                        removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        devices = {}
+        for dev in self.devices():
+            partitions = self.partitions(dev)
+            devices[dev] = {
+                'sensors': len(self.catalog(dev).sensors),
+                'days': len(partitions),
+                'firstDay': next(iter(partitions), None),
+                'lastDay': next(reversed(partitions), None) if partitions else None,
+                'bytes': sum(path.stat().st_size for files in partitions.values() for path in files.values()),
+            }
+        return {'root': str(self.root), 'devices': devices}
+
+
+def main():
+    ap = argparse.ArgumentParser(description='SiteBoss archive - query and maintain the pull history')
+    ap.add_argument('--root', default='siteboss_archive', help='Archive directory')
+    sub = ap.add_subparsers(dest='command', required=True)
+
+    q = sub.add_parser('query', help="Print one sensor's readings")
+    q.add_argument('--device', required=True)
+    q.add_argument('--sensor', required=True, help='Sensor id (see the "sensors" command)')
+    q.add_argument('--since', help='Start (ISO date/time, UTC)')
+    q.add_argument('--until', help='End (ISO date/time, UTC)')
+
+    s = sub.add_parser('sensors', help='List the sensor ids archived for a device')
+    s.add_argument('--device', required=True)
+
+    c = sub.add_parser('compact', help='Compact finished days')
+    c.add_argument('--device')
+    c.add_argument('--include-today', action='store_true')
+
+    r = sub.add_parser('retention', help='Delete days older than --keep-days')
+    r.add_argument('--keep-days', type=int, required=True)
+    r.add_argument('--device')
+
+    sub.add_parser('stats', help='Show per-device archive size')
+    args = ap.parse_args()
+
+    archive = SiteBossArchive(args.root)
+    if args.command == 'query':
+        start = time.perf_counter()
+        readings = archive.query(args.device, args.sensor, args.since, args.until)
+        elapsed = (time.perf_counter() - start) * 1000
+        for reading in readings:
+            when = datetime.fromtimestamp(reading['t'], tz=timezone.utc).isoformat()
+            print(f"{when}  {reading['status']:<10} {reading['value']}")
+        print(f"📊 {len(readings)} readings in {elapsed:.1f} ms")
+    elif args.command == 'sensors':
+        for sensor_id in archive.catalog(args.device).sensors:
+            print(sensor_id)
+    elif args.command == 'compact':
+        print(f"🗜️ Compacted {archive.compact(args.device, args.include_today)} partitions")
+    elif args.command == 'retention':
+        print(f"🧹 Removed {archive.apply_retention(args.keep_days, args.device)} partition files")
+    else:
+        print(serialization.dumps(archive.stats(), pretty=True))
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
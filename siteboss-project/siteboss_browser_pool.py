@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+SiteBoss browser pool - one long-lived Chromium with an authenticated
+context per device, for devices that need the Playwright path.
+Repeat pulls reuse the context's session cookie and cost a single
+SiteStatus.xml request; the login page is only loaded again when the
+session has expired.
+
+Chromium keeps its sandbox. In containers that can't provide one, set
+SITEBOSS_BROWSER_NO_SANDBOX=1 (or pass no_sandbox=True) to launch with
+--no-sandbox.
+"""
+import asyncio
+import os
+import time
+from siteboss_http import is_xml
+
+# Resources the login flow does not need
+BLOCKED_RESOURCE_TYPES = {'image', 'stylesheet', 'script', 'font', 'media'}
+
+LOGIN_SCRIPT = """
+async (cred)=>{
+const params = new URLSearchParams({username:cred.u, password:cred.p});
+const response = await fetch('/index.html?commit=login', {
+    method:'POST',
+    headers:{'Content-Type':'application/x-www-form-urlencoded','X-Requested-With':'XMLHttpRequest'},
+    body:params
+});
+return response.status;
+}
+"""
+
+
+async def _block_heavy_resources(route):
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+class DeviceContext:
+    """Browser context (cookie jar) for one device"""
+
+    def __init__(self, host: str, context):
+        self.base = f'http://{host}'
+        self.context = context
+        self.lock = asyncio.Lock()
+        self.logged_in = False
+        self.logins = 0
+        self.pulls = 0
+
+
+class BrowserPool:
+    """Long-lived headless Chromium with one authenticated context per device"""
+
+    def __init__(self, headless: bool = True, timeout_ms: int = 30000, no_sandbox: bool = None):
+        self.headless = headless
+        if no_sandbox is None:
+            no_sandbox = os.environ.get('SITEBOSS_BROWSER_NO_SANDBOX', '') not in ('', '0')
+        self.no_sandbox = no_sandbox
+        self.timeout_ms = timeout_ms
+        self._playwright = None
+        self._browser = None
+        self._contexts = {}
+        self._start_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        """Launch the browser (again, if it crashed or was closed)"""
+        async with self._start_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            if self._playwright is None:
+                from playwright.async_api import async_playwright
+                self._playwright = await async_playwright().start()
+            args = ['--disable-dev-shm-usage']
+            if self.no_sandbox:
+                args += ['--no-sandbox', '--disable-setuid-sandbox']
+            self._browser = await self._playwright.chromium.launch(headless=self.headless, args=args)
+            # Contexts belonged to the old browser process
+            self._contexts.clear()
+
+    async def close(self):
+        for device in self._contexts.values():
+            await device.context.close()
+        self._contexts.clear()
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _device(self, host: str) -> DeviceContext:
+        if self._browser is None or not self._browser.is_connected():
+            await self.start()
+        device = self._contexts.get(host)
+        if device is None:
+            context = await self._browser.new_context()
+            context.set_default_timeout(self.timeout_ms)
+            await context.route('**/*', _block_heavy_resources)
+            device = DeviceContext(host, context)
+            self._contexts[host] = device
+        return device
+
+    async def _login(self, device: DeviceContext, username: str, password: str):
+        page = await device.context.new_page()
+        try:
+            await page.goto(f'{device.base}/UnitLogin.html', wait_until='domcontentloaded')
+            await page.evaluate(LOGIN_SCRIPT, {"u": username, "p": password})
+            # Land on UI to cement session
+            await page.goto(f'{device.base}/UnitMain.html', wait_until='domcontentloaded')
+        finally:
+            await page.close()
+        device.logged_in = True
+        device.logins += 1
+
+    async def _get_status(self, device: DeviceContext) -> str:
+        # The context's request client shares its cookies but skips page rendering
+        resp = await device.context.request.get(f'{device.base}/SiteStatus.xml')
+        return await resp.text()
+
+    async def fetch_xml(self, host: str, username: str, password: str) -> str:
+        """Fetch SiteStatus.xml through the device's context, logging in only when needed"""
+        device = await self._device(host)
+        async with device.lock:
+            if device.logged_in:
+                xml_text = await self._get_status(device)
+                if is_xml(xml_text):
+                    device.pulls += 1
+                    return xml_text
+                device.logged_in = False
+
+            await self._login(device, username, password)
+            xml_text = await self._get_status(device)
+            if not is_xml(xml_text):
+                device.logged_in = False
+                raise Exception("Failed to retrieve XML data - got HTML instead")
+            device.pulls += 1
+            return xml_text
+
+    def stats(self) -> dict:
+        return {host: {'logins': d.logins, 'pulls': d.pulls, 'loggedIn': d.logged_in}
+                for host, d in self._contexts.items()}
+
+
+async def _demo(host: str, username: str, password: str, repeat: int):
+    async with BrowserPool() as pool:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            xml_text = await pool.fetch_xml(host, username, password)
+            print(f'{len(xml_text):,} chars in {(time.perf_counter() - start) * 1000:.0f} ms')
+        print(pool.stats())
+
+
+if __name__ == '__main__':
+    import argparse
+    ap = argparse.ArgumentParser(description='Time repeated pulls through the browser pool')
+    ap.add_argument('--host', required=True)
+    ap.add_argument('--user', required=True)
+    ap.add_argument('--pass', dest='password', required=True)
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+    asyncio.run(_demo(args.host, args.user, args.password, args.repeat))
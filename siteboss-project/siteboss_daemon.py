@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+SiteBoss Daemon - pull, parse and push to the backend in one process
+Runs the SiteBossPoller over a device inventory and pushes every parsed
+snapshot to an HTTP endpoint in batches ([{tower_id, host, siteboss_data}, ...],
+the format the AI service's /ingest accepts) over one pooled keep-alive
+session. Failed batches are retried, then written to a bounded on-disk
+spool that is drained oldest-first once the endpoint is reachable again.
+
+Usage:
+    python siteboss_daemon.py --inventory devices.json --push-url http://localhost:8000/ingest
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from pathlib import Path
+import requests
+from requests.adapters import HTTPAdapter
+import serialization
+from siteboss_poller import SiteBossPoller, load_inventory
+from siteboss_archive import SiteBossArchive
+
+# _post() outcomes
+PUSH_OK = 'ok'
+PUSH_REJECTED = 'rejected'  # 4xx: the endpoint will never accept this batch
+PUSH_RETRY = 'retry'        # unreachable or failing: spool and try again later
+
+
+class BatchPusher:
+    """Batches items and POSTs them as JSON arrays, spooling to disk while the endpoint is down"""
+
+    def __init__(self, url: str, batch_size: int = 50, flush_interval: float = 2.0,
+                 spool_dir: str = 'siteboss_spool', spool_max_bytes: int = 100 * 1024 * 1024,
+                 retries: int = 3, timeout: float = 10, max_backoff: float = 300, headers: dict = None):
+        self.url = url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_dir = Path(spool_dir)
+        self.spool_max_bytes = spool_max_bytes
+        self.retries = retries
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.session.headers.update({'Content-Type': 'application/json', **(headers or {})})
+
+        self._queue = None
+        self._batch = []  # taken off the queue, not yet pushed or spooled
+        self._no_tower_hosts = set()
+        self._retry_at = 0.0
+        self._backoff = 0.0
+        self._spool_seq = itertools.count()
+
+        self.pushed = 0
+        self.batches = 0
+        self.failures = 0
+        self.rejected = 0
+        self.no_tower = 0
+        self.spooled = 0
+        self.dropped = 0
+        self.last_latency = None
+        self.last_error = None
+
+    def submit(self, item: dict):
+        """Queue one item for the next batch (call from the event loop)"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._queue.put_nowait(item)
+
+    def on_snapshot(self, device, snapshot: dict):
+        """SiteBossPoller callback; devices without a tower_id are skipped (/ingest would reject them)"""
+        if device.tower_id is None:
+            self.no_tower += 1
+            if device.host not in self._no_tower_hosts:
+                self._no_tower_hosts.add(device.host)
+                print(f"⚠️ {device.host} has no tower_id in the inventory, its snapshots are not pushed")
+            return
+        self.submit({'tower_id': device.tower_id, 'host': device.host, 'siteboss_data': snapshot})
+
+    # Sending
+
+    def _post(self, body: bytes) -> str:
+        """POST one batch with retries. Returns PUSH_OK, PUSH_REJECTED (4xx: drop the batch,
+        retrying can't help) or PUSH_RETRY (endpoint unreachable or failing)."""
+        delay = 0.5
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            try:
+                resp = self.session.post(self.url, data=body, timeout=self.timeout)
+                if resp.status_code < 400:
+                    self.last_latency = time.perf_counter() - start
+                    return PUSH_OK
+                self.last_error = f"HTTP {resp.status_code}"
+                if resp.status_code < 500 and resp.status_code != 429:
+                    print(f"⚠️ Batch rejected by {self.url} ({self.last_error}): {resp.text[:200]}")
+                    return PUSH_REJECTED
+            except requests.RequestException as e:
+                self.last_error = str(e)
+            if attempt < self.retries:
+                time.sleep(delay)
+                delay *= 2
+        self.failures += 1
+        return PUSH_RETRY
+
+    async def _send(self, batch: list):
+        body = serialization.dumps_bytes(batch)
+        if time.monotonic() < self._retry_at:
+            # Endpoint known to be down: don't stall live data on retries
+            self._spool(body, len(batch))
+            self._batch = []
+            return
+        status = await asyncio.to_thread(self._post, body)
+        # Answered or about to be spooled: no longer in flight
+        self._batch = []
+        if status != PUSH_RETRY:
+            # The endpoint answered, so it is up even if it refused this batch
+            if status == PUSH_OK:
+                self.pushed += len(batch)
+                self.batches += 1
+            else:
+                self.rejected += len(batch)
+            self._backoff = 0.0
+            await self._drain_spool()
+        else:
+            print(f"❌ Push to {self.url} failed ({self.last_error}), spooling {len(batch)} items")
+            self._spool(body, len(batch))
+            self._backoff = min(max(self._backoff * 2, self.flush_interval), self.max_backoff)
+            self._retry_at = time.monotonic() + self._backoff
+
+    # Spool
+
+    def _spool_files(self) -> list:
+        return sorted(self.spool_dir.glob('*.json')) if self.spool_dir.exists() else []
+
+    def _spool(self, body: bytes, count: int):
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spool_dir / f"{time.time_ns()}-{next(self._spool_seq):06d}-{count}.json"
+        path.write_bytes(body)
+        self.spooled += count
+        self._enforce_spool_limit()
+
+    def _enforce_spool_limit(self):
+        files = self._spool_files()
+        sizes = [f.stat().st_size for f in files]
+        total = sum(sizes)
+        for path, size in zip(files, sizes):
+            if total <= self.spool_max_bytes:
+                break
+            # Oldest data goes first when the spool is full
+            self.dropped += int(path.stem.rsplit('-', 1)[-1])
+            path.unlink()
+            total -= size
+
+    async def _drain_spool(self, max_files: int = 10):
+        """Re-send spooled batches oldest-first; a few per flush so live data keeps flowing"""
+        for path in self._spool_files()[:max_files]:
+            status = await asyncio.to_thread(self._post, path.read_bytes())
+            if status == PUSH_RETRY:
+                self._backoff = min(max(self._backoff * 2, self.flush_interval), self.max_backoff)
+                self._retry_at = time.monotonic() + self._backoff
+                return
+            count = int(path.stem.rsplit('-', 1)[-1])
+            self.spooled -= count
+            path.unlink()
+            if status == PUSH_OK:
+                self.pushed += count
+                self.batches += 1
+                print(f"📤 Re-sent {count} spooled items")
+            else:
+                self.rejected += count
+
+    # Loop
+
+    async def _next_batch(self) -> list:
+        # Collected in self._batch so a shutdown mid-batch can still spool it
+        batch = self._batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        """Flush batches until cancelled; whatever is still queued is pushed or spooled on the way out"""
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        # Spool left over from a previous run counts towards the backlog
+        self.spooled = sum(int(p.stem.rsplit('-', 1)[-1]) for p in self._spool_files())
+        try:
+            while True:
+                batch = await self._next_batch()
+                await self._send(batch)
+                if not self._queue.qsize() and self._spool_files() and time.monotonic() >= self._retry_at:
+                    await self._drain_spool()
+        finally:
+            if self._batch:
+                # Cancelled while collecting or pushing this batch: keep it for the next run
+                print(f"💾 Spooling {len(self._batch)} in-flight items on shutdown")
+                self._spool(serialization.dumps_bytes(self._batch), len(self._batch))
+                self._batch = []
+            leftover = []
+            while not self._queue.empty():
+                leftover.append(self._queue.get_nowait())
+            for start in range(0, len(leftover), self.batch_size):
+                await self._send(leftover[start:start + self.batch_size])
+
+    def stats(self) -> dict:
+        return {
+            'url': self.url,
+            'pushed': self.pushed,
+            'batches': self.batches,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'spooled': self.spooled,
+            'dropped': self.dropped,
+            'rejected': self.rejected,
+            'noTower': self.no_tower,
+            'failures': self.failures,
+            'lastLatencyMs': round(self.last_latency * 1000, 1) if self.last_latency is not None else None,
+            'lastError': self.last_error,
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"📤 {stats['pushed']} pushed in {stats['batches']} batches, {stats['queued']} queued, "
+              f"{stats['spooled']} spooled, {stats['dropped']} dropped, {stats['rejected']} rejected, "
+              f"last push {stats['lastLatencyMs']} ms")
+
+    def close(self):
+        self.session.close()
+
+
+async def _report_loop(poller: SiteBossPoller, pusher: BatchPusher, every: float, stats_file: str = None):
+    while True:
+        await asyncio.sleep(every)
+        if stats_file:
+            serialization.dump_file({'poller': poller.stats(), 'pusher': pusher.stats()}, stats_file, pretty=True)
+        poller.report()
+        pusher.report()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='SiteBoss Daemon - pull devices and push snapshots to the backend')
+    parser.add_argument('--inventory', required=True, help='Device inventory JSON file')
+    parser.add_argument('--push-url', required=True, help='Endpoint receiving JSON arrays of snapshots (e.g. http://localhost:8000/ingest)')
+    parser.add_argument('--batch-size', type=int, default=50, help='Max snapshots per POST')
+    parser.add_argument('--flush-interval', type=float, default=2.0, help='Max seconds a snapshot waits for its batch')
+    parser.add_argument('--spool-dir', default='siteboss_spool', help='Where batches wait while the endpoint is down')
+    parser.add_argument('--spool-max-mb', type=float, default=100, help='Spool size limit (oldest batches are dropped)')
+    parser.add_argument('--retries', type=int, default=3, help='Retries per batch before spooling')
+    parser.add_argument('--header', action='append', default=[], metavar='NAME:VALUE', help='Extra HTTP header (repeatable)')
+    parser.add_argument('--concurrency', type=int, default=20, help='Max simultaneous pulls')
+    parser.add_argument('--jitter', type=float, default=0.1, help='Random +/- fraction applied to intervals')
+    parser.add_argument('--max-backoff', type=float, default=900, help='Max seconds between retries of a failing device')
+    parser.add_argument('--output-dir', help='Also write per-device snapshots here')
+    parser.add_argument('--format', choices=['json', 'binary'], default='json', help='Per-device snapshot format for --output-dir')
+    parser.add_argument('--archive', metavar='DIR', help='Also append every pull to this time-series archive')
+    parser.add_argument('--skip-unchanged', action='store_true', help='Skip parse/push for payloads identical to the previous pull')
+    parser.add_argument('--report-every', type=float, default=30, help='Seconds between throughput reports')
+    parser.add_argument('--stats-file', help='Also write poller and pusher stats to this JSON file')
+    args = parser.parse_args()
+
+    headers = {name.strip(): value.strip() for name, value in (h.split(':', 1) for h in args.header)}
+    devices = load_inventory(args.inventory)
+    pusher = BatchPusher(args.push_url, args.batch_size, args.flush_interval, args.spool_dir,
+                         int(args.spool_max_mb * 1024 * 1024), args.retries, headers=headers)
+    poller = SiteBossPoller(devices, args.concurrency, args.jitter, args.max_backoff, args.output_dir,
+                            on_snapshot=pusher.on_snapshot, skip_unchanged=args.skip_unchanged,
+                            archive=SiteBossArchive(args.archive) if args.archive else None,
+                            output_format=args.format)
+    print(f"🚀 SiteBoss Daemon: {len(devices)} devices -> {args.push_url} (batches of {args.batch_size})")
+
+    push_task = asyncio.create_task(pusher.run())
+    report_task = asyncio.create_task(_report_loop(poller, pusher, args.report_every, args.stats_file))
+    try:
+        # Reports come from _report_loop so poller and pusher stats are printed together
+        await poller.run(report_every=None)
+    except asyncio.CancelledError:
+        pass
+    finally:
+        report_task.cancel()
+        push_task.cancel()
+        await asyncio.gather(push_task, return_exceptions=True)
+        pusher.close()
+        pusher.report()
+    return 0
+
+
+if __name__ == '__main__':
+    try:
+        exit(asyncio.run(main()))
+    except KeyboardInterrupt:
+        print("Exiting...")
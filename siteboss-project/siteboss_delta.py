@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+SiteBoss Delta - sensor-level patches between consecutive pulls
+Instead of a full snapshot per pull, a DeltaTracker emits only the sensors
+that were added, removed or changed (keyed by the sensor 'id'), plus the
+small unit/summary blocks. Every record carries a sequence number, and a
+full keyframe is emitted on the first pull and every N records so a
+consumer can (re)start from any keyframe.
+
+Delta streams are newline-delimited JSON: one record per line, and each
+keyframe starts a fresh file, so a stream never holds more than one
+keyframe interval. Replay a stream with DeltaReplayer or the CLI:
+
+    python siteboss_delta.py --stream siteboss_api_data.ndjson --out latest.json
+"""
+import argparse
+import os
+import serialization
+
+DEFAULT_KEYFRAME_EVERY = 60
+
+
+def diff_sensors(previous: dict, sensors: list):
+    """(added, removed ids, changed field patches) between an id->sensor map and a new sensor list"""
+    added = []
+    changed = []
+    seen = set()
+    for sensor in sensors:
+        sensor_id = sensor['id']
+        seen.add(sensor_id)
+        old = previous.get(sensor_id)
+        if old is None:
+            added.append(sensor)
+        elif old != sensor:
+            patch = {k: v for k, v in sensor.items() if old.get(k) != v}
+            patch['id'] = sensor_id
+            changed.append(patch)
+    removed = [sensor_id for sensor_id in previous if sensor_id not in seen]
+    return added, removed, changed
+
+
+class DeltaTracker:
+    """Turns a device's consecutive snapshots into keyframe/delta records"""
+
+    def __init__(self, keyframe_every: int = DEFAULT_KEYFRAME_EVERY):
+        self.keyframe_every = keyframe_every
+        self.seq = 0
+        self.since_keyframe = None
+        self._previous = None
+
+    def reset(self):
+        """Force the next record to be a keyframe"""
+        self._previous = None
+
+    def update(self, snapshot: dict) -> dict:
+        """Record a new snapshot and return the record describing it"""
+        self.seq += 1
+        keyframe = self._previous is None or self.since_keyframe + 1 >= self.keyframe_every
+        if keyframe:
+            record = {'type': 'keyframe', 'seq': self.seq, 'snapshot': snapshot}
+            self.since_keyframe = 0
+        else:
+            added, removed, changed = diff_sensors(self._previous, snapshot['sensors'])
+            record = {
+                'type': 'delta',
+                'seq': self.seq,
+                'baseSeq': self.seq - 1,
+                'unit': snapshot['unit'],
+                'summary': snapshot['summary'],
+                'added': added,
+                'removed': removed,
+                'changed': changed,
+            }
+            self.since_keyframe += 1
+        self._previous = {sensor['id']: sensor for sensor in snapshot['sensors']}
+        return record
+
+    def write(self, record: dict, path: str) -> int:
+        """Append a record to an NDJSON stream; a keyframe truncates the file first. Returns bytes written."""
+        payload = serialization.dumps_bytes(record) + b'\n'
+        with open(path, 'wb' if record['type'] == 'keyframe' else 'ab') as f:
+            f.write(payload)
+        return len(payload)
+
+    @classmethod
+    def from_stream(cls, path: str, keyframe_every: int = DEFAULT_KEYFRAME_EVERY) -> 'DeltaTracker':
+        """Resume a tracker from an existing stream (e.g. between one-shot CLI runs)"""
+        tracker = cls(keyframe_every)
+        if not os.path.exists(path):
+            return tracker
+        replayer = DeltaReplayer()
+        try:
+            replayer.apply_stream(path)
+        except ValueError as e:
+            print(f"⚠️ Delta stream {path} unusable ({e}), starting with a keyframe")
+            return tracker
+        if replayer.snapshot is not None:
+            tracker.seq = replayer.seq
+            tracker.since_keyframe = replayer.since_keyframe
+            tracker._previous = {sensor['id']: sensor for sensor in replayer.snapshot['sensors']}
+        return tracker
+
+
+def apply_delta(snapshot: dict, record: dict) -> dict:
+    """Return the snapshot that results from applying one record to snapshot.
+    Sensors keep their previous order; added sensors are appended."""
+    if record['type'] == 'keyframe':
+        return record['snapshot']
+    removed = set(record['removed'])
+    patches = {patch['id']: patch for patch in record['changed']}
+    sensors = []
+    for sensor in snapshot['sensors']:
+        sensor_id = sensor['id']
+        if sensor_id in removed:
+            continue
+        patch = patches.get(sensor_id)
+        sensors.append({**sensor, **patch} if patch else sensor)
+    sensors.extend(record['added'])
+    return {'unit': record['unit'], 'sensors': sensors, 'summary': record['summary']}
+
+
+class DeltaReplayer:
+    """Consumer side: applies a record stream and checks sequence continuity"""
+
+    def __init__(self):
+        self.snapshot = None
+        self.seq = None
+        self.since_keyframe = None
+
+    def apply(self, record: dict) -> dict:
+        if record['type'] == 'keyframe':
+            self.since_keyframe = 0
+        else:
+            if self.snapshot is None:
+                raise ValueError(f"delta seq {record['seq']} received before any keyframe")
+            if record['baseSeq'] != self.seq:
+                raise ValueError(f"sequence gap: have {self.seq}, delta is based on {record['baseSeq']}")
+            self.since_keyframe += 1
+        self.snapshot = apply_delta(self.snapshot, record)
+        self.seq = record['seq']
+        return self.snapshot
+
+    def apply_stream(self, path: str) -> dict:
+        """Apply every record in an NDJSON stream file"""
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    self.apply(serialization.loads(line))
+        return self.snapshot
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Replay a SiteBoss delta stream into a full snapshot')
+    ap.add_argument('--stream', required=True, help='NDJSON delta stream (written with --delta)')
+    ap.add_argument('--out', default='siteboss_replayed.json', help='Output JSON filename')
+    ap.add_argument('--pretty', action='store_true', help='Indent the JSON output (default: compact)')
+    args = ap.parse_args()
+
+    replayer = DeltaReplayer()
+    snapshot = replayer.apply_stream(args.stream)
+    if snapshot is None:
+        print(f"❌ No records in {args.stream}")
+        return 1
+    serialization.dump_file(snapshot, args.out, pretty=args.pretty)
+    print(f"✅ Replayed to seq {replayer.seq} ({len(snapshot['sensors'])} sensors) -> {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+SiteBoss XML parser - SiteStatus.xml -> JSON conversion
+Shared by siteboss_api.py, siteboss_api_debug.py and xml_to_json.py.
+Device responses are already in memory, so they are parsed into a tree
+in one C-level pass and walked once. Files are stream-parsed instead:
+each Sensor is converted as soon as its closing tag is parsed and cleared
+right away, so memory stays flat however many sensors a dump holds.
+Either way every field is read in a single pass over the element's
+children instead of one findtext() per field. Only xml.etree is used:
+lxml parses faster, but creating its Python element proxies cost more
+than that saved here (see benchmarks/bench_xml_parser.py).
+"""
+import hashlib
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from functools import lru_cache
+from siteboss_values import decode_sensor
+
+# Define which sensors are considered "working" by status strings mapping
+WORKING_STATUS = {
+    'Contact Closure': {'Active', 'Inactive'},
+    'Temperature': {'Normal'},
+    'Analog': {'Normal'},
+    'Output': {'Active', 'Inactive'},
+}
+
+IGNORED_NAMES = {'unnamed'}
+
+# Filters and classification compiled once at import (edit the tables above before importing consumers)
+_ALLOWED_STATUS = frozenset((s_type, status) for s_type, statuses in WORKING_STATUS.items() for status in statuses)
+_FILTERED_TYPES = frozenset(WORKING_STATUS)
+_IGNORED_NAMES = frozenset(IGNORED_NAMES)
+_ALERT_WORDS = re.compile(r'door|alarm|smoke|motion|flood')
+
+# Top-level unit fields reported by the device
+UNIT_TAGS = (
+    'Unit_Sitename', 'Unit_Answer', 'Unit_Product', 'Unit_Serial', 'Unit_Version', 'Unit_Build',
+    'Unit_Hardware', 'Unit_Type', 'Unit_Latitude', 'Unit_Longitude', 'Unit_Date', 'Unit_Time', 'Unit_Uptime',
+)
+_UNIT_TAGS = frozenset(UNIT_TAGS)
+
+# Unit clock fields that change on every pull even when no sensor did
+VOLATILE_TAGS = ('Unit_Date', 'Unit_Time', 'Unit_Uptime')
+_VOLATILE_STR = re.compile(r'<(%s)>[^<]*</\1>' % '|'.join(VOLATILE_TAGS))
+_VOLATILE_BYTES = re.compile(_VOLATILE_STR.pattern.encode())
+
+
+def payload_fingerprint(xml_text) -> str:
+    """Content hash of a raw SiteStatus.xml payload (str or bytes), ignoring the unit clock fields.
+    Equal fingerprints mean the parsed snapshot would be identical apart from its timestamps."""
+    if isinstance(xml_text, str):
+        stripped = _VOLATILE_STR.sub('', xml_text).encode('utf-8')
+    else:
+        stripped = _VOLATILE_BYTES.sub(b'', xml_text)
+    return hashlib.blake2b(stripped, digest_size=16).hexdigest()
+
+
+def iter_events_from_file(path: str):
+    """Stream-parse an XML file, yielding (event, element) on each closing tag"""
+    return ET.iterparse(path, events=('end',))
+
+
+def _child_texts(elem) -> dict:
+    """First text of each direct child, like findtext() but in one pass"""
+    # Walk backwards so the first occurrence of a repeated tag wins
+    return {child.tag: child.text for child in reversed(elem)}
+
+
+def parse_tree(xml_text):
+    """Root element of an in-memory document (str or bytes), parsed in one pass"""
+    return ET.fromstring(xml_text)
+
+
+def iter_sensors_tree(root, unit_fields: dict):
+    """Same rows as iter_sensors(), from an already parsed document (see parse_tree())"""
+    for child in root:
+        tag = child.tag
+        if tag == 'EventSensor':
+            es_name_el = child.find('ES_Name')
+            es_name = es_name_el.text if es_name_el is not None else None
+            es_state = (child.findtext('ES_State') or '').strip()
+            for sensor in child:
+                if sensor.tag == 'Sensor':
+                    yield es_name, es_state, _child_texts(sensor)
+        elif tag in _UNIT_TAGS:
+            unit_fields.setdefault(tag, child.text)
+
+
+def iter_sensors(events, unit_fields: dict):
+    """Yield (es_name, es_state, sensor_fields) for every Sensor in document order.
+
+    Top-level Unit_* fields are collected into unit_fields along the way.
+    Processed elements are cleared so the tree never grows.
+    """
+    pending = []
+
+    for _, elem in events:
+        tag = elem.tag
+        if tag == 'Sensor':
+            pending.append(_child_texts(elem))
+            elem.clear()
+        elif tag == 'EventSensor':
+            # ES_Name/ES_State are known once the group closes, wherever they appear in it
+            es_name_el = elem.find('ES_Name')
+            es_name = es_name_el.text if es_name_el is not None else None
+            es_state = (elem.findtext('ES_State') or '').strip()
+            for sensor_fields in pending:
+                yield es_name, es_state, sensor_fields
+            pending = []
+            elem.clear()
+        elif tag in _UNIT_TAGS:
+            unit_fields.setdefault(tag, elem.text)
+
+
+@lru_cache(maxsize=8192)
+def classify_name(s_name: str):
+    """(ignored, contact closure alert level when Active) for a sensor name, cached per name"""
+    name_lower = s_name.lower()
+    if name_lower in _IGNORED_NAMES:
+        return True, "normal"
+    if _ALERT_WORDS.search(name_lower):
+        return False, "warning" if 'door' in name_lower else "critical"
+    return False, "normal"
+
+
+def keep_sensor(s_type: str, s_name: str, status_str: str, enabled: str) -> bool:
+    """Apply the unnamed/disabled/working-status filters"""
+    # Skip unnamed or disabled sensors
+    if classify_name(s_name)[0]:
+        return False
+    if enabled.upper() == 'OFF':
+        return False
+    # Keep only if status is in working set for that type
+    if s_type in _FILTERED_TYPES and (s_type, status_str) not in _ALLOWED_STATUS:
+        return False
+    return True
+
+
+def alert_level_for(s_type: str, s_name: str, status_str: str) -> str:
+    """Determine alert status"""
+    if status_str == 'Active' and s_type == 'Contact Closure':
+        # For contact closures, Active might be an alert depending on sensor
+        return classify_name(s_name)[1]
+    return "normal"
+
+
+def sensor_id(es_name, s_type: str, s_name: str, s_number: str) -> str:
+    """Unique ID combining group, type, name, and number"""
+    return f"{es_name}_{s_type}_{s_name}_{s_number}".replace(' ', '_').replace('-', '_')
+
+
+def build_snapshot(events=None, unit_fields: dict = None, sensor_rows=None) -> dict:
+    """Build the siteboss_api JSON snapshot from a parse event stream (or pre-walked sensor rows)"""
+    last_updated = datetime.now().isoformat()
+    if sensor_rows is None:
+        unit_fields = {}
+        sensor_rows = iter_sensors(events, unit_fields)
+    sensors = []
+    sensor_stats = {}
+    alert_counts = {'normal': 0, 'warning': 0, 'critical': 0}
+    decode_failures = 0
+
+    for es_name, es_state, f in sensor_rows:
+        get = f.get
+        s_type = (get('Sensor_Type') or '').strip()
+        s_name = (get('Sensor_Name') or '').strip()
+        status_str = (get('Sensor_Status_String') or '').strip()
+        enabled = (get('Sensor_Enabled') or '').strip().upper()
+        if not keep_sensor(s_type, s_name, status_str, enabled):
+            continue
+        alert_level = alert_level_for(s_type, s_name, status_str)
+        value_str = (get('Sensor_Value_String') or '').strip()
+
+        # Additional sensor details
+        s_number = get('Sensor_Number') or ''
+        s_value = get('Sensor_Value') or ''
+        s_units = get('Sensor_Units') or ''
+        # Typed value, decoded once here so consumers never reparse display strings
+        numeric_value, unit, failed = decode_sensor(s_type, value_str, get('Sensor_Value_Number'), s_units)
+        decode_failures += failed
+
+        # Create unique ID by combining group, type, name, and number
+        unique_id = sensor_id(es_name, s_type, s_name, s_number)
+        if not unique_id or unique_id == "None_None_None_":
+            unique_id = f"{es_name}_{s_type}_{len(sensors)}"
+
+        sensors.append({
+            'id': unique_id,
+            'group': es_name,
+            'groupState': es_state,
+            'type': s_type,
+            'name': s_name,
+            'number': s_number,
+            'status': status_str,
+            'value': value_str,
+            'rawValue': s_value,
+            'units': s_units,
+            'numericValue': numeric_value,
+            'unit': unit,
+            'enabled': enabled == 'ON',
+            'alertLevel': alert_level
+        })
+        sensor_stats[s_type] = sensor_stats.get(s_type, 0) + 1
+        alert_counts[alert_level] += 1
+
+    text = unit_fields.get
+    latitude = text('Unit_Latitude')
+    longitude = text('Unit_Longitude')
+    unit = {
+        'siteName': text('Unit_Sitename'),
+        'serial': text('Unit_Serial'),
+        'version': text('Unit_Version'),
+        'build': text('Unit_Build'),
+        'hardware': text('Unit_Hardware'),
+        'timestamp': {
+            'date': text('Unit_Date'),
+            'time': text('Unit_Time'),
+            'lastUpdated': last_updated
+        },
+        'location': {
+            'latitude': float(latitude) if latitude else None,
+            'longitude': float(longitude) if longitude else None,
+        },
+        'uptime': text('Unit_Uptime')
+    }
+
+    return {
+        'unit': unit,
+        'sensors': sensors,
+        'summary': {
+            'totalSensors': len(sensors),
+            'sensorsByType': sensor_stats,
+            'alertCounts': alert_counts,
+            'valueDecodeFailures': decode_failures,
+            'lastPull': datetime.now().isoformat()
+        }
+    }
+
+
+def parse_xml_to_json(xml_text) -> dict:
+    """Convert SiteStatus.xml text to the filtered JSON snapshot"""
+    unit_fields = {}
+    root = parse_tree(xml_text)
+    return build_snapshot(unit_fields=unit_fields, sensor_rows=iter_sensors_tree(root, unit_fields))
+
+
+def parse_xml_file_to_json(path: str) -> dict:
+    """Convert a SiteStatus.xml file to the filtered JSON snapshot without loading it whole"""
+    return build_snapshot(iter_events_from_file(path))
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+SiteBoss Poller - pulls a whole fleet of SiteBoss devices from one process
+Reads a device inventory, pulls every device concurrently on asyncio with a
+concurrency limit, per-device intervals with jitter and exponential back-off
+on errors, and reports pulls/s and per-device latency.
+"""
+import asyncio
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import serialization
+from siteboss_http import SiteBossHttpSession
+from siteboss_parser import parse_xml_to_json, payload_fingerprint
+from siteboss_values import decode_failures
+from siteboss_delta import DeltaTracker, DEFAULT_KEYFRAME_EVERY
+from siteboss_archive import SiteBossArchive, archive_key
+from siteboss_snapshot import write_snapshot
+
+DEFAULT_INTERVAL = 60
+
+
+class Device:
+    """One inventory entry plus its polling state"""
+
+    def __init__(self, host: str, username: str, password: str, tower_id=None,
+                 interval: float = DEFAULT_INTERVAL, mode: str = 'http', output: str = None):
+        self.host = host
+        self.username = username
+        self.password = password
+        self.tower_id = tower_id
+        self.interval = interval
+        self.mode = mode
+        self.output = output
+        self.http = None
+        self.delta = None
+        self.last_delta = None
+
+        self.fingerprint = None
+
+        self.pulls = 0
+        self.skipped = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.last_error = None
+        self.last_latency = None
+        self.avg_latency = None
+        self.last_success = None
+        self.last_changed = None
+
+    @property
+    def name(self) -> str:
+        return str(self.tower_id) if self.tower_id is not None else self.host
+
+    def record_latency(self, seconds: float):
+        self.last_latency = seconds
+        # Exponentially weighted so the average follows the device's current behaviour
+        self.avg_latency = seconds if self.avg_latency is None else 0.8 * self.avg_latency + 0.2 * seconds
+
+    def stats(self) -> dict:
+        return {
+            'host': self.host,
+            'towerId': self.tower_id,
+            'pulls': self.pulls,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'consecutiveFailures': self.consecutive_failures,
+            'lastLatencyMs': round(self.last_latency * 1000, 1) if self.last_latency is not None else None,
+            'avgLatencyMs': round(self.avg_latency * 1000, 1) if self.avg_latency is not None else None,
+            'lastSuccess': self.last_success,
+            'lastChanged': self.last_changed,
+            'lastError': self.last_error,
+        }
+
+
+def load_inventory(path: str) -> list:
+    """Load devices from a JSON inventory: a list of devices, or {"defaults": {...}, "devices": [...]}"""
+    data = serialization.load_file(path)
+    defaults = {}
+    if isinstance(data, dict):
+        defaults = data.get('defaults', {})
+        entries = data.get('devices', [])
+    else:
+        entries = data
+
+    devices = []
+    for entry in entries:
+        merged = {**defaults, **entry}
+        devices.append(Device(
+            host=merged['host'],
+            username=merged.get('username') or merged.get('user'),
+            password=merged.get('password') or merged.get('pass'),
+            tower_id=merged.get('tower_id', merged.get('towerId')),
+            interval=float(merged.get('interval', DEFAULT_INTERVAL)),
+            mode=merged.get('mode', 'http'),
+            output=merged.get('output'),
+        ))
+    return devices
+
+
+class SiteBossPoller:
+    """Concurrent scheduler for many SiteBoss devices"""
+
+    def __init__(self, devices: list, concurrency: int = 20, jitter: float = 0.1,
+                 max_backoff: float = 900, output_dir: str = None, on_snapshot=None, browser_pool=None,
+                 keyframe_every: int = None, skip_unchanged: bool = False, archive: SiteBossArchive = None,
+                 output_format: str = 'json'):
+        self.devices = devices
+        self.concurrency = concurrency
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.output_dir = Path(output_dir) if output_dir else None
+        # Optional callback(device, snapshot) for every successful pull; may be a coroutine function.
+        # In delta mode device.last_delta holds the record for the same pull.
+        self.on_snapshot = on_snapshot
+        self.browser_pool = browser_pool
+        # Delta mode: output files become per-device NDJSON delta streams (see siteboss_delta.py)
+        self.keyframe_every = keyframe_every
+        # Skip parsing/output when the payload matches the device's previous pull (unit clock ignored)
+        self.skip_unchanged = skip_unchanged
+        self.archive = archive
+        # 'json' or 'binary' (memory-mappable .sbs snapshots, see siteboss_snapshot.py)
+        self.output_format = output_format
+
+        self._semaphore = None
+        self._started = None
+        self._window_start = None
+        self._window_pulls = 0
+        self.total_pulls = 0
+        self.total_errors = 0
+        self.total_skipped = 0
+
+    def _next_delay(self, device: Device) -> float:
+        if device.consecutive_failures:
+            # Exponential back-off on repeated errors, capped
+            delay = min(device.interval * (2 ** device.consecutive_failures), self.max_backoff)
+        else:
+            delay = device.interval
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def _fetch(self, device: Device) -> str:
+        if device.mode == 'browser':
+            if self.browser_pool is None:
+                from siteboss_browser_pool import BrowserPool
+                self.browser_pool = BrowserPool()
+            return await self.browser_pool.fetch_xml(device.host, device.username, device.password)
+        if device.http is None:
+            device.http = SiteBossHttpSession(device.host, device.username, device.password)
+        return await asyncio.to_thread(device.http.fetch_xml)
+
+    def _parse(self, device: Device, xml_text: str):
+        """(fingerprint, snapshot); snapshot is None when skip_unchanged finds nothing new"""
+        if not self.skip_unchanged:
+            return None, parse_xml_to_json(xml_text)
+        fingerprint = payload_fingerprint(xml_text)
+        if fingerprint == device.fingerprint:
+            return fingerprint, None
+        return fingerprint, parse_xml_to_json(xml_text)
+
+    def _record_error(self, device: Device, error: Exception):
+        """Count a failed pull; the device backs off until one succeeds"""
+        device.errors += 1
+        device.consecutive_failures += 1
+        device.last_error = str(error)
+        self.total_errors += 1
+        print(f"❌ {device.name} ({device.host}): {error}")
+
+    async def pull_once(self, device: Device):
+        """Pull, parse and hand off one snapshot; errors (output and callback included) are recorded
+        on the device. Returns None when the pull failed or the payload was unchanged."""
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                xml_text = await self._fetch(device)
+                fingerprint, snapshot = await asyncio.to_thread(self._parse, device, xml_text)
+            except Exception as e:
+                self._record_error(device, e)
+                return None
+            device.record_latency(time.perf_counter() - start)
+
+        pulled_at = time.time()
+        if snapshot is not None:
+            try:
+                await self._hand_off(device, fingerprint, snapshot, pulled_at)
+            except Exception as e:
+                if device.delta is not None:
+                    # The record was not written: restart the stream so readers never see a gap
+                    device.delta.reset()
+                self._record_error(device, e)
+                return None
+            device.last_changed = pulled_at
+
+        device.pulls += 1
+        device.consecutive_failures = 0
+        device.last_error = None
+        device.last_success = pulled_at
+        self.total_pulls += 1
+        self._window_pulls += 1
+        if snapshot is None:
+            # Unchanged: last_success above is the heartbeat, nothing else to do
+            device.skipped += 1
+            self.total_skipped += 1
+        return snapshot
+
+    async def _hand_off(self, device: Device, fingerprint, snapshot: dict, pulled_at: float):
+        """Write, archive and deliver one new snapshot"""
+        if self.keyframe_every:
+            stream = self.output_dir / (device.output or f'siteboss_{device.name}.ndjson') if self.output_dir else None
+            if device.delta is None:
+                # Resume an existing stream so sequence numbers continue across restarts
+                device.delta = (DeltaTracker.from_stream(str(stream), self.keyframe_every) if stream
+                                else DeltaTracker(self.keyframe_every))
+            device.last_delta = device.delta.update(snapshot)
+        if self.output_dir is not None:
+            if self.keyframe_every:
+                await asyncio.to_thread(device.delta.write, device.last_delta, str(stream))
+            elif self.output_format == 'binary':
+                out = self.output_dir / (device.output or f'siteboss_{device.name}.sbs')
+                await asyncio.to_thread(write_snapshot, snapshot, str(out))
+            else:
+                out = self.output_dir / (device.output or f'siteboss_{device.name}.json')
+                await asyncio.to_thread(serialization.dump_file, snapshot, str(out))
+        if self.archive is not None:
+            await asyncio.to_thread(self.archive.append, archive_key(device.tower_id, device.host), snapshot, pulled_at)
+        if self.on_snapshot is not None:
+            result = self.on_snapshot(device, snapshot)
+            if asyncio.iscoroutine(result):
+                await result
+        # Only remembered once every step succeeded, so a failed hand-off is retried next pull
+        device.fingerprint = fingerprint
+
+    async def _device_loop(self, device: Device):
+        # Spread the first pulls over one interval so devices don't fire together
+        await asyncio.sleep(random.uniform(0, device.interval * self.jitter * 2))
+        while True:
+            try:
+                await self.pull_once(device)
+            except Exception as e:
+                # A bug in one device's pull must not stop the others
+                self._record_error(device, e)
+            await asyncio.sleep(self._next_delay(device))
+
+    def stats(self) -> dict:
+        now = time.perf_counter()
+        elapsed = now - self._started if self._started else 0
+        window = now - self._window_start if self._window_start else 0
+        return {
+            'devices': len(self.devices),
+            'totalPulls': self.total_pulls,
+            'totalErrors': self.total_errors,
+            'totalSkipped': self.total_skipped,
+            'valueDecodeFailures': dict(decode_failures),
+            'pullsPerSecond': round(self._window_pulls / window, 2) if window else 0.0,
+            'avgPullsPerSecond': round(self.total_pulls / elapsed, 2) if elapsed else 0.0,
+            'perDevice': [d.stats() for d in self.devices],
+        }
+
+    def report(self):
+        stats = self.stats()
+        latencies = sorted((d for d in self.devices if d.avg_latency is not None),
+                           key=lambda d: d.avg_latency, reverse=True)
+        failing = sum(1 for d in self.devices if d.consecutive_failures)
+        print(f"📊 {stats['pullsPerSecond']} pulls/s (avg {stats['avgPullsPerSecond']}), "
+              f"{stats['totalPulls']} pulls ({stats['totalSkipped']} unchanged), {stats['totalErrors']} errors, {failing}/{len(self.devices)} devices failing")
+        for device in latencies[:5]:
+            print(f"   {device.name:<12} avg {device.avg_latency * 1000:7.0f} ms  last {device.last_latency * 1000:7.0f} ms")
+        self._window_start = time.perf_counter()
+        self._window_pulls = 0
+
+    async def _report_loop(self, every: float, stats_file: str = None):
+        while True:
+            await asyncio.sleep(every)
+            if stats_file:
+                serialization.dump_file(self.stats(), stats_file, pretty=True)
+            self.report()
+
+    async def run_once(self):
+        """Pull every device once (concurrently) and return"""
+        self._setup()
+        await asyncio.gather(*(self.pull_once(d) for d in self.devices), return_exceptions=True)
+        self.report()
+
+    async def run(self, report_every: float = 30, stats_file: str = None):
+        """Poll all devices until cancelled (report_every=None: no periodic report)"""
+        self._setup()
+        tasks = [asyncio.create_task(self._device_loop(d)) for d in self.devices]
+        if report_every:
+            tasks.append(asyncio.create_task(self._report_loop(report_every, stats_file)))
+        try:
+            # Each task keeps running whatever happens to the others
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await self.close()
+
+    async def close(self):
+        for device in self.devices:
+            if device.http is not None:
+                device.http.close()
+        if self.browser_pool is not None:
+            await self.browser_pool.close()
+
+    def _setup(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        # HTTP pulls run in threads; size the pool to the concurrency limit
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency))
+        if self.output_dir is not None:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._started = self._window_start = time.perf_counter()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='SiteBoss Poller - pull many devices concurrently')
+    parser.add_argument('--inventory', required=True, help='Device inventory JSON file')
+    parser.add_argument('--concurrency', type=int, default=20, help='Max simultaneous pulls')
+    parser.add_argument('--jitter', type=float, default=0.1, help='Random +/- fraction applied to intervals')
+    parser.add_argument('--max-backoff', type=float, default=900, help='Max seconds between retries of a failing device')
+    parser.add_argument('--output-dir', default='siteboss_output', help='Directory for per-device JSON snapshots')
+    parser.add_argument('--report-every', type=float, default=30, help='Seconds between throughput reports')
+    parser.add_argument('--stats-file', help='Also write full per-device stats to this JSON file')
+    parser.add_argument('--once', action='store_true', help='Pull every device once and exit')
+    parser.add_argument('--skip-unchanged', action='store_true', help='Skip parse/output for payloads identical to the previous pull')
+    parser.add_argument('--archive', metavar='DIR', help='Append every pull to this time-series archive')
+    parser.add_argument('--format', choices=['json', 'binary'], default='json', help='Per-device snapshot format')
+    parser.add_argument('--delta', action='store_true', help='Write per-device NDJSON delta streams instead of full snapshots')
+    parser.add_argument('--keyframe-every', type=int, default=DEFAULT_KEYFRAME_EVERY, help='Records between full keyframes in --delta mode')
+    args = parser.parse_args()
+
+    devices = load_inventory(args.inventory)
+    print(f"🚀 SiteBoss Poller: {len(devices)} devices, concurrency {args.concurrency}")
+    poller = SiteBossPoller(devices, args.concurrency, args.jitter, args.max_backoff, args.output_dir,
+                            keyframe_every=args.keyframe_every if args.delta else None,
+                            skip_unchanged=args.skip_unchanged,
+                            archive=SiteBossArchive(args.archive) if args.archive else None,
+                            output_format=args.format)
+
+    if args.once:
+        await poller.run_once()
+        await poller.close()
+        if args.stats_file:
+            serialization.dump_file(poller.stats(), args.stats_file, pretty=True)
+        return 0 if poller.total_errors == 0 else 1
+
+    try:
+        await poller.run(args.report_every, args.stats_file)
+    except asyncio.CancelledError:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    try:
+        exit(asyncio.run(main()))
+    except KeyboardInterrupt:
+        print("Exiting...")
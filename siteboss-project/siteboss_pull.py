@@ -2,9 +2,10 @@
 import asyncio
 import argparse
 from pathlib import Path
-from playwright.async_api import async_playwright
+from siteboss_http import pull_xml_data_http
 
 async def fetch_xml(host: str, username: str, password: str, out_file: str) -> int:
+    from playwright.async_api import async_playwright  # only needed for browser mode
     base = f'http://{host}'
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
@@ -40,14 +41,29 @@ async def fetch_xml(host: str, username: str, password: str, out_file: str) -> i
         await browser.close()
         return 0 if xml_text.strip().startswith('<?xml') else 1
 
+def fetch_xml_http(host: str, username: str, password: str, out_file: str) -> int:
+    try:
+        xml_text = pull_xml_data_http(host, username, password)
+    except Exception as e:
+        print('HTTP pull failed:', e)
+        return 1
+    Path(out_file).write_text(xml_text)
+    print('Saved XML ->', out_file)
+    return 0
+
 async def main_async():
-    ap = argparse.ArgumentParser(description='SiteBoss XML puller (Playwright)')
+    ap = argparse.ArgumentParser(description='SiteBoss XML puller (HTTP session, Playwright fallback)')
     ap.add_argument('--host', required=True)
     ap.add_argument('--user', required=True)
     ap.add_argument('--pass', dest='password', required=True)
     ap.add_argument('--out', default='SiteStatus.xml')
+    ap.add_argument('--mode', choices=['auto', 'http', 'browser'], default='auto')
     args = ap.parse_args()
-    rc = await fetch_xml(args.host, args.user, args.password, args.out)
+    rc = 1
+    if args.mode in ('auto', 'http'):
+        rc = await asyncio.to_thread(fetch_xml_http, args.host, args.user, args.password, args.out)
+    if rc != 0 and args.mode in ('auto', 'browser'):
+        rc = await fetch_xml(args.host, args.user, args.password, args.out)
     raise SystemExit(rc)
 
 if __name__ == '__main__':
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+SiteBoss Simulator - virtual SiteBoss 360 devices for offline load tests
+Each virtual device listens on its own port and serves the same pages the
+pullers use: UnitLogin.html, the /index.html?commit=login session flow,
+UnitMain.html and a generated SiteStatus.xml with a configurable number of
+EventSensor groups and sensors. Without a valid session SiteStatus.xml
+answers with the login page, exactly like the real device.
+
+Sensors change state between pulls (--change-rate), sessions expire after
+--session-ttl idle seconds, and every response can be delayed (--latency-ms)
+or fail (--fail-rate). --inventory-out writes a device inventory for
+siteboss_poller.py / siteboss_daemon.py pointing at the simulated fleet.
+
+Usage:
+    python siteboss_simulator.py --devices 200 --sensors 64 --inventory-out sim_devices.json
+    python siteboss_poller.py --inventory sim_devices.json
+"""
+import argparse
+import random
+import secrets
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import serialization
+
+LOGIN_PAGE = b"""<!DOCTYPE html>
+<html><head><title>SiteBoss Login</title></head>
+<body>
+<form id="login" method="post" action="/index.html?commit=login">
+<input type="text" name="username"><input type="password" name="password">
+<input type="submit" value="Log In">
+</form>
+</body></html>
+"""
+
+MAIN_PAGE = b"""<!DOCTYPE html>
+<html><head><title>SiteBoss 360</title></head>
+<body><div id="main">SiteBoss 360 - Unit Main</div></body></html>
+"""
+
+# (type, name, value choices, status choices) cycled through each EventSensor group
+SENSOR_KINDS = [
+    ('Contact Closure', 'Door Open - Front', ['Open', 'Closed'], ['Active', 'Inactive']),
+    ('Contact Closure', 'Smoke Alarm', ['Open', 'Closed'], ['Active', 'Inactive']),
+    ('Temperature', 'Temperature', None, ['Normal']),
+    ('Analog', 'Battery Voltage', None, ['Normal']),
+    ('Analog', 'Mains Frequency', None, ['Normal']),
+    ('Contact Closure', 'Flood', ['Open', 'Closed'], ['Active', 'Inactive']),
+    ('Output', 'Relay', ['Inactive/De-energized', 'Active/Energized'], ['Active', 'Inactive']),
+    ('Analog', 'Rectifier Load', None, ['Normal']),
+]
+
+# Numeric sensors: (start, step, low, high, format)
+ANALOG_RANGES = {
+    'Temperature': (22.0, 1.0, 10.0, 45.0, '{:.0f} C'),
+    'Battery Voltage': (53.5, 0.2, 46.0, 56.0, '{:.1f} Volts'),
+    'Mains Frequency': (50.0, 0.1, 49.5, 50.5, '{:.1f} Hz'),
+    'Rectifier Load': (316.4, 12.0, 0.0, 900.0, '{:.1f} W'),
+}
+
+
+class SimSensor:
+    """One simulated sensor and its cached <Sensor> XML fragment"""
+
+    def __init__(self, number: int, kind: tuple, rng: random.Random):
+        self.number = number
+        self.type, self.name, self.choices, self.statuses = kind
+        self.enabled = rng.random() > 0.05
+        if self.choices:
+            self.value = rng.choice(self.choices)
+            self.status = rng.choice(self.statuses)
+            self.level = None
+        else:
+            start, step, low, high, fmt = ANALOG_RANGES[self.name]
+            self.level = start + rng.uniform(-step, step)
+            self.status = self.statuses[0]
+            self.value = fmt.format(self.level)
+        self.xml = self._render()
+
+    def change(self, rng: random.Random):
+        if self.choices:
+            self.value = rng.choice([c for c in self.choices if c != self.value] or self.choices)
+            self.status = rng.choice(self.statuses)
+        else:
+            start, step, low, high, fmt = ANALOG_RANGES[self.name]
+            self.level = min(high, max(low, self.level + rng.uniform(-step, step)))
+            self.value = fmt.format(self.level)
+        self.xml = self._render()
+
+    def _render(self) -> str:
+        number = self.level if self.level is not None else (1 if self.value.startswith(('Closed', 'Active')) else 0)
+        return (
+            f'\t\t<Sensor>\n\t\t\t<Sensor_Number>{self.number}</Sensor_Number>\n'
+            f'\t\t\t<Sensor_Type>{self.type}</Sensor_Type>\n'
+            f'\t\t\t<Sensor_Name>{self.name} {self.number}</Sensor_Name>\n'
+            f'\t\t\t<Sensor_Enabled>{"ON" if self.enabled else "OFF"}</Sensor_Enabled>\n'
+            f'\t\t\t<Sensor_Value_String>{self.value}</Sensor_Value_String>\n'
+            f'\t\t\t<Sensor_Value_Number>{number:g}</Sensor_Value_Number>\n'
+            f'\t\t\t<Sensor_Status_String>{self.status}</Sensor_Status_String>\n'
+            f'\t\t\t<Sensor_Status_Value>{1 if self.status == "Active" else 0}</Sensor_Status_Value>\n'
+            f'\t\t</Sensor>\n'
+        )
+
+
+class VirtualDevice:
+    """State of one simulated SiteBoss: sensors, sessions and counters"""
+
+    def __init__(self, port: int, n_sensors: int = 64, sensors_per_group: int = 16, seed: int = 0,
+                 username: str = 'admin', password: str = 'password', session_ttl: float = 300,
+                 change_rate: float = 0.05, latency_ms: float = 0, latency_jitter_ms: float = 0,
+                 fail_rate: float = 0.0):
+        self.port = port
+        self.username = username
+        self.password = password
+        self.session_ttl = session_ttl
+        self.change_rate = change_rate
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.fail_rate = fail_rate
+        self.rng = random.Random(seed)
+        self.serial = f'360{seed:06d}'
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.sessions = {}
+
+        self.groups = []
+        for g in range((n_sensors + sensors_per_group - 1) // sensors_per_group):
+            count = min(sensors_per_group, n_sensors - g * sensors_per_group)
+            self.groups.append((200 + g, f'ES{g:03d}', [
+                SimSensor(i + 1, SENSOR_KINDS[i % len(SENSOR_KINDS)], self.rng) for i in range(count)
+            ]))
+        self.sensors = [sensor for _, _, sensors in self.groups for sensor in sensors]
+
+        self.requests = 0
+        self.logins = 0
+        self.failed_logins = 0
+        self.pulls = 0
+        self.expired = 0
+        self.errors = 0
+
+    # Sessions
+
+    def login(self, username: str, password: str):
+        """New session id, or None for bad credentials"""
+        with self.lock:
+            if username != self.username or password != self.password:
+                self.failed_logins += 1
+                return None
+            self.logins += 1
+            sid = secrets.token_hex(8)
+            self.sessions[sid] = time.monotonic() + self.session_ttl
+            return sid
+
+    def session_valid(self, sid) -> bool:
+        """Idle timeout: every authenticated request extends the session"""
+        with self.lock:
+            expires = self.sessions.get(sid)
+            if expires is None:
+                return False
+            now = time.monotonic()
+            if now >= expires:
+                del self.sessions[sid]
+                self.expired += 1
+                return False
+            self.sessions[sid] = now + self.session_ttl
+            return True
+
+    def expire_sessions(self):
+        """Drop every session (the next pull has to log in again)"""
+        with self.lock:
+            self.expired += len(self.sessions)
+            self.sessions.clear()
+
+    # Responses
+
+    def delay(self):
+        if self.latency_ms or self.latency_jitter_ms:
+            jitter = self.rng.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)
+            time.sleep(max(0.0, self.latency_ms + jitter) / 1000)
+
+    def should_fail(self) -> bool:
+        return self.fail_rate > 0 and self.rng.random() < self.fail_rate
+
+    def site_status_xml(self, advance: bool = True) -> bytes:
+        """Advance the sensors by one pull and render SiteStatus.xml (advance=False renders the current state)"""
+        with self.lock:
+            if advance:
+                self.pulls += 1
+            if advance and self.change_rate > 0:
+                for sensor in self.sensors:
+                    if self.rng.random() < self.change_rate:
+                        sensor.change(self.rng)
+            now = datetime.now()
+            uptime = int(time.time() - self.started) + 760 * 86400
+            days, rest = divmod(uptime, 86400)
+            parts = [
+                '<?xml version="1.0" encoding="ISO-8859-1"?>\n<Unit>\n'
+                f'\t<Unit_Sitename>Simulated Site {self.port}</Unit_Sitename>\n'
+                '\t<Unit_Answer>SiteBoss</Unit_Answer>\n\t<Unit_Product>SiteBoss 360</Unit_Product>\n'
+                f'\t<Unit_Serial>{self.serial}</Unit_Serial>\n\t<Unit_Version>2.12.480</Unit_Version>\n'
+                '\t<Unit_Build>STD</Unit_Build>\n\t<Unit_Hardware>A44</Unit_Hardware>\n'
+                '\t<Unit_Type>SiteBoss</Unit_Type>\n'
+                '\t<Unit_Latitude>49.7020067663320</Unit_Latitude>\n'
+                '\t<Unit_Longitude>14.0053179478874</Unit_Longitude>\n'
+                f'\t<Unit_Date>{now:%m}&#x2f;{now:%d}&#x2f;{now:%y}</Unit_Date>\n'
+                f'\t<Unit_Time>{now:%H:%M:%S}</Unit_Time>\n'
+                f'\t<Unit_Uptime>{days}:{rest // 3600:02d}:{rest % 3600 // 60:02d}:{rest % 60:02d}</Unit_Uptime>\n'
+            ]
+            for number, name, sensors in self.groups:
+                parts.append(f'\t<EventSensor>\n\t\t<ES_Number>{number}</ES_Number>\n\t\t<ES_Name>{name}</ES_Name>\n'
+                             f'\t\t<ES_Configuration>16-CC, 3-VS, 2-RL</ES_Configuration>\n\t\t<ES_State>Alive</ES_State>\n')
+                parts.extend(sensor.xml for sensor in sensors)
+                parts.append('\t</EventSensor>\n')
+            parts.append('</Unit>\n')
+        return ''.join(parts).encode('iso-8859-1')
+
+    def stats(self) -> dict:
+        return {
+            'port': self.port,
+            'sensors': len(self.sensors),
+            'requests': self.requests,
+            'logins': self.logins,
+            'failedLogins': self.failed_logins,
+            'pulls': self.pulls,
+            'sessions': len(self.sessions),
+            'expired': self.expired,
+            'errors': self.errors,
+        }
+
+
+class SiteBossHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the device; the pullers reuse one connection per session
+    protocol_version = 'HTTP/1.1'
+    server_version = 'SiteBoss'
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            print(f"🌐 :{self.server.device.port} {fmt % args}")
+
+    def _send(self, status: int, body: bytes, content_type: str = 'text/html', headers: dict = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _session_id(self):
+        for part in (self.headers.get('Cookie') or '').split(';'):
+            name, _, value = part.strip().partition('=')
+            if name == 'sid':
+                return value
+        return None
+
+    def _begin(self) -> bool:
+        """Latency and failure injection common to every request; False if the request was failed"""
+        device = self.server.device
+        device.requests += 1
+        device.delay()
+        if device.should_fail():
+            device.errors += 1
+            self._send(503, b'Service Unavailable', 'text/plain')
+            return False
+        return True
+
+    def do_GET(self):
+        self._get()
+
+    def do_HEAD(self):
+        # Same headers as GET (_send() skips the body), but a HEAD is not a pull
+        self._get(advance=False)
+
+    def _get(self, advance: bool = True):
+        if not self._begin():
+            return
+        device = self.server.device
+        path = urlsplit(self.path).path
+        if path in ('/', '/UnitLogin.html', '/index.html'):
+            self._send(200, LOGIN_PAGE)
+        elif path == '/UnitMain.html':
+            self._send(200, MAIN_PAGE if device.session_valid(self._session_id()) else LOGIN_PAGE)
+        elif path == '/SiteStatus.xml':
+            if device.session_valid(self._session_id()):
+                self._send(200, device.site_status_xml(advance), 'text/xml; charset=ISO-8859-1')
+            else:
+                # An invalid session gets the login page, not an HTTP error
+                self._send(200, LOGIN_PAGE)
+        else:
+            self._send(404, b'Not Found', 'text/plain')
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8', 'replace') if length else ''
+        if not self._begin():
+            return
+        url = urlsplit(self.path)
+        if url.path != '/index.html' or parse_qs(url.query).get('commit') != ['login']:
+            self._send(404, b'Not Found', 'text/plain')
+            return
+        form = parse_qs(body)
+        sid = self.server.device.login(form.get('username', [''])[0], form.get('password', [''])[0])
+        if sid is None:
+            self._send(200, b'{"result":"failed"}', 'application/json')
+        else:
+            self._send(200, b'{"result":"ok"}', 'application/json', {'Set-Cookie': f'sid={sid}; Path=/'})
+
+
+class DeviceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple, device: VirtualDevice, verbose: bool = False):
+        self.device = device
+        self.verbose = verbose
+        super().__init__(address, SiteBossHandler)
+
+
+class SiteBossSimulator:
+    """Runs many virtual devices, one server thread per port"""
+
+    def __init__(self, devices: list, bind: str = '127.0.0.1', verbose: bool = False):
+        self.devices = devices
+        self.bind = bind
+        self.servers = [DeviceServer((bind, device.port), device, verbose) for device in devices]
+        self._threads = []
+
+    def start(self):
+        for server in self.servers:
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def inventory(self, host: str = None, interval: float = 60) -> dict:
+        """Device inventory (siteboss_poller.load_inventory format) for the simulated fleet"""
+        host = host or self.bind
+        first = self.devices[0] if self.devices else None
+        return {
+            'defaults': {
+                'username': first.username if first else 'admin',
+                'password': first.password if first else 'password',
+                'interval': interval,
+                'mode': 'http',
+            },
+            'devices': [{'host': f'{host}:{device.port}', 'tower_id': tower_id}
+                        for tower_id, device in enumerate(self.devices, 1)],
+        }
+
+    def stats(self) -> dict:
+        totals = {}
+        for device in self.devices:
+            for key, value in device.stats().items():
+                if key != 'port':
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def report(self):
+        stats = self.stats()
+        print(f"📊 {len(self.devices)} devices: {stats.get('pulls', 0)} pulls, {stats.get('logins', 0)} logins, "
+              f"{stats.get('expired', 0)} expired sessions, {stats.get('errors', 0)} injected errors, "
+              f"{stats.get('requests', 0)} requests")
+
+
+def main():
+    ap = argparse.ArgumentParser(description='SiteBoss Simulator - virtual SiteBoss 360 devices for offline testing')
+    ap.add_argument('--devices', type=int, default=1, help='Number of virtual devices')
+    ap.add_argument('--base-port', type=int, default=18081, help='Port of the first device (the rest follow)')
+    ap.add_argument('--bind', default='127.0.0.1', help='Address to listen on')
+    ap.add_argument('--sensors', type=int, default=64, help='Sensors per device')
+    ap.add_argument('--sensors-per-group', type=int, default=16, help='Sensors per EventSensor group')
+    ap.add_argument('--username', default='admin', help='Login username')
+    ap.add_argument('--password', default='password', help='Login password')
+    ap.add_argument('--session-ttl', type=float, default=300, help='Idle seconds before a session expires')
+    ap.add_argument('--expire-every', type=float, help='Also drop every session this often (seconds)')
+    ap.add_argument('--change-rate', type=float, default=0.05, help='Fraction of sensors that change per pull')
+    ap.add_argument('--latency-ms', type=float, default=0, help='Added delay per request')
+    ap.add_argument('--latency-jitter-ms', type=float, default=0, help='Random +/- delay per request')
+    ap.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    ap.add_argument('--seed', type=int, default=1, help='Seed for the first device (the rest follow)')
+    ap.add_argument('--inventory-out', help='Write a device inventory JSON for the simulated fleet')
+    ap.add_argument('--inventory-host', help='Host name to use in the inventory (default: --bind)')
+    ap.add_argument('--interval', type=float, default=60, help='Pull interval written to the inventory')
+    ap.add_argument('--report-every', type=float, default=30, help='Seconds between request reports')
+    ap.add_argument('--verbose', action='store_true', help='Log every request')
+    args = ap.parse_args()
+
+    devices = [
+        VirtualDevice(args.base_port + i, args.sensors, args.sensors_per_group, args.seed + i,
+                      args.username, args.password, args.session_ttl, args.change_rate,
+                      args.latency_ms, args.latency_jitter_ms, args.fail_rate)
+        for i in range(args.devices)
+    ]
+    simulator = SiteBossSimulator(devices, args.bind, args.verbose)
+    simulator.start()
+    print(f"🚀 SiteBoss Simulator: {len(devices)} devices with {args.sensors} sensors on "
+          f"{args.bind}:{args.base_port}-{args.base_port + len(devices) - 1}")
+
+    if args.inventory_out:
+        serialization.dump_file(simulator.inventory(args.inventory_host, args.interval), args.inventory_out, pretty=True)
+        print(f"💾 Inventory written to {args.inventory_out}")
+
+    next_report = time.monotonic() + args.report_every
+    next_expire = time.monotonic() + args.expire_every if args.expire_every else float('inf')
+    try:
+        while True:
+            time.sleep(max(0.0, min(next_report, next_expire) - time.monotonic()))
+            now = time.monotonic()
+            if now >= next_expire:
+                for device in devices:
+                    device.expire_sessions()
+                next_expire = now + args.expire_every
+            if now >= next_report:
+                simulator.report()
+                next_report = now + args.report_every
+    except KeyboardInterrupt:
+        print("Exiting...")
+    finally:
+        simulator.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
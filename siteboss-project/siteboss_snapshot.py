@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+SiteBoss binary snapshots - fixed-layout alternative to the JSON output
+A snapshot file is a fixed header, one fixed-width record per sensor
+(sorted by sensor id), a string table holding every distinct string once,
+and the small unit/summary block as JSON. SnapshotReader memory-maps the
+file and looks sensors up by id with a binary search over the records, so
+reading one sensor touches a few pages instead of parsing the whole file.
+
+Layout (little-endian):
+    header    magic 'SBS1', version, sensor count, string count, created (epoch s),
+              offsets of the records, string offsets, string data and meta JSON, meta length
+    records   RECORD per sensor: 11 string indices (id, group, groupState, type, name,
+              number, status, value, rawValue, units, unit), enabled, alert level, numericValue
+    strings   uint32 offsets (count + 1) into the UTF-8 string data
+    meta      {"unit": ..., "summary": ...} as JSON
+
+Usage:
+    python siteboss_snapshot.py siteboss_api_data.sbs --sensor <id>
+    python siteboss_snapshot.py siteboss_api_data.sbs --json siteboss_api_data.json
+"""
+import argparse
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+import serialization
+from siteboss_archive import sensor_value
+
+MAGIC = b'SBS1'
+VERSION = 2
+HEADER = struct.Struct('<4sHxxIId5I')
+RECORD = struct.Struct('<11IBBxxd')
+STRING_FIELDS = ('id', 'group', 'groupState', 'type', 'name', 'number', 'status', 'value', 'rawValue', 'units', 'unit')
+ALERT_LEVELS = ('normal', 'warning', 'critical')
+_ALERT_CODES = {level: code for code, level in enumerate(ALERT_LEVELS)}
+NO_STRING = 0xFFFFFFFF  # None (e.g. a group without ES_Name)
+
+
+def encode_snapshot(snapshot: dict) -> bytes:
+    """Serialize a parsed snapshot (siteboss_parser output) to the binary layout"""
+    strings = []
+    string_index = {}
+
+    def intern(text) -> int:
+        if text is None:
+            return NO_STRING
+        index = string_index.get(text)
+        if index is None:
+            index = string_index[text] = len(strings)
+            strings.append(text)
+        return index
+
+    records = []
+    for sensor in sorted(snapshot['sensors'], key=lambda s: s['id']):
+        records.append(RECORD.pack(
+            *(intern(sensor.get(field)) for field in STRING_FIELDS),
+            1 if sensor.get('enabled') else 0,
+            _ALERT_CODES.get(sensor.get('alertLevel'), 0),
+            sensor_value(sensor),
+        ))
+
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = array('I', [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    meta = serialization.dumps_bytes({'unit': snapshot.get('unit'), 'summary': snapshot.get('summary')})
+
+    records_offset = HEADER.size
+    offsets_offset = records_offset + RECORD.size * len(records)
+    data_offset = offsets_offset + 4 * len(offsets)
+    meta_offset = data_offset + offsets[-1]
+    if sys.byteorder == 'big':
+        offsets.byteswap()
+    header = HEADER.pack(MAGIC, VERSION, len(records), len(strings), time.time(),
+                         records_offset, offsets_offset, data_offset, meta_offset, len(meta))
+    return b''.join([header, *records, offsets.tobytes(), *encoded, meta])
+
+
+def write_snapshot(snapshot: dict, path: str) -> int:
+    """Write a binary snapshot atomically (open readers keep the previous version). Returns bytes written."""
+    payload = encode_snapshot(snapshot)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp, path)
+    return len(payload)
+
+
+class SnapshotReader:
+    """Memory-mapped random access to a binary snapshot"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._offsets = None
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size or self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a SiteBoss binary snapshot")
+        (magic, version, self.count, self.string_count, self.created, self._records,
+         offsets, self._data, self._meta, self._meta_length) = HEADER.unpack_from(self._map, 0)
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is snapshot format version {version}, expected {VERSION}")
+        view = memoryview(self._map)
+        self._offsets = view[offsets:offsets + 4 * (self.string_count + 1)].cast('I')
+        view.release()
+        if sys.byteorder == 'big':
+            self._offsets = array('I', self._offsets)
+            self._offsets.byteswap()
+
+    def string(self, index: int):
+        if index == NO_STRING:
+            return None
+        start = self._data + self._offsets[index]
+        return self._map[start:self._data + self._offsets[index + 1]].decode('utf-8')
+
+    def _record(self, position: int):
+        return RECORD.unpack_from(self._map, self._records + position * RECORD.size)
+
+    def _to_dict(self, record) -> dict:
+        sensor = {field: self.string(index) for field, index in zip(STRING_FIELDS, record)}
+        sensor['numericValue'] = None if math.isnan(record[13]) else record[13]
+        sensor['enabled'] = bool(record[11])
+        sensor['alertLevel'] = ALERT_LEVELS[record[12]]
+        return sensor
+
+    def _find(self, sensor_id: str):
+        """Binary search over the id-sorted records"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = self._record(mid)
+            current = self.string(record[0])
+            if current == sensor_id:
+                return record
+            if current < sensor_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def get(self, sensor_id: str):
+        """One sensor as a dict (same fields as the JSON snapshot), or None"""
+        record = self._find(sensor_id)
+        return self._to_dict(record) if record is not None else None
+
+    def value(self, sensor_id: str):
+        """Numeric value of one sensor without decoding its strings (None when absent or non-numeric)"""
+        record = self._find(sensor_id)
+        if record is None or math.isnan(record[13]):
+            return None
+        return record[13]
+
+    def ids(self) -> list:
+        return [self.string(self._record(i)[0]) for i in range(self.count)]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self):
+        for position in range(self.count):
+            yield self._to_dict(self._record(position))
+
+    def __contains__(self, sensor_id) -> bool:
+        return self._find(sensor_id) is not None
+
+    def meta(self) -> dict:
+        return serialization.loads(self._map[self._meta:self._meta + self._meta_length])
+
+    def to_snapshot(self) -> dict:
+        """The full snapshot dict (sensors in id order)"""
+        meta = self.meta()
+        return {'unit': meta['unit'], 'sensors': list(self), 'summary': meta['summary']}
+
+    def close(self):
+        if self._map is not None:
+            if isinstance(self._offsets, memoryview):
+                self._offsets.release()
+            self._offsets = None
+            self._map.close()
+            self._map = None
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def is_binary_snapshot(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def load_snapshot(path: str) -> dict:
+    """Load a snapshot file written in either format (JSON is decoded straight from a memory map)"""
+    if is_binary_snapshot(path):
+        with SnapshotReader(path) as reader:
+            return reader.to_snapshot()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            return serialization.loads(view)
+        finally:
+            view.release()
+
+
+def output_path(path: str, fmt: str) -> str:
+    """Swap a .json output name to .sbs for the binary format"""
+    if fmt == 'binary' and path.endswith('.json'):
+        return str(Path(path).with_suffix('.sbs'))
+    return path
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Inspect a SiteBoss binary snapshot')
+    ap.add_argument('snapshot', help='.sbs file')
+    ap.add_argument('--sensor', help='Print one sensor by id')
+    ap.add_argument('--json', dest='json_out', help='Convert to a JSON snapshot file')
+    ap.add_argument('--pretty', action='store_true', help='Indent the JSON output (default: compact)')
+    args = ap.parse_args()
+
+    with SnapshotReader(args.snapshot) as reader:
+        if args.sensor:
+            sensor = reader.get(args.sensor)
+            if sensor is None:
+                print(f"❌ No sensor {args.sensor}")
+                return 1
+            print(serialization.dumps(sensor, pretty=True))
+        elif args.json_out:
+            serialization.dump_file(reader.to_snapshot(), args.json_out, pretty=args.pretty)
+            print(f"✅ {len(reader)} sensors written to {args.json_out}")
+        else:
+            unit = reader.meta()['unit'] or {}
+            print(f"📦 {args.snapshot}: {len(reader)} sensors, {reader.string_count} strings, "
+                  f"site {unit.get('siteName')}, written {time.ctime(reader.created)}")
+            for sensor_id in reader.ids():
+                print(f"   {sensor_id}")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
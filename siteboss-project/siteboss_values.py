@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+SiteBoss typed values - decode display strings into numbers once, at parse time
+Sensor_Value_String is meant for people ("22 C", "50.0 Hz", "Open",
+"Inactive/De-energized"). decode_value() turns it into a number in a
+normalized unit using patterns compiled once per sensor type, falling
+back to the device's Sensor_Value_Number. Results are cached per distinct
+(type, string, number), since a fleet reports the same few strings
+over and over.
+
+Units are normalized to: celsius, percent, volts, amperes, hertz, watts,
+and 'state' for contact closures and outputs (1 = closed/active, 0 = open/inactive).
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+
+_NUMBER_WITH_UNIT = re.compile(r'^\s*([-+]?\d+(?:\.\d+)?)\s*(°\s*)?([A-Za-z%]+)?')
+
+UNIT_ALIASES = {
+    'c': 'celsius', 'degc': 'celsius', 'celsius': 'celsius',
+    'f': 'fahrenheit', 'degf': 'fahrenheit', 'fahrenheit': 'fahrenheit',
+    '%': 'percent', 'rh': 'percent', 'pct': 'percent',
+    'v': 'volts', 'vdc': 'volts', 'vac': 'volts', 'volts': 'volts',
+    'a': 'amperes', 'amps': 'amperes', 'ma': 'milliamperes',
+    'hz': 'hertz',
+    'w': 'watts', 'kw': 'kilowatts',
+}
+
+# Converted to the unit on the right (value * factor + offset)
+UNIT_CONVERSIONS = {
+    'fahrenheit': ('celsius', 5 / 9, -32 * 5 / 9),
+    'milliamperes': ('amperes', 0.001, 0.0),
+    'kilowatts': ('watts', 1000.0, 0.0),
+}
+
+# Two-state sensors: display string -> state
+STATE_WORDS = {
+    'closed': 1.0, 'open': 0.0,
+    'active': 1.0, 'inactive': 0.0,
+    'on': 1.0, 'off': 0.0,
+    'energized': 1.0, 'de-energized': 0.0,
+}
+STATE_TYPES = frozenset({'Contact Closure', 'Output'})
+
+# Failed decodes since start, by sensor type (a snapshot also carries its own count)
+decode_failures = Counter()
+
+
+def _normalize(number: float, unit_text):
+    unit = UNIT_ALIASES.get(unit_text.lower(), unit_text.lower()) if unit_text else None
+    if unit in UNIT_CONVERSIONS:
+        unit, factor, offset = UNIT_CONVERSIONS[unit]
+        number = number * factor + offset
+    return number, unit
+
+
+def _decode_state(value_str: str):
+    # "Inactive/De-energized" -> first word decides
+    word = value_str.split('/', 1)[0].strip().lower()
+    return STATE_WORDS.get(word)
+
+
+@lru_cache(maxsize=8192)
+def decode_value(s_type: str, value_str: str, value_number: str = None, units: str = None):
+    """(numericValue, unit) for one sensor reading; (None, None) when nothing numeric can be recovered"""
+    if s_type in STATE_TYPES:
+        state = _decode_state(value_str) if value_str else None
+        if state is not None:
+            return state, 'state'
+    elif value_str:
+        match = _NUMBER_WITH_UNIT.match(value_str)
+        if match:
+            return _normalize(float(match.group(1)), match.group(3) or units)
+    if value_number:
+        try:
+            return _normalize(float(value_number), units)
+        except ValueError:
+            pass
+    return None, None
+
+
+def decode_sensor(s_type: str, value_str: str, value_number: str = None, units: str = None):
+    """decode_value() plus failure accounting. Returns (numericValue, unit, failed)."""
+    number, unit = decode_value(s_type, value_str, value_number or None, units or None)
+    failed = number is None and bool(value_str or value_number)
+    if failed:
+        decode_failures[s_type] += 1
+    return number, unit, failed
@@ -0,0 +1,18 @@
+import copy
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT))
+
+import siteboss_parser  # noqa: E402
+
+_SNAPSHOT = siteboss_parser.parse_xml_file_to_json(str(PROJECT / 'siteboss_api_data.xml'))
+
+
+@pytest.fixture
+def snapshot():
+    """A parsed snapshot of the checked-in device dump (a fresh copy per test)"""
+    return copy.deepcopy(_SNAPSHOT)
@@ -0,0 +1,50 @@
+import pytest
+
+from siteboss_archive import SiteBossArchive, archive_key
+
+T0 = 1760000000  # 2025-10-09 08:53:20 UTC
+
+
+def test_append_and_query_round_trip(tmp_path, snapshot):
+    archive = SiteBossArchive(tmp_path)
+    sensor = next(s for s in snapshot['sensors'] if s['numericValue'])
+    assert archive.append(49, snapshot, T0) == len(snapshot['sensors'])
+    sensor['numericValue'] += 1
+    sensor['status'] = 'Alarm'
+    archive.append(49, snapshot, T0 + 60)
+
+    readings = archive.query(49, sensor['id'])
+    assert [r['t'] for r in readings] == [T0, T0 + 60]
+    assert [r['value'] for r in readings] == [sensor['numericValue'] - 1, sensor['numericValue']]
+    assert readings[1]['status'] == 'Alarm'
+    assert archive.query(49, sensor['id'], start=T0 + 1) == readings[1:]
+    assert archive.query(49, 'no such sensor') == []
+
+
+def test_query_is_unchanged_by_compaction(tmp_path, snapshot):
+    archive = SiteBossArchive(tmp_path)
+    for minute in range(5):
+        archive.append('49', snapshot, T0 + minute * 60)
+    before = {s['id']: archive.query('49', s['id']) for s in snapshot['sensors']}
+
+    day = next(iter(archive.partitions('49')))
+    archive.compact_day('49', day)
+
+    assert set(archive.partitions('49')[day]) == {'seg'}
+    assert {s['id']: archive.query('49', s['id']) for s in snapshot['sensors']} == before
+
+
+def test_missing_values_read_back_as_none(tmp_path, snapshot):
+    archive = SiteBossArchive(tmp_path)
+    sensor = snapshot['sensors'][0]
+    sensor['numericValue'] = None
+    archive.append(49, snapshot, T0)
+    assert archive.query(49, sensor['id'])[0]['value'] is None
+
+
+def test_archive_key_prefers_the_tower_id():
+    assert archive_key(49, '10.9.1.19:8080') == '49'
+    assert archive_key('49') == '49'
+    assert archive_key(None, '10.9.1.19:8080') == '10.9.1.19_8080'
+    with pytest.raises(ValueError):
+        archive_key()
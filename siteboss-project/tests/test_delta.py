@@ -0,0 +1,68 @@
+import copy
+
+import pytest
+
+from siteboss_delta import DeltaReplayer, DeltaTracker, apply_delta
+
+
+def next_pull(snapshot, new_id='NEW_1'):
+    """The same device one pull later: one sensor changed, one removed, one added"""
+    pull = copy.deepcopy(snapshot)
+    pull['sensors'][0]['status'] = 'Alarm'
+    del pull['sensors'][1]
+    pull['sensors'].append({**pull['sensors'][-1], 'id': new_id, 'name': 'New'})
+    pull['unit']['uptime'] = 'later'
+    return pull
+
+
+def test_delta_holds_only_the_differences(snapshot):
+    tracker = DeltaTracker()
+    assert tracker.update(snapshot)['type'] == 'keyframe'
+    pull = next_pull(snapshot)
+    record = tracker.update(pull)
+
+    assert record['type'] == 'delta'
+    assert record['baseSeq'] == 1 and record['seq'] == 2
+    assert record['removed'] == [snapshot['sensors'][1]['id']]
+    assert [s['id'] for s in record['added']] == ['NEW_1']
+    assert record['changed'] == [{'status': 'Alarm', 'id': snapshot['sensors'][0]['id']}]
+
+
+def test_apply_delta_rebuilds_the_next_snapshot(snapshot):
+    tracker = DeltaTracker()
+    tracker.update(snapshot)
+    pull = next_pull(snapshot)
+    assert apply_delta(snapshot, tracker.update(pull)) == pull
+
+
+def test_keyframe_every_n_records(snapshot):
+    tracker = DeltaTracker(keyframe_every=3)
+    types = [tracker.update(snapshot)['type'] for _ in range(7)]
+    assert types == ['keyframe', 'delta', 'delta', 'keyframe', 'delta', 'delta', 'keyframe']
+
+
+def test_stream_round_trip_and_resume(tmp_path, snapshot):
+    path = str(tmp_path / 'siteboss_49.ndjson')
+    tracker = DeltaTracker()
+    pulls = [snapshot, next_pull(snapshot)]
+    pulls.append(next_pull(pulls[-1], 'NEW_2'))
+    for pull in pulls:
+        tracker.write(tracker.update(pull), path)
+    assert DeltaReplayer().apply_stream(path) == pulls[-1]
+
+    resumed = DeltaTracker.from_stream(path)
+    assert resumed.seq == 3
+    assert resumed.update(pulls[-1])['type'] == 'delta'
+
+
+def test_replayer_rejects_gaps(snapshot):
+    tracker = DeltaTracker()
+    replayer = DeltaReplayer()
+    first = tracker.update(snapshot)
+    tracker.update(snapshot)
+    third = tracker.update(snapshot)
+    with pytest.raises(ValueError):
+        replayer.apply(third)
+    replayer.apply(first)
+    with pytest.raises(ValueError):
+        replayer.apply(third)
@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from siteboss_parser import payload_fingerprint
+
+XML = (Path(__file__).resolve().parent.parent / 'siteboss_api_data.xml').read_text(encoding='iso-8859-1')
+
+
+def test_clock_fields_are_ignored():
+    later = (XML.replace('<Unit_Time>09:57:53</Unit_Time>', '<Unit_Time>09:58:53</Unit_Time>')
+                .replace('<Unit_Uptime>761:19:45:51</Unit_Uptime>', '<Unit_Uptime>761:19:46:51</Unit_Uptime>')
+                .replace('<Unit_Date>10&#x2f;01&#x2f;25</Unit_Date>', '<Unit_Date>10&#x2f;02&#x2f;25</Unit_Date>'))
+    assert later != XML
+    assert payload_fingerprint(later) == payload_fingerprint(XML)
+
+
+def test_sensor_changes_change_the_fingerprint():
+    changed = XML.replace('<Sensor_Value_String>Open</Sensor_Value_String>',
+                          '<Sensor_Value_String>Closed</Sensor_Value_String>', 1)
+    assert changed != XML
+    assert payload_fingerprint(changed) != payload_fingerprint(XML)
+
+
+def test_str_and_bytes_agree():
+    assert payload_fingerprint(XML.encode('utf-8')) == payload_fingerprint(XML)
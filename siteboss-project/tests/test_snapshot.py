@@ -0,0 +1,54 @@
+import pytest
+
+from siteboss_snapshot import SnapshotReader, load_snapshot, write_snapshot
+import serialization
+
+
+def test_binary_round_trip(tmp_path, snapshot):
+    path = str(tmp_path / 'siteboss_49.sbs')
+    write_snapshot(snapshot, path)
+    with SnapshotReader(path) as reader:
+        restored = reader.to_snapshot()
+    assert restored['unit'] == snapshot['unit']
+    assert restored['summary'] == snapshot['summary']
+    assert restored['sensors'] == sorted(snapshot['sensors'], key=lambda s: s['id'])
+
+
+def test_lookup_by_id(tmp_path, snapshot):
+    path = str(tmp_path / 'siteboss_49.sbs')
+    write_snapshot(snapshot, path)
+    with SnapshotReader(path) as reader:
+        assert len(reader) == len(snapshot['sensors'])
+        for sensor in snapshot['sensors']:
+            assert sensor['id'] in reader
+            assert reader.get(sensor['id']) == sensor
+            assert reader.value(sensor['id']) == sensor['numericValue']
+        assert reader.get('no such sensor') is None
+        assert 'no such sensor' not in reader
+
+
+def test_none_strings_and_values_survive(tmp_path, snapshot):
+    sensor = snapshot['sensors'][0]
+    sensor['group'] = None
+    sensor['numericValue'] = None
+    path = str(tmp_path / 'siteboss_49.sbs')
+    write_snapshot(snapshot, path)
+    with SnapshotReader(path) as reader:
+        assert reader.get(sensor['id']) == sensor
+        assert reader.value(sensor['id']) is None
+
+
+def test_load_snapshot_reads_either_format(tmp_path, snapshot):
+    binary = str(tmp_path / 'siteboss_49.sbs')
+    text = str(tmp_path / 'siteboss_49.json')
+    write_snapshot(snapshot, binary)
+    serialization.dump_file(snapshot, text)
+    assert load_snapshot(text) == snapshot
+    assert load_snapshot(binary)['sensors'] == sorted(snapshot['sensors'], key=lambda s: s['id'])
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / 'siteboss_49.json'
+    path.write_text('{"sensors": []}')
+    with pytest.raises(ValueError):
+        SnapshotReader(str(path))
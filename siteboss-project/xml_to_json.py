@@ -1,27 +1,42 @@
 #!/usr/bin/env python3
 import argparse
-import json
-import xml.etree.ElementTree as ET
-
-# Define which sensors are considered "working" by status strings mapping
-WORKING_STATUS = {
-    'Contact Closure': {'Active', 'Inactive'},
-    'Temperature': {'Normal'},
-    'Analog': {'Normal'},
-    'Output': {'Active', 'Inactive'},
-}
-
-IGNORED_NAMES = {'unnamed'}
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import serialization
+import siteboss_parser
+from siteboss_parser import iter_events_from_file, iter_sensors, keep_sensor
+from siteboss_values import decode_sensor
 
 
 def parse_xml_to_filtered_json(xml_path: str) -> dict:
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
+    # Stream the file: each Sensor is filtered as it closes (see siteboss_parser.py)
+    unit_fields = {}
+    sensors = []
+    for es_name, _, f in iter_sensors(iter_events_from_file(xml_path), unit_fields):
+        s_type = (f.get('Sensor_Type') or '').strip()
+        s_name = (f.get('Sensor_Name') or '').strip()
+        status_str = (f.get('Sensor_Status_String') or '').strip()
+        enabled = (f.get('Sensor_Enabled') or '').strip()
+        if not keep_sensor(s_type, s_name, status_str, enabled):
+            continue
 
-    def text(tag):
-        el = root.find(tag)
-        return el.text if el is not None else None
+        value_str = (f.get('Sensor_Value_String') or '').strip()
+        numeric_value, unit, _ = decode_sensor(s_type, value_str, f.get('Sensor_Value_Number'), f.get('Sensor_Units'))
+        sensors.append({
+            'group': es_name,
+            'type': s_type,
+            'name': s_name,
+            'status': status_str,
+            'value': value_str,
+            'numericValue': numeric_value,
+            'unit': unit,
+        })
 
+    text = unit_fields.get
     unit = {
         'siteName': text('Unit_Sitename'),
         'serial': text('Unit_Serial'),
@@ -38,37 +53,6 @@ def parse_xml_to_filtered_json(xml_path: str) -> dict:
         },
     }
 
-    # Collect sensors grouped by EventSensor (ES)
-    sensors = []
-    for es in root.findall('EventSensor'):
-        es_name_el = es.find('ES_Name')
-        es_name = es_name_el.text if es_name_el is not None else None
-        for s in es.findall('Sensor'):
-            s_type = (s.findtext('Sensor_Type') or '').strip()
-            s_name = (s.findtext('Sensor_Name') or '').strip()
-            status_str = (s.findtext('Sensor_Status_String') or '').strip()
-            enabled = (s.findtext('Sensor_Enabled') or '').strip()
-            value_str = (s.findtext('Sensor_Value_String') or '').strip()
-
-            # Skip unnamed or disabled sensors
-            if s_name.lower() in IGNORED_NAMES:
-                continue
-            if enabled.upper() == 'OFF':
-                continue
-
-            # Keep only if status is in working set for that type (fallback: accept if non-empty)
-            allowed = WORKING_STATUS.get(s_type, None)
-            if allowed is not None and status_str not in allowed:
-                continue
-
-            sensors.append({
-                'group': es_name,
-                'type': s_type,
-                'name': s_name,
-                'status': status_str,
-                'value': value_str,
-            })
-
     return {
         'unit': unit,
         'sensors': sensors,
@@ -78,15 +62,138 @@ def parse_xml_to_filtered_json(xml_path: str) -> dict:
     }
 
 
+# Bulk mode: many saved dumps across a process pool
+
+def find_inputs(source: str) -> list:
+    """XML files under a directory (recursively) or matching a glob, sorted by name"""
+    if os.path.isdir(source):
+        return sorted(str(p) for p in Path(source).rglob('*.xml'))
+    return sorted(glob.glob(source, recursive=True))
+
+
+def unit_timestamp(unit: dict, path: str) -> float:
+    """Pull time from the device clock (Unit_Date MM/DD/YY + Unit_Time), else the file's mtime"""
+    date, clock = unit['timestamp'].get('date'), unit['timestamp'].get('time')
+    if date and clock:
+        try:
+            return datetime.strptime(f"{date} {clock}", '%m/%d/%y %H:%M:%S').timestamp()
+        except ValueError:
+            pass
+    return os.path.getmtime(path)
+
+
+def convert_for_ndjson(path: str):
+    """Worker: (input bytes, NDJSON line or None, error)"""
+    size = os.path.getsize(path)
+    try:
+        record = {'file': path, **parse_xml_to_filtered_json(path)}
+        return size, serialization.dumps_bytes(record) + b'\n', None
+    except Exception as e:
+        return size, None, f"{path}: {e}"
+
+
+def convert_for_archive(path: str):
+    """Worker: (input bytes, (timestamp, snapshot) or None, error)"""
+    size = os.path.getsize(path)
+    try:
+        snapshot = siteboss_parser.parse_xml_file_to_json(path)
+        return size, (unit_timestamp(snapshot['unit'], path), snapshot), None
+    except Exception as e:
+        return size, None, f"{path}: {e}"
+
+
+def bulk_convert(source: str, out_dir: str = None, archive_dir: str = None, batch_size: int = 1000,
+                 workers: int = None, chunksize: int = 16, tower_id=None) -> dict:
+    """Convert every dump under source to NDJSON batch files (out_dir) or into a SiteBossArchive (archive_dir).
+    Archived dumps are filed under tower_id, the key the poller and siteboss_api use for the same tower."""
+    files = find_inputs(source)
+    workers = workers or os.cpu_count() or 1
+    print(f"📂 {len(files)} files, {workers} workers, chunksize {chunksize}")
+
+    archive = None
+    if archive_dir:
+        from siteboss_archive import SiteBossArchive, archive_key
+        archive = SiteBossArchive(archive_dir)
+        device = archive_key(tower_id)
+    else:
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
+
+    converted = failed = total_bytes = batch_number = 0
+    batch = []
+    start = time.perf_counter()
+
+    def flush():
+        nonlocal batch, batch_number
+        if batch:
+            batch_number += 1
+            with open(Path(out_dir) / f"batch_{batch_number:05d}.ndjson", 'wb') as f:
+                f.writelines(batch)
+            batch = []
+
+    worker = convert_for_archive if archive is not None else convert_for_ndjson
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for size, result, error in pool.map(worker, files, chunksize=chunksize):
+            total_bytes += size
+            if error:
+                failed += 1
+                print(f"⚠️ {error}")
+                continue
+            converted += 1
+            if archive is not None:
+                timestamp, snapshot = result
+                archive.append(device, snapshot, timestamp)
+            else:
+                batch.append(result)
+                if len(batch) >= batch_size:
+                    flush()
+            if converted % 1000 == 0:
+                elapsed = time.perf_counter() - start
+                print(f"   {converted}/{len(files)} files ({converted / elapsed:.0f} files/s)")
+    if archive is None:
+        flush()
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        'files': len(files),
+        'converted': converted,
+        'failed': failed,
+        'batches': batch_number,
+        'seconds': round(elapsed, 2),
+        'filesPerSecond': round(converted / elapsed, 1) if elapsed else 0.0,
+        'mbPerSecond': round(total_bytes / (1024 * 1024) / elapsed, 2) if elapsed else 0.0,
+    }
+    print(f"✅ {converted} converted, {failed} failed in {stats['seconds']} s: "
+          f"{stats['filesPerSecond']} files/s, {stats['mbPerSecond']} MB/s")
+    return stats
+
+
 def main():
     ap = argparse.ArgumentParser(description='Convert SiteStatus.xml to filtered JSON')
-    ap.add_argument('--in', dest='input_xml', default='SiteStatus.xml')
-    ap.add_argument('--out', dest='output_json', default='siteboss_filtered.json')
+    ap.add_argument('--in', dest='input_xml', default='SiteStatus.xml',
+                    help='Input XML (with --bulk: a directory or glob of dumps)')
+    ap.add_argument('--out', dest='output_json', default='siteboss_filtered.json',
+                    help='Output JSON (with --bulk: directory for the NDJSON batch files)')
+    ap.add_argument('--pretty', action='store_true', help='Indent the JSON output (default: compact)')
+    ap.add_argument('--bulk', action='store_true', help='Convert every dump in --in across a process pool')
+    ap.add_argument('--archive', metavar='DIR', help='With --bulk: append to this time-series archive instead of NDJSON')
+    ap.add_argument('--tower-id', help='With --archive: tower the dumps belong to (required; dumps do not record it)')
+    ap.add_argument('--batch-size', type=int, default=1000, help='With --bulk: files per NDJSON batch file')
+    ap.add_argument('--workers', type=int, help='With --bulk: worker processes (default: all cores)')
+    ap.add_argument('--chunksize', type=int, default=16, help='With --bulk: files handed to a worker at a time')
     args = ap.parse_args()
 
+    if args.archive and args.tower_id is None:
+        ap.error('--archive needs --tower-id (the archive is keyed by tower, like the poller and siteboss_api)')
+    if args.bulk:
+        out_dir = args.output_json if args.output_json != ap.get_default('output_json') else 'siteboss_bulk'
+        stats = bulk_convert(args.input_xml, out_dir, args.archive, args.batch_size, args.workers,
+                             args.chunksize, args.tower_id)
+        if not args.archive:
+            print('Saved', stats['batches'], 'batch files to', out_dir)
+        return
+
     data = parse_xml_to_filtered_json(args.input_xml)
-    with open(args.output_json, 'w') as f:
-        json.dump(data, f, indent=2)
+    serialization.dump_file(data, args.output_json, pretty=args.pretty)
     print('Saved', args.output_json)
 
 if __name__ == '__main__':